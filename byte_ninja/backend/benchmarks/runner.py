@@ -1,60 +1,189 @@
+import json
+import tracemalloc
 from sys import argv
+from math import ceil
 from pathlib import Path
 from time import perf_counter
+from argparse import ArgumentParser
+from statistics import mean, median, stdev
 from importlib import import_module
 from cProfile import Profile
 
-from buffers import (
-    bench_cbuffer,
-    bench_overallocation_1k,
-    bench_vector,
-    bench_list,
-)
+from vm.backends import BACKENDS
+from vm.bench_workloads import WORKLOAD_RECORDS
 
+# the modules are imported on demand, so a suite can run
+# without building the others, a module may be given with
+# the keyword arguments of its run function
 suites = {
     'memory': [
-        bench_cbuffer,
-        bench_overallocation_1k,
-        bench_vector,
-        bench_list,
-    ]
+        'buffers.bench_cbuffer',
+        'buffers.bench_overallocation_1k',
+        'buffers.bench_vector',
+        'buffers.bench_list',
+    ],
+    'vm': [
+        'vm.bench_construct',
+        'vm.bench_pool',
+    ],
+    'decode': [
+        ('vm.bench_workloads', {'workload': workload, 'mode': 'decode', **backend})
+        for workload in WORKLOAD_RECORDS
+        for backend in BACKENDS.values()
+    ],
+    'encode': [
+        ('vm.bench_workloads', {'workload': workload, 'mode': mode, **backend})
+        for workload in WORKLOAD_RECORDS
+        for mode in ('encode', 'pack')
+        for backend in BACKENDS.values()
+    ],
 }
 
 
 
-def run_suite(suite: list, count: int, **kwargs):
-    # results = dict()
-    for mod in suite:
-        assert hasattr(mod, 'run'), 'bench module has no run function'
+def percentile(values: list[float], percent: float) -> float:
+    """ The nearest rank percentile of the values. """
+    ordered = sorted(values)
+    return ordered[max(ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def entry_key(name: str, options: dict) -> str:
+    """ The key of a benchmark and its options in the results. """
+    if not options:
+        return name
+
+    args = ','.join(
+        f'{key}={getattr(value, "name", value)}'
+        for key, value in options.items()
+    )
+    return f'{name}[{args}]'
+
+
+def run_bench(mod, count: int, warmup: int, profile: bool, **kwargs) -> dict:
+    """
+    Run a bench module and return the statistics of its rounds.
+    The warmup, the timed, the memory and the profiled rounds run
+    separately, so neither tracemalloc nor cProfile distort the timings.
+    """
+
+    for i in range(warmup):
+        mod.run(**kwargs)
+
+    values = list()
+    for i in range(count):
+        start = perf_counter()
+        mod.run(**kwargs)
+        end = perf_counter()
 
-        print(f'Running benchmarks for {str(mod)}')
+        delta = end - start
+        values.append(delta)
 
-        values = list()
+        print(f'Round {i + 1} with %.10f seconds' % delta)
+
+    tracemalloc.start()
+    mod.run(**kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        'rounds': count,
+        'mean': mean(values),
+        'median': median(values),
+        'p95': percentile(values, 95),
+        'stddev': stdev(values) if count > 1 else 0.0,
+        'min': min(values),
+        'peak_memory': peak,
+    }
+
+    # workloads report their throughput
+    if hasattr(mod, 'throughput'):
+        records, size = mod.throughput(**kwargs)
+        result['records_per_second'] = records / result['median']
+        result['mb_per_second'] = size / result['median'] / 1e6
+
+    if profile:
         p = Profile()
-        for i in range(count):
-            p.enable()
-            start = perf_counter()
-            mod.run(**kwargs)
-            end = perf_counter()
-            p.disable()
+        p.enable()
+        mod.run(**kwargs)
+        p.disable()
+        p.print_stats('cumtime')
+
+    return result
 
-            delta = end - start
-            values.append(delta)
 
-            print(f'Round {i + 1} with %.10f seconds' % delta)
+def run_suite(suite: list, count: int, warmup: int = 1, profile: bool = False, **kwargs) -> dict:
+    results = dict()
+    for entry in suite:
+        name, options = entry if isinstance(entry, tuple) else (entry, dict())
+        mod = import_module(name)
+        assert hasattr(mod, 'run'), 'bench module has no run function'
 
+        print(f'Running benchmarks for {str(mod)} {options}')
+
+        result = run_bench(mod, count, warmup, profile, **options, **kwargs)
+        results[entry_key(name, options)] = result
 
         print(f'Results for {str(mod)}')
-        print('Avg time %.10f seconds' % (sum(values) / len(values)))
-        p.print_stats('cumtime')
+        print('Median time %.10f seconds' % result['median'])
+        print('P95 time %.10f seconds' % result['p95'])
+        print('Stddev %.10f seconds' % result['stddev'])
+        print('Peak memory %d bytes' % result['peak_memory'])
 
+        if 'records_per_second' in result:
+            print('%.1f records/s' % result['records_per_second'])
+            print('%.3f MB/s' % result['mb_per_second'])
 
-if __name__ == '__main__':
-    target_suite_name = argv[1]
-    target_suite_count = int(argv[2])
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare the median times with a baseline and
+    return the benchmarks, which are slower by more than the threshold.
+    """
+
+    regressions = list()
+    for key, result in results.items():
+        if key not in baseline:
+            print(f'{key}: not in the baseline')
+            continue
+
+        change = result['median'] / baseline[key]['median'] - 1
+        print(f'{key}: %+.1f%%' % (change * 100))
 
-    run_suite(suites[target_suite_name], target_suite_count)
+        if change > threshold:
+            regressions.append(key)
 
+    return regressions
 
 
+def main(args: list[str]) -> int:
+    parser = ArgumentParser(description='Run a benchmark suite.')
+    parser.add_argument('suite', choices=suites)
+    parser.add_argument('count', type=int, help='the amount of timed rounds')
+    parser.add_argument('--warmup', type=int, default=1, help='the amount of untimed rounds')
+    parser.add_argument('--profile', action='store_true', help='print the stats of a profiled round')
+    parser.add_argument('--save', type=Path, help='save the results as a json baseline')
+    parser.add_argument('--compare', type=Path, help='compare the results with a json baseline')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='the relative slowdown, which counts as a regression')
+    options = parser.parse_args(args)
 
+    results = run_suite(suites[options.suite], options.count, options.warmup, options.profile)
+
+    if options.save:
+        options.save.write_text(json.dumps(results, indent=4))
+
+    if options.compare:
+        baseline = json.loads(options.compare.read_text())
+        regressions = compare(results, baseline, options.threshold)
+
+        if regressions:
+            print(f'Regressions over {options.threshold:.1%}: {", ".join(regressions)}')
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main(argv[1:]))
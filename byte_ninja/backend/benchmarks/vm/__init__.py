@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the virtual machine lives in minimal.py at the root of the repository
+sys.path.append(str(Path(__file__).parents[4]))
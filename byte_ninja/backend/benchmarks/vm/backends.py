@@ -0,0 +1,8 @@
+from minimal import Engine
+
+# the backends with a virtual machine, every one is benchmarked with the
+# keyword arguments given here, the Cython backend doesn't have one yet
+BACKENDS = {
+    f'minimal.{engine.name.lower()}': {'engine': engine}
+    for engine in Engine
+}
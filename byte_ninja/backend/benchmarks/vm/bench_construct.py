@@ -0,0 +1,16 @@
+from vm.run_counts import *
+from vm.records import message_database, MESSAGE_SIZE
+
+from minimal import BufferStream, VirtualMachine
+
+database = message_database()
+message = database['message']
+data = bytes(MESSAGE_SIZE)
+
+
+def run():
+    for i in range(ITERS):
+        for _ in range(MESSAGES):
+            # a new machine for every message
+            vm = VirtualMachine(database, BufferStream(data))
+            message.read(vm)
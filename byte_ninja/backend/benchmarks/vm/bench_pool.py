@@ -0,0 +1,17 @@
+from vm.run_counts import *
+from vm.records import message_database, MESSAGE_SIZE
+
+from minimal import BufferStream, machine_pool
+
+database = message_database()
+message = database['message']
+data = bytes(MESSAGE_SIZE)
+
+
+def run():
+    for i in range(ITERS):
+        for _ in range(MESSAGES):
+            # a warm machine borrowed from the pool
+            vm = machine_pool.acquire(database, BufferStream(data))
+            message.read(vm)
+            machine_pool.release(vm)
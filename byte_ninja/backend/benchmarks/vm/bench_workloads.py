@@ -0,0 +1,35 @@
+from vm.run_counts import *
+from vm.workloads import make_workload
+
+from minimal import Engine
+
+# the records of every workload
+WORKLOAD_RECORDS = {
+    'flat': RECORDS,
+    'nested': RECORDS,
+    'arrays': ARRAY_RECORDS,
+    'cstrings': RECORDS,
+    'tlv': RECORDS,
+}
+
+# the workloads are made on demand, so a suite only builds the ones it runs
+workloads = dict()
+
+
+def get_workload(name: str):
+    if name not in workloads:
+        workloads[name] = make_workload(name, WORKLOAD_RECORDS[name])
+    return workloads[name]
+
+
+def throughput(workload: str = 'flat', **_) -> tuple[int, int]:
+    """ The amount of records and bytes of a single run. """
+    records = get_workload(workload)
+    return ITERS * records.count, ITERS * records.size
+
+
+def run(workload: str = 'flat', mode: str = 'decode', engine: Engine = Engine.INTERPRETER):
+    records = get_workload(workload)
+
+    for i in range(ITERS):
+        records.run(mode, engine)
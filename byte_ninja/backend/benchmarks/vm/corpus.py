@@ -0,0 +1,126 @@
+from sys import argv
+from pathlib import Path
+from random import Random
+from argparse import ArgumentParser, ArgumentTypeError
+
+from minimal import (
+    Engine,
+    DataType,
+    DataStream,
+    OperationMode,
+    VirtualMachine,
+)
+from vm.schema import Value, Distribution, Fixed, Uniform, Normal, Weighted
+from vm.workloads import CORPORA, arrays_schema, cstrings_schema, tlv_schema
+
+
+# the schema of every workload with distributions and the
+# keyword argument of the schema, which every option sets
+SCHEMA_OPTIONS = {
+    'arrays': (arrays_schema, {'array_length': 'length'}),
+    'cstrings': (cstrings_schema, {'cstring_length': 'length'}),
+    'tlv': (tlv_schema, {'tags': 'tags', 'cstring_length': 'length'}),
+}
+
+
+def write_corpus(database: dict[str, DataType], name: str, schema: Value,
+                 count: int, path: str | Path, seed: int = 0,
+                 buffer_size: int = 1 << 20) -> int:
+    """
+    Write count random values of a type to a file through its write code
+    and return the size of the file. Every value is written as soon as it is
+    generated, so the corpus never has to fit into memory.
+    The same seed always produces the same corpus.
+    """
+
+    random = Random(seed)
+    write = database[name].write
+
+    with open(path, 'wb', buffering=buffer_size) as file:
+        vm = VirtualMachine(database, DataStream(file, OperationMode.WRITE))
+
+        for _ in range(count):
+            write(vm, schema.sample(random, dict()))
+
+        return file.tell()
+
+
+def distribution(text: str) -> Distribution:
+    """
+    Parse a distribution of the command line:
+
+        fixed:VALUE
+        uniform:LOW:HIGH
+        normal:MEAN:STDDEV[:LOW[:HIGH]]
+        weighted:VALUE=WEIGHT,...
+    """
+
+    kind, _, arguments = text.partition(':')
+
+    try:
+        if kind == 'fixed':
+            return Fixed(int(arguments))
+        if kind == 'uniform':
+            low, high = map(int, arguments.split(':'))
+            return Uniform(low, high)
+        if kind == 'normal':
+            mean, stddev, *bounds = arguments.split(':')
+            return Normal(float(mean), float(stddev), *map(int, bounds))
+        if kind == 'weighted':
+            weights = dict(weight.split('=') for weight in arguments.split(','))
+            return Weighted({int(value): float(weight) for value, weight in weights.items()})
+    except (TypeError, ValueError):
+        raise ArgumentTypeError(f'invalid arguments of the {kind} distribution: {arguments!r}') from None
+
+    raise ArgumentTypeError(f'unknown distribution {kind!r}')
+
+
+def workload_schema(workload: str, **distributions: Distribution | None) -> Value:
+    """ The schema of a workload, the distributions, which aren't given, are the defaults. """
+    distributions = {option: value for option, value in distributions.items() if value is not None}
+
+    if workload not in SCHEMA_OPTIONS:
+        if distributions:
+            raise ValueError(f'the {workload} workload has no distributions')
+        return CORPORA[workload][2]
+
+    schema, arguments = SCHEMA_OPTIONS[workload]
+    unknown = distributions.keys() - arguments.keys()
+    if unknown:
+        raise ValueError(f'the {workload} workload has no {", ".join(sorted(unknown))}')
+
+    return schema(**{arguments[option]: value for option, value in distributions.items()})
+
+
+def main(args: list[str]):
+    parser = ArgumentParser(description='Generate a corpus for a benchmark workload.')
+    parser.add_argument('workload', choices=CORPORA)
+    parser.add_argument('count', type=int, help='the amount of records')
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--array-length', type=distribution,
+                        help='the lengths of the arrays, e.g. uniform:0:64')
+    parser.add_argument('--cstring-length', type=distribution,
+                        help='the lengths of the cstrings, e.g. normal:16:4')
+    parser.add_argument('--tags', type=distribution,
+                        help='the mix of the tlv tags, e.g. weighted:1=4,2=1,3=1,4=2')
+    options = parser.parse_args(args)
+
+    database, name, _ = CORPORA[options.workload]
+
+    try:
+        schema = workload_schema(
+            options.workload,
+            array_length=options.array_length,
+            cstring_length=options.cstring_length,
+            tags=options.tags,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    size = write_corpus(database(Engine.INTERPRETER), name, schema, options.count, options.path, options.seed)
+    print(f'Wrote {options.count} records with {size} bytes to {options.path}')
+
+
+if __name__ == '__main__':
+    main(argv[1:])
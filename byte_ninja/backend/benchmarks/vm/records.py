@@ -0,0 +1,47 @@
+from minimal import (
+    Instruction,
+    ComplexType,
+    assemble,
+    get_database,
+)
+
+
+class Record(ComplexType):
+    def empty(self) -> dict:
+        return dict()
+
+
+def field(name: str, typ: str) -> list[tuple]:
+    """ Read a value and store it in a field. """
+    return [
+        (Instruction.READ, typ),
+        (Instruction.PUT, name),
+        (Instruction.POP,),
+    ]
+
+
+def store(name: str, typ: str) -> list[tuple]:
+    """ Write a value from a field. """
+    return [
+        (Instruction.GET, name),
+        (Instruction.WRITE, typ),
+        (Instruction.POP,),
+    ]
+
+
+def record(*fields: tuple[str, str], **kwargs) -> Record:
+    """ A record of fields, given as name and type, one after another. """
+    return Record(
+        assemble(*(inst for f in fields for inst in field(*f)), (Instruction.RET,)),
+        assemble(*(inst for f in fields for inst in store(*f)), (Instruction.RET,)),
+        **kwargs,
+    )
+
+
+def message_database() -> dict:
+    database = get_database()
+    database['message'] = record(('id', 'u32l'), ('kind', 'u8l'), ('length', 'u16l'), ('value', 'f64'))
+    return database
+
+
+MESSAGE_SIZE = 15
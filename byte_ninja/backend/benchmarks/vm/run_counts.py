@@ -0,0 +1,6 @@
+ITERS = 5
+MESSAGES = 20_000
+
+# the records of every workload
+RECORDS = 20_000
+ARRAY_RECORDS = 200
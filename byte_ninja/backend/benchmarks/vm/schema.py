@@ -0,0 +1,154 @@
+from random import Random
+from abc import ABC, abstractmethod
+
+from minimal import IntType, get_database
+
+
+class Distribution(ABC):
+    """ A distribution of integers, e.g. of lengths or counts. """
+
+    @abstractmethod
+    def sample(self, random: Random) -> int:
+        ...
+
+
+class Fixed(Distribution):
+    def __init__(self, value: int):
+        self.value = value
+
+    def sample(self, random: Random) -> int:
+        return self.value
+
+
+class Uniform(Distribution):
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.high = high
+
+    def sample(self, random: Random) -> int:
+        return random.randint(self.low, self.high)
+
+
+class Normal(Distribution):
+    """ A rounded normal distribution, which is clamped to its bounds. """
+
+    def __init__(self, mean: float, stddev: float, low: int = 0, high: int | None = None):
+        self.mean = mean
+        self.stddev = stddev
+        self.low = low
+        self.high = high
+
+    def sample(self, random: Random) -> int:
+        value = max(round(random.gauss(self.mean, self.stddev)), self.low)
+        return value if self.high is None else min(value, self.high)
+
+
+class Weighted(Distribution):
+    """ A choice of values, e.g. tags, by their weights. """
+
+    def __init__(self, weights: dict[int, float]):
+        self.values = list(weights)
+        self.weights = list(weights.values())
+
+    def sample(self, random: Random) -> int:
+        return random.choices(self.values, self.weights)[0]
+
+
+class Value(ABC):
+    """ The schema of a value, which generates random values of its type. """
+
+    @abstractmethod
+    def sample(self, random: Random, record: dict) -> object:
+        """ Generate a value, record holds the fields generated before it. """
+        ...
+
+
+class Int(Value):
+    """ Any value of an integer type of the database. """
+
+    def __init__(self, typ: str):
+        dt = get_database()[typ]
+        assert isinstance(dt, IntType)
+
+        bits = dt.size * 8
+        self.low = -2 ** (bits - 1) if dt.signed else 0
+        self.high = self.low + 2 ** bits - 1
+
+    def sample(self, random: Random, record: dict) -> int:
+        return random.randint(self.low, self.high)
+
+
+class Float(Value):
+    """ Floats, which are exact in 32 bits, so they round trip through f32 and f64. """
+
+    def __init__(self, low: int = -1024, high: int = 1024):
+        self.low = low
+        self.high = high
+
+    def sample(self, random: Random, record: dict) -> float:
+        return random.randint(self.low * 4, self.high * 4) / 4
+
+
+class Bytes(Value):
+    """ Bytes out of an alphabet, e.g. the value of a cstring. """
+
+    def __init__(self, length: Distribution,
+                 alphabet: bytes = b'abcdefghijklmnopqrstuvwxyz0123456789/.-'):
+        assert b'\x00' not in alphabet, 'cstrings mustn\'t contain their delimiter'
+        self.length = length
+        self.alphabet = alphabet
+
+    def sample(self, random: Random, record: dict) -> bytes:
+        return bytes(random.choices(self.alphabet, k=self.length.sample(random)))
+
+
+class Length(Value):
+    """ A length field, which the arrays after it use. """
+
+    def __init__(self, length: Distribution):
+        self.length = length
+
+    def sample(self, random: Random, record: dict) -> int:
+        return self.length.sample(random)
+
+
+class Array(Value):
+    """ A list of items, its length is a distribution or the name of a Length field. """
+
+    def __init__(self, item: Value, length: Distribution | str):
+        self.item = item
+        self.length = length
+
+    def sample(self, random: Random, record: dict) -> list:
+        if isinstance(self.length, str):
+            length = record[self.length]
+        else:
+            length = self.length.sample(random)
+
+        return [self.item.sample(random, record) for _ in range(length)]
+
+
+class Fields(Value):
+    """ A dict of fields, which are generated in order. """
+
+    def __init__(self, **fields: Value):
+        self.fields = fields
+
+    def sample(self, random: Random, record: dict | None = None) -> dict:
+        value = dict()
+        for name, field in self.fields.items():
+            value[name] = field.sample(random, value)
+        return value
+
+
+class Branch(Value):
+    """ A record, which is chosen by a tag, that is stored in the tag field. """
+
+    def __init__(self, tag: str, tags: Distribution, records: dict[int, Fields]):
+        self.tag = tag
+        self.tags = tags
+        self.records = records
+
+    def sample(self, random: Random, record: dict | None = None) -> dict:
+        tag = self.tags.sample(random)
+        return {self.tag: tag, **self.records[tag].sample(random)}
@@ -0,0 +1,287 @@
+from io import BytesIO
+from random import Random
+from typing import Callable
+
+from minimal import (
+    Engine,
+    Instruction,
+    TestOperation,
+    DataStream,
+    OperationMode,
+    VirtualMachine,
+    assemble,
+    get_database,
+    read_many,
+    write_many,
+)
+from vm.records import Record, record, field, store
+from vm.schema import (
+    Value,
+    Distribution,
+    Fixed,
+    Uniform,
+    Weighted,
+    Int,
+    Float,
+    Bytes,
+    Length,
+    Array,
+    Branch,
+    Fields,
+)
+
+
+class Workload:
+    """
+    Records of a type, which are encoded once with the interpreter,
+    so every backend decodes and encodes the same data.
+    """
+
+    def __init__(self, database: Callable[[Engine], dict], name: str,
+                 schema: Value, count: int, seed: int = 0):
+        self.databases = {engine: database(engine) for engine in Engine}
+        self.name = name
+        random = Random(seed)
+        self.records = [schema.sample(random, dict()) for _ in range(count)]
+        self.data = self.encode(Engine.INTERPRETER)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def decode(self, engine: Engine) -> list:
+        return read_many(self.databases[engine], self.name, self.data, self.count)
+
+    def encode(self, engine: Engine) -> bytes:
+        database = self.databases[engine]
+        target = BytesIO()
+        vm = VirtualMachine(database, DataStream(target, OperationMode.WRITE))
+        write = database[self.name].write
+
+        for value in self.records:
+            write(vm, value)
+
+        return target.getvalue()
+
+    def pack(self, engine: Engine, batch: int = 256) -> bytes:
+        """ Encode into an output buffer, which is flushed once per batch. """
+        target = BytesIO()
+        write_many(self.databases[engine], self.name, self.records, target, batch)
+        return target.getvalue()
+
+    def run(self, mode: str, engine: Engine):
+        if mode == 'decode':
+            self.decode(engine)
+        elif mode == 'pack':
+            self.pack(engine)
+        else:
+            self.encode(engine)
+
+
+FLAT_FIELDS = (
+    ('id', 'u64l'),
+    ('time', 'u64l'),
+    ('source', 'u32l'),
+    ('target', 'u32l'),
+    ('kind', 'u8l'),
+    ('flags', 'u8l'),
+    ('port', 'u16b'),
+    ('length', 'u16l'),
+    ('offset', 'i32l'),
+    ('delta', 'i16l'),
+    ('value', 'f64'),
+    ('ratio', 'f32'),
+)
+
+
+def flat_database(engine: Engine) -> dict:
+    """ Fixed size records of primitive fields. """
+    types = get_database()
+    types['flat'] = record(*FLAT_FIELDS, engine=engine)
+    return types
+
+
+FLAT = Fields(**{
+    name: Float() if typ.startswith('f') else Int(typ)
+    for name, typ in FLAT_FIELDS
+})
+
+
+def nested_database(engine: Engine) -> dict:
+    """ Records with an array of nested point records. """
+    types = get_database()
+    types['point'] = record(('x', 'f32'), ('y', 'f32'), ('z', 'f32'), engine=engine)
+    types['shape'] = Record(
+        assemble(
+            *field('id', 'u32l'),
+            (Instruction.EMPTY, 0),
+            (Instruction.LOOPX, 4, [
+                (Instruction.READ, 'point'),
+                (Instruction.APPEND, 0),
+                (Instruction.POP,),
+            ]),
+            (Instruction.FINISH, 0),
+            (Instruction.PUT, 'corners'),
+            (Instruction.POP,),
+            *field('color', 'u32l'),
+            (Instruction.RET,),
+        ),
+        assemble(
+            *store('id', 'u32l'),
+            (Instruction.EDIT, 0, 'corners'),
+            (Instruction.FLIP, 0),
+            (Instruction.LOOPX, 4, [
+                (Instruction.YIELD, 0),
+                (Instruction.WRITE, 'point'),
+                (Instruction.POP,),
+            ]),
+            (Instruction.FORGET, 0),
+            *store('color', 'u32l'),
+            (Instruction.RET,),
+        ),
+        engine,
+    )
+    return types
+
+
+NESTED = Fields(
+    id=Int('u32l'),
+    corners=Array(Fields(x=Float(), y=Float(), z=Float()), Fixed(4)),
+    color=Int('u32l'),
+)
+
+
+def arrays_database(engine: Engine) -> dict:
+    """ Records with two long primitive arrays sharing a length prefix. """
+    types = get_database()
+    types['samples'] = Record(
+        assemble(
+            (Instruction.READ, 'u16l'),
+            (Instruction.PUT, 'count'),
+            (Instruction.RARRAY, 'f32'),
+            (Instruction.PUT, 'values'),
+            (Instruction.POP,),
+            (Instruction.RARRAY, 'u16l'),
+            (Instruction.PUT, 'ids'),
+            (Instruction.POP,),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(
+            *store('count', 'u16l'),
+            (Instruction.GET, 'values'),
+            (Instruction.WARRAY, 'f32'),
+            (Instruction.POP,),
+            (Instruction.GET, 'ids'),
+            (Instruction.WARRAY, 'u16l'),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        engine,
+    )
+    return types
+
+
+def arrays_schema(length: Distribution = Uniform(256, 1024)) -> Fields:
+    return Fields(
+        count=Length(length),
+        values=Array(Float(), 'count'),
+        ids=Array(Int('u16l'), 'count'),
+    )
+
+
+CSTRING_FIELDS = (
+    ('method', 'cstring'),
+    ('host', 'cstring'),
+    ('path', 'cstring'),
+    ('agent', 'cstring'),
+    ('status', 'u16l'),
+)
+
+
+def cstrings_database(engine: Engine) -> dict:
+    """ Records made up mostly of null terminated strings. """
+    types = get_database()
+    types['request'] = record(*CSTRING_FIELDS, engine=engine)
+    return types
+
+
+def cstrings_schema(length: Distribution = Uniform(4, 64)) -> Fields:
+    return Fields(**{
+        name: Bytes(length) if typ == 'cstring' else Int(typ)
+        for name, typ in CSTRING_FIELDS
+    })
+
+
+# the tag, the field and the type of every tlv value
+TLV_VALUES = (
+    (1, 'int', 'u32l'),
+    (2, 'real', 'f64'),
+    (3, 'text', 'cstring'),
+    (4, 'short', 'i16b'),
+)
+
+
+def tlv_database(engine: Engine) -> dict:
+    """ A stream of tagged values, where every value takes a branch on its tag. """
+
+    def branches(code: Callable[[str, str], list[tuple]]) -> list[tuple]:
+        instructions = list()
+
+        for tag, name, typ in TLV_VALUES:
+            instructions += [
+                (Instruction.PUSH, tag),
+                (Instruction.TEST, TestOperation.EQ, code(name, typ)),
+                (Instruction.POP,),
+            ]
+
+        return instructions
+
+    types = get_database()
+    types['tlv'] = Record(
+        assemble(
+            (Instruction.READ, 'u8l'),
+            (Instruction.PUT, 'tag'),
+            *branches(field),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(
+            (Instruction.GET, 'tag'),
+            (Instruction.WRITE, 'u8l'),
+            *branches(store),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        engine,
+    )
+    return types
+
+
+def tlv_schema(tags: Distribution = Weighted({1: 1, 2: 1, 3: 1, 4: 1}),
+               length: Distribution = Uniform(0, 16)) -> Branch:
+    return Branch('tag', tags, {
+        1: Fields(int=Int('u32l')),
+        2: Fields(real=Float()),
+        3: Fields(text=Bytes(length, b'abcdef')),
+        4: Fields(short=Int('i16b')),
+    })
+
+
+# the database, the type and the default schema of every workload
+CORPORA = {
+    'flat': (flat_database, 'flat', FLAT),
+    'nested': (nested_database, 'shape', NESTED),
+    'arrays': (arrays_database, 'samples', arrays_schema()),
+    'cstrings': (cstrings_database, 'request', cstrings_schema()),
+    'tlv': (tlv_database, 'tlv', tlv_schema()),
+}
+
+
+def make_workload(name: str, count: int, seed: int = 0) -> Workload:
+    database, typ, schema = CORPORA[name]
+    return Workload(database, typ, schema, count, seed)
@@ -3,6 +3,7 @@ from .token import *
 from .lexer import tokenize
 from byte_ninja.stream import BufferedStream
 from .syntax import SyntaxTree, Node, NODE_LEVEL
+from .optimizer import Optimizer
 from .codes import BYTECODE_BYTEORDER, OperationMode
 
 from enum import IntEnum
@@ -17,10 +18,18 @@ class Assembler:
         SKIP = 4
 
 
-    def __init__(self, source: str, mode: OperationMode):
+    def __init__(self, source: str, mode: OperationMode, optimize: bool = False):
         self.mode = mode
         self.tokens = tokenize(source)
         self.tree = SyntaxTree(self.tokens)
+
+        # the stats of the optimizer, if it was used
+        self.stats: dict[str, int] | None = None
+
+        if optimize:
+            optimizer = Optimizer()
+            optimizer.optimize(self.tree)
+            self.stats = optimizer.stats
         self.name_table = list()
         self.bytecode = BufferedStream()
         self.bytecode.byteorder = BYTECODE_BYTEORDER
@@ -88,4 +88,19 @@ class OperationCode(IntEnum):
     NOT = 6
 
 
+class SeekMode(IntEnum):
+    START = 0
+    REL = 1
+    END = 2
+
+
+class OperationMode(IntEnum):
+    WRITE = 0
+    READ = 1
+
+
+# alias
+Byteorder = ByteOrder
+
 BYTECODE_BYTEORDER = ByteOrder.LITTLE
+BYTECODE_BYTEORDER_AS_LITERAL = BYTECODE_BYTEORDER.as_literal()
@@ -0,0 +1,235 @@
+from .token import *
+from .codes import OPCode, OperationCode
+from .syntax import Node, NODE_LEVEL
+from byte_ninja.sizes import QWORD
+
+from operator import eq, ne, lt, gt, le, ge
+
+
+# the compare functions of the tests, called with the top
+# of the stack as the left and the value below as the right operand
+OPERATIONS = {
+    OperationCode.EQ: eq,
+    OperationCode.NE: ne,
+    OperationCode.LT: lt,
+    OperationCode.GT: gt,
+    OperationCode.LE: le,
+    OperationCode.GE: ge,
+}
+
+# the seeks, which go to the same position when they are repeated
+ABSOLUTE_SEEKS = (TOK_SEEK_START, TOK_SEEK_END)
+
+
+class Optimizer:
+    """
+    A peephole optimizer for syntax trees, which runs its passes
+    on every level until nothing changes anymore:
+
+        - a PUSH followed by a POP is removed
+        - instructions behind a RET or a BREAK inside of a loop are removed
+        - tests of pushed constants are replaced by their body or removed
+        - a SEEK to the same START or END position as the one in front
+          of it is removed and relative seeks by pushed constants are merged
+
+    The number of changes of every pass is counted in the stats.
+    """
+
+    PASSES = (
+        'push_pop',
+        'dead_code',
+        'constant_tests',
+        'seeks',
+    )
+
+    def __init__(self):
+        # the number of loops around the optimized level
+        self.loop_depth = 0
+
+        self.stats = dict.fromkeys(self.PASSES, 0)
+        self.stats['before'] = 0
+        self.stats['after'] = 0
+
+    @classmethod
+    def count(cls, level: list) -> int:
+        """ Count the instructions of a level and its sub levels. """
+        total = 0
+
+        for node in level:
+            total += 1
+
+            for value in node:
+                if isinstance(value, Node) and value.type == NODE_LEVEL:
+                    total += cls.count(value)
+
+        return total
+
+    def optimize(self, level: list) -> list:
+        """ Optimize a level in place, sub levels are optimized first. """
+        self.stats['before'] += self.count(level)
+        self.optimize_level(level)
+        self.stats['after'] += self.count(level)
+        return level
+
+    def optimize_level(self, level: list):
+        for node in level:
+            loop = node.type in (OPCode.LOOP, OPCode.LOOPX)
+            self.loop_depth += loop
+
+            for value in node:
+                if isinstance(value, Node) and value.type == NODE_LEVEL:
+                    self.optimize_level(value)
+
+            self.loop_depth -= loop
+
+        passes = (
+            self.remove_push_pop,
+            self.remove_dead_code,
+            self.fold_constant_tests,
+            self.merge_seeks,
+        )
+
+        changed = True
+        while changed:
+            changed = False
+
+            for run in passes:
+                changed |= run(level)
+
+    @staticmethod
+    def constant(node: Node) -> int | None:
+        """ Get the value of a PUSH instruction. """
+        if node.type == OPCode.PUSH:
+            return int(node[0].value)
+        return None
+
+    def remove_push_pop(self, level: list) -> bool:
+        changed = False
+        i = 0
+
+        while i < len(level) - 1:
+            if level[i].type == OPCode.PUSH and level[i + 1].type == OPCode.POP:
+                del level[i:i + 2]
+                self.stats['push_pop'] += 1
+                changed = True
+
+                # the pair may have been inside another one
+                i = max(i - 1, 0)
+            else:
+                i += 1
+
+        return changed
+
+    def remove_dead_code(self, level: list) -> bool:
+        # a break outside of a loop has no effect
+        ends = (OPCode.RET, OPCode.BREAK) if self.loop_depth else (OPCode.RET,)
+
+        for i, node in enumerate(level):
+            if node.type in ends and i + 1 < len(level):
+                self.stats['dead_code'] += len(level) - i - 1
+                del level[i + 1:]
+                return True
+
+        return False
+
+    def fold_constant_tests(self, level: list) -> bool:
+        changed = False
+        i = 0
+
+        while i < len(level):
+            node = level[i]
+
+            if node.type != OPCode.TEST:
+                i += 1
+                continue
+
+            operation = TOKEN_TO_OPERATION[node[0].type]
+            result = None
+
+            if operation == OperationCode.NOT:
+                if i >= 1 and (left := self.constant(level[i - 1])) is not None:
+                    result = not left
+            elif i >= 2:
+                left = self.constant(level[i - 1])
+                right = self.constant(level[i - 2])
+
+                if left is not None and right is not None:
+                    result = OPERATIONS[operation](left, right)
+
+            if result is None:
+                i += 1
+                continue
+
+            # a test doesn't change the stack,
+            # so its body can take its place
+            body = node[2] if result else []
+            level[i:i + 1] = body
+            self.stats['constant_tests'] += 1
+            changed = True
+
+            i += len(body)
+
+        return changed
+
+    def merge_seeks(self, level: list) -> bool:
+        changed = False
+        i = 0
+
+        while i < len(level) - 1:
+            node, following = level[i], level[i + 1]
+
+            if (
+                node.type == following.type == OPCode.SEEK and
+                node[0].type == following[0].type and
+                node[0].type in ABSOLUTE_SEEKS
+            ):
+                # the position is the same
+                del level[i + 1]
+                self.stats['seeks'] += 1
+                changed = True
+                continue
+
+            if self.merge_relative_seeks(level, i):
+                self.stats['seeks'] += 1
+                changed = True
+                continue
+
+            i += 1
+
+        return changed
+
+    def merge_relative_seeks(self, level: list, i: int) -> bool:
+        """
+        Merge two relative seeks by pushed offsets:
+
+            push a, seek REL, pop, push b, seek REL, pop
+
+        into a single one by a + b. Pushed offsets are never
+        negative, so no position in between is in front of both.
+        """
+
+        window = level[i:i + 6]
+        if [node.type for node in window] != [
+            OPCode.PUSH, OPCode.SEEK, OPCode.POP,
+            OPCode.PUSH, OPCode.SEEK, OPCode.POP,
+        ]:
+            return False
+
+        if window[1][0].type != TOK_SEEK_REL or window[4][0].type != TOK_SEEK_REL:
+            return False
+
+        offset = self.constant(window[0]) + self.constant(window[3])
+        if offset >= 1 << (QWORD * 8):
+            return False
+
+        token = window[0][0]
+        level[i] = Node(OPCode.PUSH, Token(TOK_NUMBER, str(offset), token.lineno, token.whitespace))
+        del level[i + 3:i + 6]
+        return True
+
+
+def optimize(level: list) -> dict[str, int]:
+    """ Optimize a syntax tree in place and get the stats of the optimizer. """
+    optimizer = Optimizer()
+    optimizer.optimize(level)
+    return optimizer.stats
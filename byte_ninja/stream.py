@@ -3,13 +3,16 @@ from __future__ import annotations
 from byte_ninja.sizes import BYTE
 from byte_ninja.enums import ByteOrder, StreamMode
 
-from io import BytesIO, IOBase, RawIOBase, SEEK_END
+from os import PathLike, fstat
+from mmap import mmap, ACCESS_READ
+from io import BytesIO, IOBase, RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
 
 
 __all__ = [
     'Stream',
     'BufferedStream',
     'StreamWrapper',
+    'MappedStream',
 ]
 
 
@@ -165,18 +168,216 @@ class Stream(RawIOBase):
         )
 
 
-class BufferedStream(Stream, BytesIO):
+class BufferedStream(BytesIO, Stream):
     def __init__(self, data: bytes = b'', byteorder: ByteOrder = None):
         BytesIO.__init__(self, data)
         Stream.__init__(self, byteorder)
 
 
 class StreamWrapper(Stream):
-    def __init__(self, stream: IOBase, byteorder: ByteOrder = None):
-        super().__init__(byteorder)
+    """
+    A stream over another stream.
+
+    With a write buffer size, small writes are coalesced into a buffer,
+    which is written to the inner stream, when it reaches the size
+    or on flush. Seeking inside the buffer patches it in place,
+    any other seek or read flushes it first.
+    """
+
+    def __init__(self, stream: IOBase, byteorder: ByteOrder = None, write_buffer: int = 0):
         self._stream = stream
+        self._write_buffer = write_buffer
+        self._pending = bytearray()
+        self._pos = 0  # the position in the pending data
+        super().__init__(byteorder)
 
     @property
     def inner(self) -> IOBase:
         return self._stream
 
+    def readable(self) -> bool:
+        return self._stream.readable()
+
+    def writable(self) -> bool:
+        return self._stream.writable()
+
+    def seekable(self) -> bool:
+        return self._stream.seekable()
+
+    def tell(self) -> int:
+        return self._stream.tell() + self._pos
+
+    def seek(self, pos: int, whence: int = SEEK_SET) -> int:
+        if self._pending:
+            base = self._stream.tell()
+
+            if whence == SEEK_CUR:
+                pos, whence = base + self._pos + pos, SEEK_SET
+
+            if whence == SEEK_SET and base <= pos <= base + len(self._pending):
+                self._pos = pos - base
+                return pos
+
+            self._flush_pending()
+
+        return self._stream.seek(pos, whence)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._pending:
+            self._flush_pending()
+        return self._stream.read(size)
+
+    def readinto(self, buffer) -> int:
+        if self._pending:
+            self._flush_pending()
+        return self._stream.readinto(buffer)
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+
+        if not self._pending:
+            if not self._write_buffer:
+                return self._stream.write(data)
+
+            if size >= self._write_buffer:
+                self._write_all(data)
+                return size
+
+            self._pending += data
+            self._pos = size
+            return size
+
+        pos = self._pos
+        self._pending[pos:pos + size] = data
+        self._pos = pos + size
+
+        if len(self._pending) >= self._write_buffer:
+            self._flush_pending()
+
+        return size
+
+    def _flush_pending(self):
+        """ Write the pending data to the inner stream. """
+        pending, pos = self._pending, self._pos
+        self._pending = bytearray()
+        self._pos = 0
+
+        self._write_all(pending)
+
+        if pos != len(pending):
+            self._stream.seek(pos - len(pending), SEEK_CUR)
+
+    def _write_all(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            # raw streams may write only a part
+            view = view[self._stream.write(view):]
+
+    def flush(self):
+        if not self._stream.closed:
+            if self._pending:
+                self._flush_pending()
+            self._stream.flush()
+
+
+class MappedStream(Stream):
+    """
+    A read only stream over a memory mapped file.
+
+    Reads copy straight out of the mapping and getbuffer()
+    gives a zero-copy view of the whole file.
+    """
+
+    def __init__(self, path: str | PathLike, byteorder: ByteOrder = None):
+        with open(path, 'rb') as file:
+            if fstat(file.fileno()).st_size == 0:
+                # empty files cannot be mapped
+                self._map = b''
+            else:
+                self._map = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        self._pos = 0
+        super().__init__(byteorder)
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return False
+
+    def seekable(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    @property
+    def eof(self) -> bool:
+        return self._pos >= len(self._map)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = SEEK_SET) -> int:
+        if whence == SEEK_SET:
+            new = pos
+        elif whence == SEEK_CUR:
+            new = self._pos + pos
+        elif whence == SEEK_END:
+            new = len(self._map) + pos
+        else:
+            raise ValueError('invalid whence', whence)
+
+        if new < 0:
+            raise ValueError('negative seek position', new)
+
+        self._pos = new
+        return new
+
+    def read(self, size: int = -1) -> bytes:
+        start = min(self._pos, len(self._map))
+        end = len(self._map) if size is None or size < 0 else start + size
+
+        data = self._map[start:end]
+        self._pos = start + len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast('B')
+        data = self.read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+    def getbuffer(self) -> memoryview:
+        """
+        Get a zero-copy view of the mapped file,
+        the view has to be released before the stream is closed.
+        """
+        return memoryview(self._map)
+
+    def read_raw_cstring(self, delimiter: bytes = b'\x00', fail_eof: bool = False) -> bytes:
+        """
+        Read a sequence of bytes,
+        which are delimited by a delimiter, from the stream.
+        """
+
+        assert len(delimiter) == 1, 'only delimiters of length 1 are allowed'
+
+        start = min(self._pos, len(self._map))
+        end = self._map.find(delimiter, start)
+
+        if end == -1:
+            if fail_eof:
+                raise EOFError
+
+            # consume the rest of the file
+            self._pos = len(self._map)
+            return self._map[start:]
+
+        self._pos = end + 1
+        return self._map[start:end]
+
+    def close(self):
+        if not self.closed and isinstance(self._map, mmap):
+            self._map.close()
+        super().close()
@@ -1,11 +1,29 @@
 from __future__ import annotations
 
-from os import SEEK_CUR, SEEK_END
-from io import BytesIO
-from struct import pack, unpack
+from os import PathLike, SEEK_CUR, SEEK_END, cpu_count, stat
+from sys import byteorder as host_byteorder
+from io import BytesIO, BufferedReader, RawIOBase
+from mmap import mmap
+from array import array
+from asyncio import Protocol, StreamReader
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left
+from itertools import islice
+from collections import defaultdict, deque
+from time import perf_counter
+from contextlib import contextmanager
+from threading import local
+from operator import eq, ne, lt, gt, le, ge
+from struct import Struct
+from keyword import iskeyword
 from enum import IntEnum, Enum
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Literal
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Iterator, Literal, NamedTuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 BYTE = 1
 WORD = 2
@@ -84,11 +102,62 @@ INSTRUCTION_LENGTHS = {
     Instruction.BREAK: BYTE,
     Instruction.TEST: BYTE + BYTE + QWORD,
     Instruction.RET: BYTE,
+    Instruction.SEEK: BYTE + BYTE,
+    Instruction.TELL: BYTE,
     Instruction.GOTO: BYTE + QWORD,
     Instruction.ENCODE: BYTE + QWORD,
     Instruction.DECODE: BYTE + QWORD,
 }
 
+# operand marker for a QWORD index into the name table
+NAME = -1
+
+# the operands of every instruction in encoding order,
+# names are resolved when the code is decoded
+INSTRUCTION_OPERANDS = {
+    Instruction.GET: (NAME,),
+    Instruction.PUT: (NAME,),
+    Instruction.EMPTY: (WORD,),
+    Instruction.EDIT: (WORD, NAME),
+    Instruction.FLIP: (WORD,),
+    Instruction.YIELD: (WORD,),
+    Instruction.APPEND: (WORD,),
+    Instruction.INDEX: (QWORD, WORD),
+    Instruction.FINISH: (WORD,),
+    Instruction.FORGET: (WORD,),
+    Instruction.PUSH: (QWORD,),
+    Instruction.POP: (),
+    Instruction.SEEK: (BYTE,),
+    Instruction.TELL: (),
+    Instruction.READ: (NAME,),
+    Instruction.RARRAY: (NAME,),
+    Instruction.WRITE: (NAME,),
+    Instruction.WARRAY: (NAME,),
+    Instruction.LOOP: (QWORD,),
+    Instruction.LOOPX: (QWORD, QWORD),
+    Instruction.BREAK: (),
+    Instruction.TEST: (BYTE, QWORD),
+    Instruction.RET: (),
+    Instruction.GOTO: (QWORD,),
+    Instruction.ENCODE: (NAME,),
+    Instruction.DECODE: (NAME,),
+}
+
+# the operand holding the instruction count of a block body
+BLOCK_COUNT_OPERAND = {
+    Instruction.LOOP: 0,
+    Instruction.LOOPX: 1,
+    Instruction.TEST: 1,
+}
+
+
+# the array typecode for every kind and item size
+ARRAY_TYPECODES = {
+    (kind, array(code).itemsize): code
+    for kind, codes in (('i', 'qlihb'), ('u', 'QLIHB'), ('f', 'df'))
+    for code in codes
+}
+
 
 class TestOperation(IntEnum):
     EQ = 0
@@ -116,6 +185,17 @@ class Byteorder(Enum):
     BIG = 'big'
 
 
+class EOFPolicy(IntEnum):
+    ERROR = 0  # raise an EOFError for a trailing partial record
+    STOP = 1  # drop a trailing partial record and stop
+
+
+class ArrayType(IntEnum):
+    LIST = 0  # a list of values
+    ARRAY = 1  # an array.array for primitives
+    NUMPY = 2  # a numpy array for primitives
+
+
 class DataStream:
     def __init__(self, stream: BinaryIO, mode: OperationMode):
         self._stream = stream
@@ -126,6 +206,19 @@ class DataStream:
         else:
             assert stream.writable()
 
+    @property
+    def eof(self) -> bool:
+        stream = self._stream
+
+        # buffered readers, also over sockets and pipes, can look ahead
+        if hasattr(stream, 'peek'):
+            return not stream.peek(1)
+
+        pos = stream.tell()
+        end = stream.seek(0, SEEK_END)
+        stream.seek(pos)
+        return pos >= end
+
     def tell(self) -> int:
         return self._stream.tell()
 
@@ -148,17 +241,257 @@ class DataStream:
             raise EOFError
         return data
 
+    def unpack(self, struct: Struct) -> tuple:
+        return struct.unpack(self.read(struct.size))
+
+    def read_until(self, delimiter: bytes) -> bytes:
+        """ Read the bytes in front of the delimiter and skip it. """
+        result = bytearray()
+
+        while (char := self.read(1)) != delimiter:
+            result += char
+
+        return bytes(result)
+
     def write(self, data: bytes):
         assert self.mode == OperationMode.WRITE
 
         self._stream.write(data)
 
+    def pack(self, struct: Struct, *values: object):
+        self.write(struct.pack(*values))
+
+    def flush(self):
+        self._stream.flush()
+
+
+# the buffers, which can be searched without a copy
+SEARCHABLE = (bytes, bytearray, mmap)
+
+
+class BufferStream:
+    """
+    A zero-copy input stream over any object supporting the buffer protocol
+    (bytes, bytearray, mmap, ...), which keeps an integer cursor.
+    Reading returns views into the buffer instead of copies.
+    """
+
+    def __init__(self, buffer: object, pos: int = 0):
+        self.buffer = memoryview(buffer).cast('B')
+        self.length = len(self.buffer)
+        self.pos = pos
+        self.mode = OperationMode.READ
+
+        # the length the buffer needs at least for the last read, which failed
+        self.needed = 0
+
+        # an object with the same bytes, which can be searched in place
+        self.source = buffer if isinstance(buffer, SEARCHABLE) else None
+        if isinstance(buffer, memoryview):
+            base = buffer.obj
+            if (
+                isinstance(base, SEARCHABLE) and
+                buffer.c_contiguous and
+                len(base) == self.length
+            ):
+                self.source = base
+
+    @property
+    def eof(self) -> bool:
+        return self.pos >= self.length
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, pos: int, mode: int):
+        if mode == SeekMode.START:
+            self.pos = pos
+        elif mode == SeekMode.REL:
+            self.pos += pos
+        elif mode == SeekMode.END:
+            self.pos = self.length + pos
+        else:
+            assert False
+
+        return self.pos
+
+    def read(self, n: int) -> memoryview:
+        start = self.pos
+        end = start + n
+
+        if end > self.length:
+            self.needed = end
+            raise EOFError
+
+        self.pos = end
+        return self.buffer[start:end]
+
+    def unpack(self, struct: Struct) -> tuple:
+        start = self.pos
+        end = start + struct.size
+
+        if end > self.length:
+            self.needed = end
+            raise EOFError
+
+        self.pos = end
+        return struct.unpack_from(self.buffer, start)
+
+    def read_until(self, delimiter: bytes) -> memoryview:
+        """ Read the bytes in front of the delimiter and skip it. """
+        start = self.pos
+
+        if self.source is not None:
+            end = self.source.find(delimiter, start, self.length)
+        else:
+            end = self.scan(delimiter, start)
+
+        if end < 0:
+            self.needed = self.length + 1
+            raise EOFError
+
+        self.pos = end + 1
+        return self.buffer[start:end]
+
+    def scan(self, delimiter: bytes, start: int) -> int:
+        """ Find a delimiter of a single byte by copying growing chunks behind start. """
+        buffer = self.buffer
+        chunk = 64
+        pos = start
+
+        while pos < self.length:
+            found = buffer[pos:pos + chunk].tobytes().find(delimiter)
+            if found >= 0:
+                return pos + found
+
+            pos += chunk
+            chunk = min(chunk * 2, 1 << 16)
+
+        return -1
+
+    def write(self, data: bytes):
+        assert False, 'buffer streams are read only'
+
+    def pack(self, struct: Struct, *values: object):
+        assert False, 'buffer streams are read only'
+
+
+class OutputBuffer:
+    """
+    An output stream, which encodes into one preallocated bytearray
+    with pack_into at a cursor instead of creating bytes for every value.
+    The buffer grows geometrically and is written to the target on flush,
+    e.g. once per record or batch. Seeking is possible behind the last flush.
+    """
+
+    def __init__(self, target: BinaryIO | None = None, capacity: int = 4096):
+        self.target = target
+        self.buffer = bytearray(capacity)
+        self.pos = 0
+        self.size = 0  # the end of the data in the buffer
+        self.base = 0  # the stream position of the buffer
+        self.mode = OperationMode.WRITE
+
+    def read(self, n: int) -> bytes:
+        assert False, 'output buffers are write only'
+
+    def unpack(self, struct: Struct) -> tuple:
+        assert False, 'output buffers are write only'
+
+    def reserve(self, end: int):
+        """ Grow the buffer, so it can hold end bytes. """
+        capacity = len(self.buffer)
+        if end > capacity:
+            self.buffer.extend(bytes(max(end, 2 * capacity) - capacity))
+
+    def pack(self, struct: Struct, *values: object):
+        pos = self.pos
+        end = pos + struct.size
+
+        if end > len(self.buffer):
+            self.reserve(end)
+
+        struct.pack_into(self.buffer, pos, *values)
+        self.pos = end
+        if end > self.size:
+            self.size = end
+
+    def write(self, data: bytes):
+        pos = self.pos
+        end = pos + len(data)
+
+        if end > len(self.buffer):
+            self.reserve(end)
+
+        self.buffer[pos:end] = data
+        self.pos = end
+        if end > self.size:
+            self.size = end
+
+    def tell(self) -> int:
+        return self.base + self.pos
+
+    def seek(self, pos: int, mode: int):
+        if mode == SeekMode.START:
+            pos -= self.base
+        elif mode == SeekMode.REL:
+            pos += self.pos
+        elif mode == SeekMode.END:
+            pos += self.size
+        else:
+            assert False
+
+        if pos < 0:
+            raise ValueError('can not seek in front of the flushed data')
+
+        if pos > self.size:
+            # the buffer may hold old data
+            self.reserve(pos)
+            self.buffer[self.size:pos] = bytes(pos - self.size)
+            self.size = pos
+
+        self.pos = pos
+        return self.base + pos
+
+    def getvalue(self) -> bytes:
+        """ Get the data behind the last flush. """
+        return bytes(self.buffer[:self.size])
+
+    def flush(self):
+        """
+        Write the data to the target and reuse the buffer.
+        The target gets a view into the buffer, which it mustn't keep.
+        """
+
+        if self.target is not None and self.size:
+            # the view is released, so the buffer can grow again
+            with memoryview(self.buffer)[:self.size] as data:
+                self.target.write(data)
+
+        self.base += self.size
+        self.pos = self.size = 0
+
+
+class DecodedInstruction(NamedTuple):
+    """ A pre-parsed instruction with its handler. """
+
+    op: Instruction
+    handler: Callable
+    operands: tuple
+    offset: int  # the offset in the bytecode
+
 
 class CodeObject:
     def __init__(self, names: dict[int, str], code: bytes):
         self.names = names
         self.code = BytesIO(code)
         self.code_length = len(code)
+        self.instructions = self.decode()
+
+        # the index behind the body of every block,
+        # keyed by the index of the block instruction
+        self.block_ends: dict[int, int] = dict()
+        self.scan_blocks()
 
     @property
     def debug(self):
@@ -170,6 +503,14 @@ class CodeObject:
     def eof(self) -> bool:
         return self.code.tell() == self.code_length
 
+    @property
+    def block_end_offsets(self) -> dict[int, int]:
+        """ The block end table keyed by bytecode offsets. """
+        return {
+            self.instructions[start].offset: self.instructions[end].offset
+            for start, end in self.block_ends.items()
+        }
+
     def tell(self) -> int:
         return self.code.tell()
 
@@ -177,14 +518,13 @@ class CodeObject:
         self.code.seek(pos)
 
     def tell_end(self, count: int):
-        start = self.tell()
-        for _ in range(count):
-            op = self.read_int(BYTE)
-            length = INSTRUCTION_LENGTHS[op]
-            self.code.seek(length, SEEK_CUR)
-        end = self.tell()
-        self.seek(start)
-        return end
+        """ Get the offset behind the next count instructions. """
+        index = bisect_left(
+            self.instructions,
+            self.tell(),
+            key=lambda inst: inst.offset,
+        )
+        return self.instructions[self.skip(index, count)].offset
 
     def read(self, size: int) -> bytes:
         data = self.code.read(size)
@@ -206,27 +546,115 @@ class CodeObject:
     def reset(self):
         self.code.seek(0)
 
-    @classmethod
-    def from_bytes(cls, data: bytes):
-        raw = BytesIO(data)
-        data = DataStream(raw, OperationMode.READ)
+    def decode(self) -> tuple[DecodedInstruction, ...]:
+        """
+        Decode the bytecode into a flat sequence of instructions,
+        which is terminated by an implicit ret.
+        """
 
-        nt_size = int.from_bytes(data.read(QWORD), CODE_BYTEORDER)
-        names = dict()
+        handlers = VirtualMachine.HANDLERS
+        instructions = list()
 
-        for i in range(nt_size):
-            # read string
-            parts = list()
+        self.reset()
+        while not self.eof:
+            offset = self.tell()
+            op = Instruction(self.read_int(BYTE))
 
-            while ...:
-                char = data.read(BYTE)
-                if char[0] == 0:
-                    break
-                parts.append(char)
+            operands = tuple(
+                self.read_name() if size == NAME else self.read_int(size)
+                for size in INSTRUCTION_OPERANDS[op]
+            )
+
+            instructions.append(DecodedInstruction(
+                op,
+                handlers.get(op, VirtualMachine.exec_unsupported),
+                operands,
+                offset,
+            ))
+        self.reset()
+
+        instructions.append(DecodedInstruction(
+            Instruction.RET,
+            VirtualMachine.exec_ret,
+            (),
+            self.code_length,
+        ))
+
+        return tuple(instructions)
+
+    def scan_blocks(self):
+        """ Fill the block end table in a single pass. """
+
+        def scan(index: int, count: int) -> int:
+            for _ in range(count):
+                inst = self.instructions[index]
+                start = index
+                index += 1
+
+                if inst.op in BLOCK_COUNT_OPERAND:
+                    index = scan(
+                        index,
+                        inst.operands[BLOCK_COUNT_OPERAND[inst.op]],
+                    )
+                    self.block_ends[start] = index
+
+            return index
+
+        index = 0
+        while index < len(self.instructions):
+            index = scan(index, 1)
+
+    def skip(self, index: int, count: int) -> int:
+        """
+        Get the index behind the next count instructions,
+        the bodies of blocks are skipped as a whole.
+        """
+
+        for _ in range(count):
+            index = self.block_ends.get(index, index + 1)
+
+        return index
+
+
+def assemble(*instructions: tuple, names: dict[int, str] = None) -> CodeObject:
+    """
+    Assemble instruction tuples into a code object.
+
+    Names are given as strings and blocks as a list of instructions
+    in place of their instruction count, e.g.:
+
+        assemble(
+            (Instruction.LOOPX, 2, [
+                (Instruction.READ, 'u8l'),
+            ]),
+        )
+    """
+
+    names = dict() if names is None else names
+    indexes = {v: k for k, v in names.items()}
+    code = BytesIO()
+
+    def emit(value: int, size: int):
+        code.write(value.to_bytes(size, CODE_BYTEORDER))
 
-            names[i] = b''.join(parts).decode('utf8')
+    def emit_level(level: list):
+        for op, *operands in level:
+            emit(op, BYTE)
 
-        return cls(names, raw.read())
+            for size, value in zip(INSTRUCTION_OPERANDS[op], operands):
+                if isinstance(value, list):
+                    emit(len(value), size)
+                    emit_level(value)
+                elif size == NAME:
+                    if value not in indexes:
+                        indexes[value] = len(names)
+                        names[len(names)] = value
+                    emit(indexes[value], QWORD)
+                else:
+                    emit(value, size)
+
+    emit_level(list(instructions))
+    return CodeObject(names, code.getvalue())
 
 
 class StackFrame(list):
@@ -269,79 +697,132 @@ class Stack(list):
         return self[-1].top
 
 
+class LoopState:
+    """ The state of a running loop. """
+
+    __slots__ = 'start', 'end', 'remaining'
+
+    def __init__(self, start: int, end: int, remaining: int):
+        self.start = start
+        self.end = end
+        self.remaining = remaining  # -1 for endless loops
+
+
+class CallFrame:
+    """ The saved state of a suspended caller. """
+
+    __slots__ = 'code', 'pc', 'loops', 'push_result'
+
+    def __init__(self, code: CodeObject | None, pc: int,
+                 loops: list[LoopState], push_result: bool):
+        self.code = code
+        self.pc = pc
+        self.loops = loops
+        self.push_result = push_result
+
+
 class VirtualMachine:
-    def __init__(self, database: dict[str, DataType], stream: DataStream):
+    def __init__(self, database: dict[str, DataType], stream: DataStream | BufferStream,
+                 array_type: ArrayType = ArrayType.ARRAY, columnar: bool = False):
+        if array_type == ArrayType.NUMPY and numpy is None:
+            raise ImportError('numpy is required for ArrayType.NUMPY')
+
         self.database = database
         self.stream = stream
+        self.array_type = array_type
+        self.columnar = columnar  # arrays of records are read as Columns
         self.stack = Stack()
         self.arrays: dict[int, list] = dict()
         self.outputs = StackFrame()
 
-        self.stop = False
-        self.break_loop = False
+        # the state of the running code
+        self.code: CodeObject | None = None
+        self.instructions: tuple[DecodedInstruction, ...] = ()
+        self.pc = 0
+        self.loops: list[LoopState] = list()
+        self.loop_end = -1
+
+        # the suspended callers
+        self.frames: list[CallFrame] = list()
+        self.result: object = None
+
+        # runs are profiled while a profiler is set
+        self.profiler: Profiler | None = None
 
     @property
     def output(self):
         return self.outputs[-1]
 
-    def exec_get(self, code: CodeObject):
+    def reset(self, stream: DataStream | BufferStream):
+        """
+        Clear the state for a new stream, but keep the containers,
+        so a machine can be reused instead of constructing a new one.
+        """
+
+        self.stream = stream
+        self.result = None
+
+        # a finished run leaves everything empty, unlike an aborted one
+        if self.frames or self.stack or self.outputs or self.arrays:
+            self.stack.clear()
+            self.arrays.clear()
+            self.outputs.clear()
+
+            self.code = None
+            self.instructions = ()
+            self.pc = 0
+            self.loops.clear()
+            self.loop_end = -1
+
+            self.frames.clear()
+
+    def exec_get(self, _: CodeObject, name: str):
         """ Get a field from output. """
-        name = code.read_name()
         self.stack.push(self.output[name])
 
-    def exec_put(self, code: CodeObject):
+    def exec_put(self, _: CodeObject, name: str):
         """ Put a value into output. """
-        name = code.read_name()
         self.output[name] = self.stack.top
 
-    def exec_empty(self, code: CodeObject):
+    def exec_empty(self, _: CodeObject, no: int):
         """ Create an empty array. """
-        no = code.read_int(WORD)
         self.arrays[no] = list()
 
-    def exec_edit(self, code: CodeObject):
+    def exec_edit(self, _: CodeObject, no: int, name: str):
         """ Load an existing array. """
-        no = code.read_int(WORD)
-        name = code.read_name()
         self.arrays[no] = self.output[name]
 
-    def exec_flip(self, code: CodeObject):
+    def exec_flip(self, _: CodeObject, no: int):
         """ Flip an array. """
-        no = code.read_int(WORD)
         self.arrays[no] = self.arrays[no][::-1]
 
-    def exec_yield(self, code: CodeObject):
+    def exec_yield(self, _: CodeObject, no: int):
         """ Pop a value from an array."""
-        no = code.read_int(WORD)
         value = self.arrays[no].pop(-1)
         self.stack.push(value)
 
-    def exec_append(self, code: CodeObject):
+    def exec_append(self, _: CodeObject, no: int):
         """ Push a value onto the array. """
-        no = code.read_int(WORD)
         self.arrays[no].append(self.stack.top)
 
-    def exec_index(self, code: CodeObject):
+    def exec_index(self, _: CodeObject, index: int, no: int):
         """ Get an index for an array. """
-        index = code.read_int(QWORD)
-        no = code.read_int(WORD)
         value = self.arrays[no][index]
         self.stack.push(value)
 
-    def exec_finish(self, code: CodeObject):
+    def exec_finish(self, _: CodeObject, no: int):
         """ Move an array onto the stack. """
-        no = code.read_int(WORD)
         value = self.arrays.pop(no)
+        if self.columnar:
+            value = Columns.from_values(value, self.array_type)
         self.stack.push(value)
 
-    def exec_forget(self, code: CodeObject):
+    def exec_forget(self, _: CodeObject, no: int):
         """ Free an array. """
-        no = code.read_int(WORD)
         self.arrays.pop(no)
 
-    def exec_push(self, code: CodeObject):
+    def exec_push(self, _: CodeObject, value: int):
         """ Push a value onto the stack. """
-        value = code.read_int(QWORD)
         self.stack.push(value)
 
     def exec_pop(self, _: CodeObject):
@@ -350,70 +831,66 @@ class VirtualMachine:
 
     def exec_tell(self, _: CodeObject):
         """ Push the current stream pos to stack. """
-        self.stack.push(self.stream)
+        self.stack.push(self.stream.tell())
 
-    def exec_seek(self, code: CodeObject):
+    def exec_seek(self, _: CodeObject, mode: int):
         """ Seek to a new position in the stream. """
-        mode = code.read_int(BYTE)
         self.stream.seek(self.stack.top, mode)
 
-    def exec_read(self, code: CodeObject):
+    def exec_read(self, _: CodeObject, name: str):
         """ Read a data type from the stream. """
-        name = code.read_name()
-
         dt = self.database[name]
+
+        if isinstance(dt, ComplexType) and dt.engine == Engine.INTERPRETER:
+            # continue with the code of the type
+            self.call(dt.read_code, dt.empty(), True)
+            return
+
         value = dt.read(self)
         self.stack.push(value)
 
-    def exec_write(self, code: CodeObject):
+    def exec_write(self, _: CodeObject, name: str):
         """ Write a data type to the stack. """
-        name = code.read_name()
-
         dt = self.database[name]
-        dt.write(self, self.stack.top)
 
-    def exec_loop(self, code: CodeObject):
-        count = code.read_int(QWORD)
+        if isinstance(dt, ComplexType) and dt.engine == Engine.INTERPRETER:
+            self.call(dt.write_code, self.stack.top, False)
+            return
 
-        end = code.tell_end(count)
-        start = code.tell()
-        self.break_loop = False
-        while not self.break_loop:
-            for _ in range(count):
-                self.exec_inst(code)
+        dt.write(self, self.stack.top)
 
-                if self.break_loop:
-                    break
+    def exec_rarray(self, _: CodeObject, name: str):
+        """ Read an array of a data type, the length is taken from the stack. """
+        dt = self.database[name]
+        value = dt.read_array(self, self.stack.top)
+        self.stack.push(value)
 
-            code.seek(start)
-        code.seek(end)
+    def exec_warray(self, _: CodeObject, name: str):
+        """ Write the array on the stack as an array of a data type. """
+        dt = self.database[name]
+        dt.write_array(self, self.stack.top)
 
-    def exec_loopx(self, code: CodeObject):
-        iterations = code.read_int(QWORD)
-        count = code.read_int(QWORD)
+    def exec_loop(self, code: CodeObject, _: int):
+        """ Loop the body until a break. """
+        self.enter_loop(code.block_ends[self.pc - 1], -1)
 
-        end = code.tell_end(count)
-        start = code.tell()
-        self.break_loop = False
-        for _ in range(iterations):
-            if self.break_loop:
-                break
+    def exec_loopx(self, code: CodeObject, iterations: int, _: int):
+        """ Loop the body a fixed number of times. """
+        end = code.block_ends[self.pc - 1]
 
-            for _ in range(count):
-                self.exec_inst(code)
-                if self.break_loop:
-                    break
+        if iterations <= 0:
+            self.pc = end
+            return
 
-            code.seek(start)
-        code.seek(end)
+        self.enter_loop(end, iterations)
 
     def exec_break(self, _: CodeObject):
-        self.break_loop = True
-
-    def exec_test(self, code: CodeObject):
-        operation = code.read_int(BYTE)
-        count = code.read_int(QWORD)
+        """ Leave the innermost loop of the current type. """
+        if self.loops:
+            self.exit_loop()
 
+    def exec_test(self, code: CodeObject, operation: int, _: int):
+        """ Enter the body if the test succeeds, otherwise skip it. """
         left = self.stack.top
 
         result = None
@@ -434,168 +911,2459 @@ class VirtualMachine:
                 result = left <= right
             elif operation == TestOperation.GE:
                 result = left >= right
-            elif operation == TestOperation.NOT:
-                ...
             else:
                 assert False
 
         if not result:
-            end = code.tell_end(count)
-            code.seek(end)
-            return
-
-        for _ in range(count):
-            self.exec_inst(code)
+            self.pc = code.block_ends[self.pc - 1]
 
     def exec_ret(self, _: CodeObject):
-        self.stop = True
-
-    def exec_inst(self, code: CodeObject):
-        op = code.read_int(BYTE)
-
-        proc = {
-            Instruction.GET: self.exec_get,
-            Instruction.PUT: self.exec_put,
-            Instruction.EMPTY: self.exec_empty,
-            Instruction.EDIT: self.exec_edit,
-            Instruction.FLIP: self.exec_flip,
-            Instruction.YIELD: self.exec_yield,
-            Instruction.APPEND: self.exec_append,
-            Instruction.INDEX: self.exec_index,
-            Instruction.FINISH: self.exec_finish,
-            Instruction.FORGET: self.exec_forget,
-            Instruction.PUSH: self.exec_push,
-            Instruction.POP: self.exec_pop,
-            Instruction.READ: self.exec_read,
-            Instruction.WRITE: self.exec_write,
-            Instruction.LOOP: self.exec_loop,
-            Instruction.LOOPX: self.exec_loopx,
-            Instruction.BREAK: self.exec_break,
-            Instruction.TEST: self.exec_test,
-            Instruction.RET: self.exec_ret,
-            # Instruction.GOTO: self.exec_goto,
-        }[op]
-
-        proc(code)  # noqa
+        """ Return to the caller of the current type. """
+        frame = self.frames.pop()
+        self.stack.pop_frame()
+        value = self.outputs.pop()
+
+        self.code = code = frame.code
+        self.instructions = code.instructions if code is not None else ()
+        self.pc = frame.pc
+        self.loops = frame.loops
+        self.loop_end = self.loops[-1].end if self.loops else -1
+
+        if frame.push_result:
+            self.stack.push(value)
+
+        self.result = value
+
+    def exec_unsupported(self, code: CodeObject, *_):
+        op = code.instructions[self.pc - 1].op
+        raise NotImplementedError(f'instruction {op.name} is not supported')
+
+    # the handler of every instruction, bound when the code is decoded
+    HANDLERS = {
+        Instruction.GET: exec_get,
+        Instruction.PUT: exec_put,
+        Instruction.EMPTY: exec_empty,
+        Instruction.EDIT: exec_edit,
+        Instruction.FLIP: exec_flip,
+        Instruction.YIELD: exec_yield,
+        Instruction.APPEND: exec_append,
+        Instruction.INDEX: exec_index,
+        Instruction.FINISH: exec_finish,
+        Instruction.FORGET: exec_forget,
+        Instruction.PUSH: exec_push,
+        Instruction.POP: exec_pop,
+        Instruction.SEEK: exec_seek,
+        Instruction.TELL: exec_tell,
+        Instruction.READ: exec_read,
+        Instruction.RARRAY: exec_rarray,
+        Instruction.WRITE: exec_write,
+        Instruction.WARRAY: exec_warray,
+        Instruction.LOOP: exec_loop,
+        Instruction.LOOPX: exec_loopx,
+        Instruction.BREAK: exec_break,
+        Instruction.TEST: exec_test,
+        Instruction.RET: exec_ret,
+        # Instruction.GOTO: exec_goto,
+    }
 
-    def run(self, code: CodeObject, value: object) -> object:
+    def enter_loop(self, end: int, iterations: int):
+        self.loops.append(LoopState(self.pc, end, iterations))
+        self.loop_end = end
+
+    def exit_loop(self):
+        self.pc = self.loops.pop().end
+        self.loop_end = self.loops[-1].end if self.loops else -1
+
+    def end_iteration(self):
+        """ Restart or leave the innermost loop at the end of its body. """
+        loop = self.loops[-1]
+
+        if loop.remaining == 1:
+            self.exit_loop()
+            return
+
+        if loop.remaining > 0:
+            loop.remaining -= 1
+        self.pc = loop.start
+
+    def call(self, code: CodeObject, value: object, push_result: bool):
+        """ Suspend the current code and continue with another one. """
+        self.frames.append(CallFrame(self.code, self.pc, self.loops, push_result))
         self.outputs.push(value)
         self.stack.push_frame()
 
-        self.stop = False
-        while not self.stop:
-            self.exec_inst(code)
+        self.code = code
+        self.instructions = code.instructions
+        self.pc = 0
+        self.loops = []
+        self.loop_end = -1
 
-        self.stack.pop_frame()
-        return self.outputs.pop()
+    def read_columns(self, name: str, count: int | None = None) -> Columns:
+        """ Read values of a complex type like read_many, but store them as Columns. """
+        dt = self.database[name]
+        columns = Columns(column_types(dt.read_code, self.database))
+        append = columns.append
+        read = dt.read
+
+        if count is None:
+            stream = self.stream
+            while not stream.eof:
+                append(read(self))
+        else:
+            for _ in range(count):
+                append(read(self))
 
+        return columns.finish(self.array_type)
 
-class DataType(ABC):
-    @abstractmethod
-    def read(self, vm: VirtualMachine) -> object:
-        ...
+    def read_many(self, name: str, count: int | None = None, out: list | None = None) -> list:
+        """
+        Read count consecutive values of a type, or until the end of the stream
+        if count is None. The values are appended to out if it is given.
+        All values are read in this session, so nothing is set up per value.
+        """
 
-    @abstractmethod
-    def write(self, vm: VirtualMachine, value: object):
-        ...
+        dt = self.database[name]
+        out = list() if out is None else out
+        append = out.append
 
+        if not isinstance(dt, ComplexType):
+            def read():
+                return dt.read(self)
+        elif dt.engine == Engine.INTERPRETER:
+            run, code, empty = self.run, dt.read_code, dt.empty
 
-class PrimitiveType(DataType, ABC):
-    ...
+            def read():
+                return run(code, empty())
+        else:
+            program, empty = dt.compile(self.database)[2], dt.empty
 
+            def read():
+                return program(self, empty())
 
-class IntType(PrimitiveType):
-    __slots__ = 'size', 'byteorder', 'signed'
+        if count is None:
+            stream = self.stream
+            while not stream.eof:
+                append(read())
+        else:
+            for _ in range(count):
+                append(read())
 
-    def __init__(self, size: int, byteorder: Byteorder, signed: bool):
-        self.size = size
-        self.byteorder = byteorder
-        self.signed = signed
+        return out
 
-    def read(self, vm: VirtualMachine) -> int:
-        return int.from_bytes(
-            bytes=vm.stream.read(self.size),
-            byteorder=self.byteorder,  # noqa
-            signed=self.signed,
-        )
+    def write_many(self, name: str, values: Iterable, batch: int = 1):
+        """
+        Write consecutive values of a type and flush the stream after
+        every batch of values, e.g. to write an OutputBuffer to its target.
+        """
 
-    def write(self, vm: VirtualMachine, value: int):
-        vm.stream.write(
-            int.to_bytes(
-                self=value,
-                length=self.size,
-                byteorder=self.byteorder,  # noqa
-                signed=self.signed,
-            )
-        )
+        dt = self.database[name]
+        stream = self.stream
+        write = dt.write
 
+        if isinstance(dt, ComplexType) and dt.engine != Engine.INTERPRETER:
+            program = dt.compile(self.database)[3]
 
-class FloatType(PrimitiveType):
-    __slots__ = 'size',
+            def write(vm: VirtualMachine, value: object):
+                program(vm, value)
 
-    def __init__(self, size: int):
-        assert size in (4, 8)
-        self.size = size
+        pending = 0
+        for value in values:
+            write(self, value)
+            pending += 1
 
-    @property
-    def format(self) -> str:
-        return {
-            8: 'd',
-            4: 'f',
-        }[self.size]
+            if pending == batch:
+                stream.flush()
+                pending = 0
 
-    def read(self, vm: VirtualMachine) -> float:
-        return unpack('f', vm.stream.read(self.size))[0]
+        if pending:
+            stream.flush()
 
-    def write(self, vm: VirtualMachine, value: float):
-        vm.stream.write(pack(self.format, value))
+    def run(self, code: CodeObject, value: object) -> object:
+        """
+        Run the code until it returns. Nested complex types, which use
+        the interpreter, are run in the same loop on an explicit frame stack.
+        """
 
+        if self.profiler is not None:
+            return self.run_profiled(code, value)
 
-class ComplexType(DataType, ABC):
-    __slots__ = 'read_code', 'write_code'
+        frames = self.frames
+        depth = len(frames)
+        ret = VirtualMachine.exec_ret
+        self.call(code, value, False)
 
-    def __init__(self, read_code: CodeObject, write_code: CodeObject):
-        self.read_code = read_code
-        self.write_code = write_code
+        while True:
+            pc = self.pc
+            _, handler, operands, _ = self.instructions[pc]
+            self.pc = pc + 1
 
-    @abstractmethod
-    def empty(self) -> dict:
-        ...
+            handler(self, self.code, *operands)
 
-    def read(self, vm: VirtualMachine) -> dict:
-        value = vm.run(self.read_code, self.empty())
-        assert isinstance(value, dict)
-        return value
+            # the final ret of this run may return into a loop of an outer run,
+            # whose end is handled there
+            if handler is ret and len(frames) == depth:
+                break
 
-    def write(self, vm: VirtualMachine, value: dict):
-        vm.run(
-            self.write_code,
-            value,
-        )
+            while self.pc == self.loop_end:
+                self.end_iteration()
 
+        return self.result
 
-def get_database() -> dict:
-    return {
-        'u8l': IntType(1, Byteorder.LITTLE, False),
-        'u16l': IntType(2, Byteorder.LITTLE, False),
-        'u32l': IntType(4, Byteorder.LITTLE, False),
-        'u64l': IntType(8, Byteorder.LITTLE, False),
-        'i8l': IntType(1, Byteorder.LITTLE, True),
-        'i16l': IntType(2, Byteorder.LITTLE, True),
-        'i32l': IntType(4, Byteorder.LITTLE, True),
-        'i64l': IntType(8, Byteorder.LITTLE, True),
+    def run_profiled(self, code: CodeObject, value: object) -> object:
+        """ Run the code like run, but record every instruction in the profiler. """
+        profiler = self.profiler
+        stream = self.stream
+        frames = self.frames
+        depth = len(frames)
+        ret = VirtualMachine.exec_ret
 
-        'u8b': IntType(1, Byteorder.BIG, False),
-        'u16b': IntType(2, Byteorder.BIG, False),
-        'u32b': IntType(4, Byteorder.BIG, False),
-        'u64b': IntType(8, Byteorder.BIG, False),
-        'i8b': IntType(1, Byteorder.BIG, True),
-        'i16b': IntType(2, Byteorder.BIG, True),
-        'i32b': IntType(4, Byteorder.BIG, True),
-        'i64b': IntType(8, Byteorder.BIG, True),
+        # the start, stream pos, type name and field of every running type
+        calls = [(perf_counter(), stream.tell(), profiler.code_name(code), None)]
+        self.call(code, value, False)
 
-        'f32': FloatType(4),
-        'f64': FloatType(8),
-    }
+        while True:
+            pc = self.pc
+            code = self.code
+            op, handler, operands, _ = self.instructions[pc]
+            self.pc = pc + 1
+
+            called = len(frames)
+            start, pos = perf_counter(), stream.tell()
+
+            handler(self, code, *operands)
+
+            time, size = perf_counter() - start, stream.tell() - pos
+            profiler.opcodes[op].add(time, size)
+            field = profiler.field_names(code)[pc]
+
+            if len(frames) > called:
+                # the field is recorded, when the type returns
+                calls.append((start, pos, operands[0], field))
+            else:
+                if field is not None:
+                    profiler.fields[calls[-1][2], field].add(time, size)
+                if (
+                    op in (Instruction.READ, Instruction.WRITE) and
+                    isinstance(self.database[operands[0]], ComplexType)
+                ):
+                    # a compiled type
+                    profiler.types[operands[0]].add(time, size)
+
+            if handler is ret:
+                start, pos, name, field = calls.pop()
+                time, size = perf_counter() - start, stream.tell() - pos
+                profiler.types[name].add(time, size)
+
+                if field is not None:
+                    profiler.fields[calls[-1][2], field].add(time, size)
+
+            # the final ret of this run may return into a loop of an outer run,
+            # whose end is handled there
+            if handler is ret and len(frames) == depth:
+                break
+
+            while self.pc == self.loop_end:
+                self.end_iteration()
+
+        return self.result
+
+
+class ProfileStats:
+    """ The execution count, the cumulative time and the consumed bytes of something. """
+
+    __slots__ = 'count', 'time', 'bytes'
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.bytes = 0
+
+    def add(self, time: float, size: int):
+        self.count += 1
+        self.time += time
+        self.bytes += size
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'time': self.time, 'bytes': self.bytes}
+
+
+class Profiler:
+    """
+    Statistics of the profiled runs of a virtual machine per opcode,
+    per complex type and per field of a complex type.
+    A field is the name a READ is PUT into or a WRITE is taken from with GET.
+    Complex types, which are compiled, are recorded as a whole.
+    """
+
+    def __init__(self, database: dict[str, DataType]):
+        self.opcodes: dict[Instruction, ProfileStats] = defaultdict(ProfileStats)
+        self.types: dict[str, ProfileStats] = defaultdict(ProfileStats)
+        self.fields: dict[tuple[str, str], ProfileStats] = defaultdict(ProfileStats)
+
+        # the name of the type of every code in the database
+        self.code_names: dict[CodeObject, str] = dict()
+        for name, dt in database.items():
+            if isinstance(dt, ComplexType):
+                self.code_names[dt.read_code] = name
+                self.code_names[dt.write_code] = name
+
+        self.field_tables: dict[CodeObject, tuple[str | None, ...]] = dict()
+
+    def code_name(self, code: CodeObject) -> str:
+        return self.code_names.get(code, '<root>')
+
+    def field_names(self, code: CodeObject) -> tuple[str | None, ...]:
+        """ The field of every instruction in the code, or None. """
+        table = self.field_tables.get(code)
+
+        if table is None:
+            instructions = code.instructions
+            table = tuple(
+                self.field_name(instructions, index)
+                for index in range(len(instructions))
+            )
+            self.field_tables[code] = table
+
+        return table
+
+    @staticmethod
+    def field_name(instructions: tuple[DecodedInstruction, ...], index: int) -> str | None:
+        # the READ or WRITE of a field is recorded, not its PUT or GET
+        op = instructions[index].op
+
+        if op in (Instruction.READ, Instruction.RARRAY):
+            following = instructions[index + 1]
+            if following.op == Instruction.PUT:
+                return following.operands[0]
+
+        if op in (Instruction.WRITE, Instruction.WARRAY) and index > 0:
+            previous = instructions[index - 1]
+            if previous.op == Instruction.GET:
+                return previous.operands[0]
+
+        return None
+
+    def report(self) -> dict:
+        return {
+            'opcodes': {op.name: stats.as_dict() for op, stats in self.opcodes.items()},
+            'types': {name: stats.as_dict() for name, stats in self.types.items()},
+            'fields': {
+                f'{name}.{field}': stats.as_dict()
+                for (name, field), stats in self.fields.items()
+            },
+        }
+
+    def table(self) -> str:
+        """ The report as a text table, sorted by the cumulative time. """
+        lines = [f'{"name":<40}{"count":>12}{"time":>14}{"bytes":>14}']
+
+        for section, rows in self.report().items():
+            lines.append(section)
+
+            for name, stats in sorted(rows.items(), key=lambda row: -row[1]['time']):
+                lines.append(
+                    f'  {name:<38}{stats["count"]:>12}{stats["time"]:>14.6f}{stats["bytes"]:>14}'
+                )
+
+        return '\n'.join(lines)
+
+
+class DatabaseCache:
+    """
+    Values per database. Databases are dicts, which can't be weakly referenced,
+    so only the most recently stored ones are kept instead of all databases.
+    A database is kept alive by its entry, so its id can't be reused meanwhile.
+    """
+
+    __slots__ = 'entries', 'size'
+
+    def __init__(self, size: int = 8):
+        self.entries: dict[int, tuple[dict, object]] = dict()
+        self.size = size
+
+    def get(self, database: dict[str, DataType]) -> object | None:
+        entry = self.entries.get(id(database))
+        return entry[1] if entry is not None else None
+
+    def set(self, database: dict[str, DataType], value: object):
+        key = id(database)
+        self.entries.pop(key, None)
+        self.entries[key] = database, value
+
+        if len(self.entries) > self.size:
+            # the least recently stored database
+            del self.entries[next(iter(self.entries))]
+
+
+class MachinePool(local):
+    """
+    Idle virtual machines per thread keyed by their database,
+    which can be borrowed instead of constructing new ones.
+    The machines of the most recent databases are kept.
+    """
+
+    def __init__(self, databases: int = 8):
+        self.machines = DatabaseCache(databases)
+
+    def acquire(self, database: dict[str, DataType], stream: DataStream | BufferStream,
+                array_type: ArrayType = ArrayType.ARRAY, columnar: bool = False) -> VirtualMachine:
+        idle = self.machines.get(database)
+
+        if not idle:
+            return VirtualMachine(database, stream, array_type, columnar)
+
+        # a machine is handed out, as if it was constructed with the arguments
+        vm = idle.pop()
+        vm.reset(stream)
+        vm.array_type = array_type
+        vm.columnar = columnar
+        vm.profiler = None
+        return vm
+
+    def release(self, vm: VirtualMachine):
+        """ Return a machine, it mustn't be used afterwards. """
+        idle = self.machines.get(vm.database)
+
+        if idle is None:
+            idle = list()
+        self.machines.set(vm.database, idle)
+        idle.append(vm)
+
+    @contextmanager
+    def borrow(self, database: dict[str, DataType], stream: DataStream | BufferStream,
+               array_type: ArrayType = ArrayType.ARRAY, columnar: bool = False) -> Iterator[VirtualMachine]:
+        vm = self.acquire(database, stream, array_type, columnar)
+        try:
+            yield vm
+        finally:
+            self.release(vm)
+
+
+machine_pool = MachinePool()
+
+
+class Optimization(IntEnum):
+    NONE = 0  # compile every instruction on its own
+    FUSE = 1  # fuse runs of primitive reads and writes into a single struct
+
+
+class FusedRun(NamedTuple):
+    """ A run of primitive reads or writes handled by a single struct. """
+
+    end: int  # the index behind the run
+    mode: OperationMode
+    struct: Struct
+    names: tuple[str, ...]  # the field of every value in the struct
+
+
+def fuse_primitives(code: CodeObject, database: dict[str, DataType]) -> dict[int, FusedRun]:
+    """
+    Find the maximal runs of primitive fields, keyed by their first index.
+
+    A run consists of `read <primitive>; put <field>; pop` or
+    `read <primitive>; pop` (skipped) sequences on the read side and
+    `get <field>; write <primitive>; pop` sequences on the write side.
+    """
+
+    instructions = code.instructions
+
+    def is_op(index: int, end: int, op: Instruction) -> bool:
+        return index < end and instructions[index].op == op
+
+    def primitive(index: int, end: int, op: Instruction) -> PrimitiveType | None:
+        if not is_op(index, end, op):
+            return None
+
+        dt = database.get(instructions[index].operands[0])
+        return dt if isinstance(dt, PrimitiveType) else None
+
+    def match(index: int, end: int) -> tuple[OperationMode, PrimitiveType, str | None, int] | None:
+        """ Match a single field, returns the mode, type, field and next index. """
+
+        dt = primitive(index, end, Instruction.READ)
+        if dt is not None:
+            if is_op(index + 1, end, Instruction.PUT) and is_op(index + 2, end, Instruction.POP):
+                return OperationMode.READ, dt, instructions[index + 1].operands[0], index + 3
+            if is_op(index + 1, end, Instruction.POP):
+                return OperationMode.READ, dt, None, index + 2
+
+        dt = primitive(index + 1, end, Instruction.WRITE)
+        if dt is not None and is_op(index, end, Instruction.GET) and is_op(index + 2, end, Instruction.POP):
+            return OperationMode.WRITE, dt, instructions[index].operands[0], index + 3
+
+        return None
+
+    def byteorder(dt: PrimitiveType) -> str | None:
+        prefix = dt.format[0] if dt.format[0] in '<>=' else '='
+
+        if dt.size == 1:
+            # single bytes fit in any run
+            return None
+        if prefix == '=':
+            return '<' if host_byteorder == 'little' else '>'
+        return prefix
+
+    runs = dict()
+
+    def scan(start: int, end: int):
+        index = start
+        while index < end:
+            if index in code.block_ends:
+                scan(index + 1, code.block_ends[index])
+                index = code.block_ends[index]
+                continue
+
+            first = match(index, end)
+            if first is None:
+                index += 1
+                continue
+
+            mode = first[0]
+            order = None
+            parts = list()
+            names = list()
+            run_start = index
+
+            while index < end:
+                field = match(index, end)
+                if field is None or field[0] != mode:
+                    break
+
+                _, dt, name, next_index = field
+                field_order = byteorder(dt)
+
+                if field_order is not None:
+                    if order is not None and field_order != order:
+                        break
+                    order = field_order
+
+                code_char = dt.format.lstrip('<>=!@')
+                if name is None:
+                    parts.append(f'{dt.size}x')
+                else:
+                    parts.append(code_char)
+                    names.append(name)
+
+                index = next_index
+
+            if len(parts) >= 2:
+                runs[run_start] = FusedRun(
+                    index,
+                    mode,
+                    Struct((order or '<') + ''.join(parts)),
+                    tuple(names),
+                )
+
+    scan(0, len(instructions))
+    return runs
+
+
+class ClosureCompiler:
+    """
+    Compiles a code object into a tree of nested closures.
+
+    Every closure takes the vm, the stack frame and the output,
+    blocks return a signal when a break or ret was executed.
+    """
+
+    BREAK = 1
+    RET = 2
+
+    TEST_OPERATIONS = {
+        TestOperation.EQ: eq,
+        TestOperation.NE: ne,
+        TestOperation.LT: lt,
+        TestOperation.GT: gt,
+        TestOperation.LE: le,
+        TestOperation.GE: ge,
+    }
+
+    def __init__(self, code: CodeObject, database: dict[str, DataType],
+                 optimization: Optimization = Optimization.FUSE,
+                 record: type[SlottedRecord] | None = None):
+        self.code = code
+        self.database = database
+        self.record = record
+        self.runs = dict()
+        self.loop_depth = 0  # the number of loops around the compiled instruction
+
+        if optimization >= Optimization.FUSE:
+            self.runs = fuse_primitives(code, database)
+
+        self.compilers = {
+            Instruction.GET: self.compile_get,
+            Instruction.PUT: self.compile_put,
+            Instruction.EMPTY: self.compile_empty,
+            Instruction.EDIT: self.compile_edit,
+            Instruction.FLIP: self.compile_flip,
+            Instruction.YIELD: self.compile_yield,
+            Instruction.APPEND: self.compile_append,
+            Instruction.INDEX: self.compile_index,
+            Instruction.FINISH: self.compile_finish,
+            Instruction.FORGET: self.compile_forget,
+            Instruction.PUSH: self.compile_push,
+            Instruction.POP: self.compile_pop,
+            Instruction.SEEK: self.compile_seek,
+            Instruction.TELL: self.compile_tell,
+            Instruction.READ: self.compile_read,
+            Instruction.RARRAY: self.compile_rarray,
+            Instruction.WRITE: self.compile_write,
+            Instruction.WARRAY: self.compile_warray,
+            Instruction.LOOP: self.compile_loop,
+            Instruction.LOOPX: self.compile_loopx,
+            Instruction.BREAK: self.compile_break,
+            Instruction.TEST: self.compile_test,
+            Instruction.RET: self.compile_ret,
+        }
+
+    def compile(self) -> Callable[[VirtualMachine, object], object]:
+        """ Compile the code into a program taking the vm and the output. """
+        body = self.compile_block(0, len(self.code.instructions))
+
+        def program(vm: VirtualMachine, output: object) -> object:
+            body(vm, list(), output)
+            return output
+
+        return program
+
+    def compile_block(self, start: int, end: int) -> Callable:
+        """ Compile the instructions in between start and end. """
+        steps = list()
+
+        index = start
+        while index < end:
+            if index in self.runs:
+                run = self.runs[index]
+                steps.append(self.compile_fused(run))
+                index = run.end
+                continue
+
+            inst = self.code.instructions[index]
+            proc = self.compilers.get(inst.op, self.compile_unsupported)
+            steps.append(proc(index, *inst.operands))
+            index = self.code.block_ends.get(index, index + 1)
+
+        steps = tuple(steps)
+
+        def block(vm, frame, output):
+            for step in steps:
+                signal = step(vm, frame, output)
+                if signal:
+                    return signal
+
+        return block
+
+    def compile_body(self, index: int) -> Callable:
+        """ Compile the body of the block instruction at index. """
+        return self.compile_block(index + 1, self.code.block_ends[index])
+
+    def setter(self, name: str) -> Callable[[object, object], None]:
+        """ Get a function, which stores a field in the output. """
+        if self.record is not None and name in self.record.__fields__:
+            # store into the slot directly
+            return getattr(self.record, name).__set__
+
+        def set_item(output, value):
+            output[name] = value
+        return set_item
+
+    def compile_fused(self, run: FusedRun):
+        names = run.names
+
+        if run.mode == OperationMode.READ:
+            struct = run.struct
+            setters = [self.setter(name) for name in names]
+
+            def fused_read(vm, frame, output):
+                for setter, value in zip(setters, vm.stream.unpack(struct)):
+                    setter(output, value)
+            return fused_read
+
+        struct = run.struct
+
+        def fused_write(vm, frame, output):
+            vm.stream.pack(struct, *[output[name] for name in names])
+        return fused_write
+
+    def compile_get(self, _: int, name: str):
+        def get(vm, frame, output):
+            frame.append(output[name])
+        return get
+
+    def compile_put(self, _: int, name: str):
+        if self.record is not None and name in self.record.__fields__:
+            set_field = self.setter(name)
+
+            def put_slot(vm, frame, output):
+                set_field(output, frame[-1])
+            return put_slot
+
+        def put(vm, frame, output):
+            output[name] = frame[-1]
+        return put
+
+    def compile_empty(self, _: int, no: int):
+        def empty(vm, frame, output):
+            vm.arrays[no] = list()
+        return empty
+
+    def compile_edit(self, _: int, no: int, name: str):
+        def edit(vm, frame, output):
+            vm.arrays[no] = output[name]
+        return edit
+
+    def compile_flip(self, _: int, no: int):
+        def flip(vm, frame, output):
+            vm.arrays[no] = vm.arrays[no][::-1]
+        return flip
+
+    def compile_yield(self, _: int, no: int):
+        def yield_(vm, frame, output):
+            frame.append(vm.arrays[no].pop(-1))
+        return yield_
+
+    def compile_append(self, _: int, no: int):
+        def append(vm, frame, output):
+            vm.arrays[no].append(frame[-1])
+        return append
+
+    def compile_index(self, _: int, index: int, no: int):
+        def index_(vm, frame, output):
+            frame.append(vm.arrays[no][index])
+        return index_
+
+    def compile_finish(self, _: int, no: int):
+        def finish(vm, frame, output):
+            value = vm.arrays.pop(no)
+            if vm.columnar:
+                value = Columns.from_values(value, vm.array_type)
+            frame.append(value)
+        return finish
+
+    def compile_forget(self, _: int, no: int):
+        def forget(vm, frame, output):
+            vm.arrays.pop(no)
+        return forget
+
+    def compile_push(self, _: int, value: int):
+        def push(vm, frame, output):
+            frame.append(value)
+        return push
+
+    def compile_pop(self, _: int):
+        def pop(vm, frame, output):
+            frame.pop()
+        return pop
+
+    def compile_seek(self, _: int, mode: int):
+        def seek(vm, frame, output):
+            vm.stream.seek(frame[-1], mode)
+        return seek
+
+    def compile_tell(self, _: int):
+        def tell(vm, frame, output):
+            frame.append(vm.stream.tell())
+        return tell
+
+    def compile_read(self, _: int, name: str):
+        read_type = self.database[name].read
+
+        def read(vm, frame, output):
+            frame.append(read_type(vm))
+        return read
+
+    def compile_write(self, _: int, name: str):
+        write_type = self.database[name].write
+
+        def write(vm, frame, output):
+            write_type(vm, frame[-1])
+        return write
+
+    def compile_rarray(self, _: int, name: str):
+        read_array = self.database[name].read_array
+
+        def rarray(vm, frame, output):
+            frame.append(read_array(vm, frame[-1]))
+        return rarray
+
+    def compile_warray(self, _: int, name: str):
+        write_array = self.database[name].write_array
+
+        def warray(vm, frame, output):
+            write_array(vm, frame[-1])
+        return warray
+
+    def compile_loop_body(self, index: int) -> Callable:
+        self.loop_depth += 1
+        body = self.compile_body(index)
+        self.loop_depth -= 1
+        return body
+
+    def compile_loop(self, index: int, _: int):
+        body = self.compile_loop_body(index)
+
+        def loop(vm, frame, output):
+            while ...:
+                signal = body(vm, frame, output)
+                if signal:
+                    return signal if signal == self.RET else None
+        return loop
+
+    def compile_loopx(self, index: int, iterations: int, _: int):
+        body = self.compile_loop_body(index)
+
+        def loopx(vm, frame, output):
+            for _ in range(iterations):
+                signal = body(vm, frame, output)
+                if signal:
+                    return signal if signal == self.RET else None
+        return loopx
+
+    def compile_break(self, _: int):
+        if not self.loop_depth:
+            # a break outside of a loop has no effect
+            def no_break(vm, frame, output):
+                pass
+            return no_break
+
+        signal = self.BREAK
+
+        def break_(vm, frame, output):
+            return signal
+        return break_
+
+    def compile_test(self, index: int, operation: int, _: int):
+        body = self.compile_body(index)
+
+        if operation == TestOperation.NOT:
+            def test(vm, frame, output):
+                if not frame[-1]:
+                    return body(vm, frame, output)
+            return test
+
+        compare = self.TEST_OPERATIONS[operation]
+
+        def test(vm, frame, output):
+            if compare(frame[-1], frame[-2]):
+                return body(vm, frame, output)
+        return test
+
+    def compile_ret(self, _: int):
+        signal = self.RET
+
+        def ret(vm, frame, output):
+            return signal
+        return ret
+
+    def compile_unsupported(self, index: int, *_):
+        op = self.code.instructions[index].op
+
+        def unsupported(vm, frame, output):
+            raise NotImplementedError(f'instruction {op.name} is not supported')
+        return unsupported
+
+
+class SourceCompiler:
+    """
+    Transpiles a code object into the source of a specialized python function.
+
+    The stack is mapped onto local variables (one per stack slot),
+    primitives are read with precompiled structs and blocks become
+    native for, while and if statements. Every block has to leave
+    the stack as it found it, values pushed inside a loop are
+    discarded by a break.
+    """
+
+    TEST_OPERATORS = {
+        TestOperation.EQ: '==',
+        TestOperation.NE: '!=',
+        TestOperation.LT: '<',
+        TestOperation.GT: '>',
+        TestOperation.LE: '<=',
+        TestOperation.GE: '>=',
+    }
+
+    def __init__(self, code: CodeObject, database: dict[str, DataType],
+                 optimization: Optimization = Optimization.FUSE,
+                 record: type[SlottedRecord] | None = None):
+        self.code = code
+        self.database = database
+        self.record = record
+        self.runs = dict()
+
+        if optimization >= Optimization.FUSE:
+            self.runs = fuse_primitives(code, database)
+
+        self.lines = list()
+        self.indent_level = 0
+        self.loop_depths = list()
+        # the index of the emitted instruction
+        self.index = 0
+
+        # the objects referenced by the source
+        self.namespace = dict()
+        self.constants = dict()
+
+        self.emitters = {
+            Instruction.GET: self.emit_get,
+            Instruction.PUT: self.emit_put,
+            Instruction.EMPTY: self.emit_empty,
+            Instruction.EDIT: self.emit_edit,
+            Instruction.FLIP: self.emit_flip,
+            Instruction.YIELD: self.emit_yield,
+            Instruction.APPEND: self.emit_append,
+            Instruction.INDEX: self.emit_index,
+            Instruction.FINISH: self.emit_finish,
+            Instruction.FORGET: self.emit_forget,
+            Instruction.PUSH: self.emit_push,
+            Instruction.POP: self.emit_pop,
+            Instruction.SEEK: self.emit_seek,
+            Instruction.TELL: self.emit_tell,
+            Instruction.READ: self.emit_read,
+            Instruction.RARRAY: self.emit_rarray,
+            Instruction.WRITE: self.emit_write,
+            Instruction.WARRAY: self.emit_warray,
+            Instruction.LOOP: self.emit_loop,
+            Instruction.LOOPX: self.emit_loopx,
+            Instruction.BREAK: self.emit_break,
+            Instruction.TEST: self.emit_test,
+            Instruction.RET: self.emit_ret,
+        }
+
+        self.emit('def program(vm, output):')
+        self.indent_level += 1
+        self.emit('read = vm.stream.read')
+        self.emit('unpack = vm.stream.unpack')
+        self.emit('pack = vm.stream.pack')
+        self.emit_block(0, len(self.code.instructions), 0)
+
+        self.source = '\n'.join(self.lines) + '\n'
+
+    def compile(self) -> Callable[[VirtualMachine, object], object]:
+        """ Execute the source and return the program. """
+        namespace = dict(self.namespace)
+        exec(compile(self.source, f'<{self.__class__.__name__}>', 'exec'), namespace)
+        return namespace['program']
+
+    def emit(self, line: str):
+        self.lines.append('    ' * self.indent_level + line)
+
+    def constant(self, value: object, prefix: str) -> str:
+        """ Reference an object from the source. """
+        key = id(value)
+
+        if key not in self.constants:
+            name = f'_{prefix}{len(self.constants)}'
+            self.constants[key] = name
+            self.namespace[name] = value
+
+        return self.constants[key]
+
+    def emit_block(self, start: int, end: int, depth: int) -> int | None:
+        """
+        Emit the instructions in between start and end,
+        returns the stack depth or None if the block never falls through.
+        """
+
+        index = start
+        while index < end:
+            if index in self.runs:
+                run = self.runs[index]
+                self.emit_fused(run)
+                index = run.end
+                continue
+
+            inst = self.code.instructions[index]
+            proc = self.emitters.get(inst.op, self.emit_unsupported)
+            self.index = index
+            depth = proc(index, depth, *inst.operands)
+
+            if depth is None:
+                # the rest of the block is dead code
+                return None
+
+            if depth < 0:
+                raise self.error('stack underflow', index)
+
+            index = self.code.block_ends.get(index, index + 1)
+
+        return depth
+
+    def emit_body(self, index: int, depth: int):
+        """ Emit the body of the block instruction at index. """
+        self.indent_level += 1
+        body_start = len(self.lines)
+
+        result = self.emit_block(index + 1, self.code.block_ends[index], depth)
+
+        if len(self.lines) == body_start:
+            self.emit('pass')
+        self.indent_level -= 1
+
+        if result is not None and result != depth:
+            op = self.code.instructions[index].op
+            raise self.error(f'the body of {op.name} leaves the stack unbalanced', index)
+
+    def error(self, message: str, index: int) -> ValueError:
+        """ An error in the code, which can't be compiled. """
+        return ValueError(f'{message} at offset {self.code.instructions[index].offset}')
+
+    @staticmethod
+    def slot(depth: int) -> str:
+        return f's{depth}'
+
+    def top(self, depth: int, n: int = 1) -> str:
+        """ Get the nth value from the top of the stack. """
+        if depth < n:
+            raise self.error('stack underflow', self.index)
+        return self.slot(depth - n)
+
+    def field(self, name: str) -> str:
+        """ Get the expression of a field of the output. """
+        if (
+            self.record is not None and
+            name in self.record.__fields__ and
+            name.isidentifier() and
+            not iskeyword(name)
+        ):
+            return f'output.{name}'
+        return f'output[{name!r}]'
+
+    def emit_fused(self, run: FusedRun):
+        fields = ', '.join(self.field(name) for name in run.names)
+
+        if run.mode == OperationMode.WRITE:
+            struct = self.constant(run.struct, 'struct')
+            self.emit(f'pack({struct}, {fields})')
+        elif run.names:
+            struct = self.constant(run.struct, 'struct')
+            self.emit(f'{fields}, = unpack({struct})')
+        else:
+            self.emit(f'read({run.struct.size})')
+
+    def emit_get(self, _: int, depth: int, name: str) -> int:
+        self.emit(f'{self.slot(depth)} = {self.field(name)}')
+        return depth + 1
+
+    def emit_put(self, _: int, depth: int, name: str) -> int:
+        self.emit(f'{self.field(name)} = {self.top(depth)}')
+        return depth
+
+    def emit_empty(self, _: int, depth: int, no: int) -> int:
+        self.emit(f'a{no} = []')
+        return depth
+
+    def emit_edit(self, _: int, depth: int, no: int, name: str) -> int:
+        self.emit(f'a{no} = {self.field(name)}')
+        return depth
+
+    def emit_flip(self, _: int, depth: int, no: int) -> int:
+        self.emit(f'a{no} = a{no}[::-1]')
+        return depth
+
+    def emit_yield(self, _: int, depth: int, no: int) -> int:
+        self.emit(f'{self.slot(depth)} = a{no}.pop()')
+        return depth + 1
+
+    def emit_append(self, _: int, depth: int, no: int) -> int:
+        self.emit(f'a{no}.append({self.top(depth)})')
+        return depth
+
+    def emit_index(self, _: int, depth: int, index: int, no: int) -> int:
+        self.emit(f'{self.slot(depth)} = a{no}[{index}]')
+        return depth + 1
+
+    def emit_finish(self, _: int, depth: int, no: int) -> int:
+        columns = self.constant(Columns.from_values, 'columns')
+        self.emit(f'{self.slot(depth)} = {columns}(a{no}, vm.array_type) if vm.columnar else a{no}')
+        self.emit(f'del a{no}')
+        return depth + 1
+
+    def emit_forget(self, _: int, depth: int, no: int) -> int:
+        self.emit(f'del a{no}')
+        return depth
+
+    def emit_push(self, _: int, depth: int, value: int) -> int:
+        self.emit(f'{self.slot(depth)} = {value}')
+        return depth + 1
+
+    def emit_pop(self, _: int, depth: int) -> int:
+        return depth - 1
+
+    def emit_seek(self, _: int, depth: int, mode: int) -> int:
+        self.emit(f'vm.stream.seek({self.top(depth)}, {mode})')
+        return depth
+
+    def emit_tell(self, _: int, depth: int) -> int:
+        self.emit(f'{self.slot(depth)} = vm.stream.tell()')
+        return depth + 1
+
+    def emit_read(self, _: int, depth: int, name: str) -> int:
+        dt = self.database[name]
+
+        if isinstance(dt, PrimitiveType):
+            struct = self.constant(dt.struct, 'struct')
+            self.emit(f'{self.slot(depth)}, = unpack({struct})')
+        else:
+            reader = self.constant(dt.read, 'read')
+            self.emit(f'{self.slot(depth)} = {reader}(vm)')
+
+        return depth + 1
+
+    def emit_write(self, _: int, depth: int, name: str) -> int:
+        dt = self.database[name]
+
+        if isinstance(dt, PrimitiveType):
+            struct = self.constant(dt.struct, 'struct')
+            self.emit(f'pack({struct}, {self.top(depth)})')
+        else:
+            writer = self.constant(dt.write, 'write')
+            self.emit(f'{writer}(vm, {self.top(depth)})')
+
+        return depth
+
+    def emit_rarray(self, _: int, depth: int, name: str) -> int:
+        reader = self.constant(self.database[name].read_array, 'read_array')
+        self.emit(f'{self.slot(depth)} = {reader}(vm, {self.top(depth)})')
+        return depth + 1
+
+    def emit_warray(self, _: int, depth: int, name: str) -> int:
+        writer = self.constant(self.database[name].write_array, 'write_array')
+        self.emit(f'{writer}(vm, {self.top(depth)})')
+        return depth
+
+    def emit_loop(self, index: int, depth: int, _: int) -> int:
+        self.emit('while True:')
+        self.loop_depths.append(depth)
+        self.emit_body(index, depth)
+        self.loop_depths.pop()
+        return depth
+
+    def emit_loopx(self, index: int, depth: int, iterations: int, _: int) -> int:
+        self.emit(f'for _ in range({iterations}):')
+        self.loop_depths.append(depth)
+        self.emit_body(index, depth)
+        self.loop_depths.pop()
+        return depth
+
+    def emit_break(self, _: int, depth: int) -> int | None:
+        if not self.loop_depths:
+            # a break outside of a loop has no effect
+            return depth
+
+        self.emit('break')
+        return None
+
+    def emit_test(self, index: int, depth: int, operation: int, _: int) -> int:
+        if operation == TestOperation.NOT:
+            self.emit(f'if not {self.top(depth)}:')
+        else:
+            self.emit(
+                f'if {self.top(depth)} '
+                f'{self.TEST_OPERATORS[operation]} '
+                f'{self.top(depth, 2)}:'
+            )
+
+        self.emit_body(index, depth)
+        return depth
+
+    def emit_ret(self, _: int, __: int) -> None:
+        self.emit('return output')
+        return None
+
+    def emit_unsupported(self, index: int, *_) -> None:
+        op = self.code.instructions[index].op
+        self.emit(
+            f'raise NotImplementedError('
+            f'{f"instruction {op.name} is not supported"!r})'
+        )
+        return None
+
+
+class Engine(IntEnum):
+    INTERPRETER = 0  # run the bytecode with VirtualMachine.run
+    CLOSURE = 1  # run the closures built by ClosureCompiler
+    SOURCE = 2  # run the functions generated by SourceCompiler
+
+
+class DataType(ABC):
+    @abstractmethod
+    def read(self, vm: VirtualMachine) -> object:
+        ...
+
+    @abstractmethod
+    def write(self, vm: VirtualMachine, value: object):
+        ...
+
+    def read_array(self, vm: VirtualMachine, count: int) -> list:
+        """ Read count values one after another. """
+        return [self.read(vm) for _ in range(count)]
+
+    def write_array(self, vm: VirtualMachine, values: list):
+        """ Write the values one after another. """
+        for value in values:
+            self.write(vm, value)
+
+
+class PrimitiveType(DataType, ABC):
+    size: int
+    struct: Struct
+
+    @property
+    @abstractmethod
+    def format(self) -> str:
+        """ The struct format of the type. """
+        ...
+
+    @property
+    @abstractmethod
+    def typecode(self) -> str:
+        """ The array typecode of the type. """
+        ...
+
+    @property
+    def swapped(self) -> bool:
+        """ Whether the type is stored in the opposite of the host byteorder. """
+        return False
+
+    def read_array(self, vm: VirtualMachine, count: int) -> list | array:
+        """ Read count values with a single read. """
+        data = vm.stream.read(count * self.size)
+
+        if vm.array_type == ArrayType.NUMPY:
+            return numpy.frombuffer(data, numpy.dtype(self.format))
+
+        values = array(self.typecode)
+        values.frombytes(data)
+        if self.swapped:
+            values.byteswap()
+
+        if vm.array_type == ArrayType.LIST:
+            return values.tolist()
+        return values
+
+    def write_array(self, vm: VirtualMachine, values: list | array):
+        """ Write the values with a single write. """
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            vm.stream.write(
+                values.astype(numpy.dtype(self.format), copy=False).tobytes()
+            )
+            return
+
+        if (
+            not isinstance(values, array) or
+            values.typecode != self.typecode or
+            self.swapped
+        ):
+            values = array(self.typecode, values)
+
+        if self.swapped:
+            values.byteswap()
+
+        vm.stream.write(values.tobytes())
+
+
+class IntType(PrimitiveType):
+    __slots__ = 'size', 'byteorder', 'signed', 'struct'
+
+    def __init__(self, size: int, byteorder: Byteorder, signed: bool):
+        self.size = size
+        self.byteorder = byteorder
+        self.signed = signed
+        self.struct = Struct(self.format)
+
+    @property
+    def format(self) -> str:
+        code = {
+            1: 'b',
+            2: 'h',
+            4: 'i',
+            8: 'q',
+        }[self.size]
+
+        return (
+            ('<' if self.byteorder == Byteorder.LITTLE else '>') +
+            (code if self.signed else code.upper())
+        )
+
+    @property
+    def typecode(self) -> str:
+        return ARRAY_TYPECODES['i' if self.signed else 'u', self.size]
+
+    @property
+    def swapped(self) -> bool:
+        return self.size > 1 and self.byteorder.value != host_byteorder
+
+    def __reduce__(self):
+        # structs can't be pickled
+        return IntType, (self.size, self.byteorder, self.signed)
+
+    def read(self, vm: VirtualMachine) -> int:
+        return vm.stream.unpack(self.struct)[0]
+
+    def write(self, vm: VirtualMachine, value: int):
+        vm.stream.pack(self.struct, value)
+
+
+class FloatType(PrimitiveType):
+    __slots__ = 'size', 'struct'
+
+    def __init__(self, size: int):
+        assert size in (4, 8)
+        self.size = size
+        self.struct = Struct(self.format)
+
+    @property
+    def format(self) -> str:
+        return {
+            8: 'd',
+            4: 'f',
+        }[self.size]
+
+    @property
+    def typecode(self) -> str:
+        return ARRAY_TYPECODES['f', self.size]
+
+    def __reduce__(self):
+        return FloatType, (self.size,)
+
+    def read(self, vm: VirtualMachine) -> float:
+        return vm.stream.unpack(self.struct)[0]
+
+    def write(self, vm: VirtualMachine, value: float):
+        vm.stream.pack(self.struct, value)
+
+
+class BytesType(DataType):
+    """ A fixed amount of raw bytes, which are views in a BufferStream. """
+
+    __slots__ = 'size',
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def read(self, vm: VirtualMachine) -> bytes | memoryview:
+        return vm.stream.read(self.size)
+
+    def write(self, vm: VirtualMachine, value: bytes):
+        assert len(value) == self.size
+        vm.stream.write(value)
+
+
+class CStringType(DataType):
+    """ Raw bytes, which are terminated by a delimiter. """
+
+    __slots__ = 'delimiter',
+
+    def __init__(self, delimiter: bytes = b'\x00'):
+        assert len(delimiter) == 1, 'only delimiters of length 1 are allowed'
+        self.delimiter = delimiter
+
+    def read(self, vm: VirtualMachine) -> bytes | memoryview:
+        return vm.stream.read_until(self.delimiter)
+
+    def write(self, vm: VirtualMachine, value: bytes):
+        vm.stream.write(bytes(value) + self.delimiter)
+
+
+class Columns:
+    """
+    Records stored as a column per field, instead of a dict per record.
+    The columns of primitive fields are compact arrays, or numpy arrays,
+    all others are lists. Iterating yields the records as dicts again.
+    """
+
+    def __init__(self, typecodes: dict[str, str | None] | None = None):
+        self.columns: dict[str, array | list] = {
+            name: array(typecode) if typecode else list()
+            for name, typecode in (typecodes or dict()).items()
+        }
+        self.count = 0
+
+    @classmethod
+    def from_values(cls, values: list, array_type: ArrayType = ArrayType.ARRAY) -> Columns | list:
+        """
+        Store a list of records as columns, the types of the fields are unknown,
+        so integers and floats are stored as 64 bit values. Other lists are kept.
+        """
+
+        if not values or not all(isinstance(value, (dict, SlottedRecord)) for value in values):
+            return values
+
+        columns = cls()
+        for value in values:
+            columns.append(value)
+
+        for name, column in columns.columns.items():
+            kinds = {type(value) for value in column}
+            typecodes = ('q', 'Q') if kinds == {int} else ('d',) if kinds == {float} else ()
+
+            for typecode in typecodes:
+                try:
+                    columns.columns[name] = array(typecode, column)
+                    break
+                except OverflowError:
+                    continue
+
+        return columns.finish(array_type)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, name: str) -> array | list:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def keys(self) -> list[str]:
+        return list(self.columns)
+
+    def __iter__(self) -> Iterator[dict]:
+        for index in range(self.count):
+            yield {
+                name: column[index]
+                for name, column in self.columns.items()
+                if column[index] is not None
+            }
+
+    def append(self, record: dict | SlottedRecord):
+        columns = self.columns
+
+        for name in record.keys():
+            if name not in columns:
+                columns[name] = [None] * self.count
+
+        for name, column in columns.items():
+            value = record[name] if name in record else None
+
+            try:
+                column.append(value)
+            except (TypeError, OverflowError):
+                # the value doesn't fit into the array
+                column = columns[name] = column.tolist()
+                column.append(value)
+
+        self.count += 1
+
+    def finish(self, array_type: ArrayType) -> Columns:
+        """ Convert the columns to the array type of a machine. """
+        for name, column in self.columns.items():
+            if not isinstance(column, array):
+                continue
+
+            if array_type == ArrayType.NUMPY:
+                self.columns[name] = numpy.frombuffer(column, column.typecode)
+            elif array_type == ArrayType.LIST:
+                self.columns[name] = column.tolist()
+
+        return self
+
+
+def column_types(code: CodeObject, database: dict[str, DataType]) -> dict[str, str | None]:
+    """
+    The array typecode of every field a read code PUTs, or None if its column
+    must be a list. Only primitive fields, which are read by every run, get an array.
+    """
+
+    instructions = code.instructions
+
+    # the fields in tests may be missing
+    conditional = set()
+    for index, inst in enumerate(instructions):
+        if inst.op == Instruction.TEST:
+            conditional.update(range(index + 1, code.block_ends[index]))
+
+    typecodes = dict()
+    for index, inst in enumerate(instructions):
+        if inst.op != Instruction.PUT:
+            continue
+
+        name = inst.operands[0]
+        previous = instructions[index - 1] if index > 0 else None
+        typecode = None
+
+        if (
+            previous is not None and
+            previous.op == Instruction.READ and
+            isinstance(database[previous.operands[0]], PrimitiveType) and
+            index not in conditional
+        ):
+            typecode = database[previous.operands[0]].typecode
+
+        if name in typecodes and typecodes[name] != typecode:
+            typecode = None
+        typecodes[name] = typecode
+
+    return typecodes
+
+
+class FieldSlot(NamedTuple):
+    """ The place of a field in a fixed layout and how it is decoded. """
+
+    offset: int
+    size: int
+    decode: Callable[[memoryview, int], object]  # decodes the field at a position
+
+
+class FixedLayout(NamedTuple):
+    size: int
+    fields: dict[str, FieldSlot]
+
+
+class FieldLayout(NamedTuple):
+    """ Where a field is in the values of a complex type. """
+
+    offset: int | None  # the offset from the start of the value, None if it varies
+    size: int | None  # the encoded size, None if it varies
+    type: DataType | None  # the type read for the field, None for anything else
+    depends: tuple[str, ...]  # the fields, which fix the offset or the presence of the field
+
+
+class Layout(NamedTuple):
+    """ The result of the layout analysis of a read code. """
+
+    size: int | None  # the encoded size of every value, None if it varies
+    fields: dict[str, FieldLayout]
+    depends: tuple[str, ...]  # the fields, which fix the size of a value
+
+    @property
+    def fixed(self) -> bool:
+        return self.size is not None
+
+
+class LayoutValue:
+    """ A value on the stack during the layout analysis. """
+
+    __slots__ = 'names', 'constant', 'type', 'offset', 'size', 'depends'
+
+    def __init__(
+            self,
+            constant: int | None = None,
+            dt: DataType | None = None,
+            offset: int | None = None,
+            size: int | None = None,
+            depends: tuple[LayoutValue, ...] = (),
+    ):
+        self.names = list()  # the fields the value is put into
+        self.constant = constant
+        self.type = dt
+        self.offset = offset
+        self.size = size
+        self.depends = depends
+
+
+class LayoutAnalyzer:
+    """
+    Find the encoded size of the values of a read code and the offsets of their
+    fields without running it. The stack is modeled with the values read by the code,
+    so a variable part can be traced to the fields, which fix the offsets behind it:
+    a variable sized field itself, the count of an array, the operands of a test or a seek.
+    """
+
+    def __init__(self, code: CodeObject, database: dict[str, DataType]):
+        self.code = code
+        self.database = database
+
+        self.offset: int | None = 0
+        self.depends: list[LayoutValue] = list()  # the values, which fix the offset
+        self.stack: list[LayoutValue] = list()
+
+        self.conditions: list[LayoutValue] = list()  # the operands of the enclosing tests
+        self.tests: list[LayoutValue] = list()  # the operands of all tests
+        self.loops = 0
+
+        self.fields: dict[str, tuple[LayoutValue, int | None, tuple[LayoutValue, ...]]] = dict()
+        self.values: dict[str, LayoutValue] = dict()
+
+    def analyze(self) -> Layout:
+        self.walk(0, len(self.code.instructions))
+
+        fields = {
+            name: FieldLayout(offset, value.size, value.type, self.names(depends))
+            for name, (value, offset, depends) in self.fields.items()
+        }
+        size = self.offset if not self.depends else None
+        return Layout(size, fields, self.names(self.depends))
+
+    @staticmethod
+    def names(values: Iterable[LayoutValue]) -> tuple[str, ...]:
+        """ The names of the fields, which hold the values. """
+        return tuple(dict.fromkeys(value.names[0] for value in values if value.names))
+
+    def type_size(self, dt: DataType) -> int | None:
+        if isinstance(dt, (PrimitiveType, BytesType)):
+            return dt.size
+        if isinstance(dt, ComplexType):
+            return dt.analyze(self.database).size
+        return None
+
+    @property
+    def top(self) -> LayoutValue:
+        return self.stack[-1] if self.stack else LayoutValue()
+
+    def vary(self, *values: LayoutValue):
+        """ The offset is not fixed anymore, it depends on the values. """
+        self.offset = None
+        self.depends.extend(value for value in values if value not in self.depends)
+
+    def read(self, size: int | None, dt: DataType | None = None) -> LayoutValue:
+        value = LayoutValue(None, dt, self.offset, size, tuple(self.depends))
+        self.stack.append(value)
+
+        if size is None:
+            self.vary(value)
+        elif self.offset is not None:
+            self.offset += size
+
+        return value
+
+    def put(self, name: str):
+        value = self.top
+        value.names.append(name)
+        self.values[name] = value
+
+        offset = value.offset if not self.loops else None
+        depends = value.depends + tuple(self.conditions)
+
+        if name in self.fields and self.fields[name][0] is not value:
+            # put by different paths
+            _, other, other_depends = self.fields[name]
+            if other != offset:
+                offset = None
+            depends = other_depends + depends
+
+        self.fields[name] = value, offset, depends
+
+    def block(self, start: int, end: int, conditions: list[LayoutValue]) -> tuple[Instruction | None, bool]:
+        """
+        Walk the body of a block, returns the instruction, which always ends it,
+        and whether it moves the stream or may end the code.
+        """
+
+        offset, depends, stack = self.offset, list(self.depends), list(self.stack)
+
+        self.conditions.extend(conditions)
+        ended = self.walk(start, end)
+        del self.conditions[len(self.conditions) - len(conditions):]
+
+        # the bodies leave the stack as they found it
+        self.stack = stack
+        return ended, ended is not None or self.offset != offset or self.depends != depends
+
+    def test(self, index: int, operation: int) -> Instruction | None:
+        end = self.code.block_ends[index]
+        operands = [self.top]
+        if operation != TestOperation.NOT:
+            operands.append(self.stack[-2] if len(self.stack) > 1 else LayoutValue())
+
+        if all(operand.constant is not None for operand in operands):
+            # the result is the same for every value
+            if operation == TestOperation.NOT:
+                result = not operands[0].constant
+            else:
+                result = ClosureCompiler.TEST_OPERATIONS[operation](operands[0].constant, operands[1].constant)
+
+            if result:
+                return self.walk(index + 1, end)
+            return None
+
+        self.tests.extend(operands)
+        depends = list(self.depends)
+        if self.block(index + 1, end, operands)[1]:
+            # the operands come before the variable fields of the body
+            body = self.depends[len(depends):]
+            self.depends = depends
+            self.vary(*operands, *body)
+
+        return None
+
+    def loop(self, index: int, iterations: int | None) -> Instruction | None:
+        end = self.code.block_ends[index]
+        if iterations is not None and iterations <= 0:
+            return None
+
+        offset, tests = self.offset, len(self.tests)
+
+        self.loops += 1
+        ended, moved = self.block(index + 1, end, [])
+        self.loops -= 1
+
+        if ended == Instruction.BREAK:
+            # the body runs once
+            return None
+
+        if ended is not None:
+            return ended
+
+        if not moved:
+            return None
+
+        # a body, which may end early, made the offset variable in its test
+        if iterations is not None and offset is not None and self.offset is not None:
+            self.offset = offset + iterations * (self.offset - offset)
+            return None
+
+        # the tests of a loop decide when it is left
+        self.vary(*self.tests[tests:])
+        return None
+
+    def walk(self, start: int, end: int) -> Instruction | None:
+        """ Walk over the instructions, returns the instruction, which always ends them. """
+        instructions = self.code.instructions
+        database = self.database
+        stack = self.stack
+
+        index = start
+        while index < end:
+            inst = instructions[index]
+            op = inst.op
+            operands = inst.operands
+
+            if op == Instruction.TEST:
+                ended = self.test(index, operands[0])
+                if ended is not None:
+                    return ended
+
+                index = self.code.block_ends[index]
+                stack = self.stack
+                continue
+
+            if op in (Instruction.LOOP, Instruction.LOOPX):
+                ended = self.loop(index, operands[0] if op == Instruction.LOOPX else None)
+                if ended is not None:
+                    return ended
+
+                index = self.code.block_ends[index]
+                stack = self.stack
+                continue
+
+            if op == Instruction.READ:
+                dt = database[operands[0]]
+                self.read(self.type_size(dt), dt)
+
+            elif op == Instruction.RARRAY:
+                count = self.top
+                size = self.type_size(database[operands[0]])
+
+                if count.constant is not None and size is not None:
+                    self.read(count.constant * size)
+                else:
+                    value = self.read(None)
+                    if count.constant is None:
+                        self.depends.remove(value)
+                        self.vary(count)
+                    if size is None:
+                        self.vary(value)
+
+            elif op == Instruction.PUT:
+                self.put(operands[0])
+
+            elif op == Instruction.GET:
+                stack.append(self.values.get(operands[0], LayoutValue()))
+
+            elif op == Instruction.PUSH:
+                stack.append(LayoutValue(operands[0]))
+
+            elif op == Instruction.POP:
+                if stack:
+                    stack.pop()
+
+            elif op == Instruction.SEEK:
+                position = self.top
+                if operands[0] == SeekMode.REL and position.constant is not None:
+                    if self.offset is not None:
+                        self.offset += position.constant
+                else:
+                    self.vary(position)
+
+            elif op in (Instruction.TELL, Instruction.YIELD, Instruction.INDEX, Instruction.FINISH):
+                stack.append(LayoutValue())
+
+            elif op == Instruction.RET:
+                return op
+
+            elif op == Instruction.BREAK:
+                # a break outside of a loop has no effect
+                if self.loops:
+                    return op
+
+            elif op not in (
+                Instruction.EMPTY, Instruction.EDIT, Instruction.FLIP,
+                Instruction.APPEND, Instruction.FORGET,
+                Instruction.WRITE, Instruction.WARRAY,
+            ):
+                # the control flow is unknown from here on
+                self.vary(LayoutValue())
+                return op
+
+            index += 1
+
+        return None
+
+
+VARIABLE_LAYOUT = Layout(None, dict(), ())
+
+
+def analyze_layout(code: CodeObject, database: dict[str, DataType]) -> Layout:
+    """ Find the encoded size and the field offsets of the values a read code produces. """
+    return LayoutAnalyzer(code, database).analyze()
+
+
+def fixed_layout(layout: Layout, database: dict[str, DataType]) -> FixedLayout | None:
+    """
+    Get the field slots of a layout, if its size is the same for every value
+    and every field can be decoded in place. Otherwise None is returned.
+    """
+
+    if not layout.fixed:
+        return None
+
+    fields = dict()
+    for name, field in layout.fields.items():
+        if field.offset is None or field.depends:
+            return None
+
+        slot = field_slot(field.type, field.offset, database)
+        if slot is None:
+            return None
+        fields[name] = slot
+
+    return FixedLayout(layout.size, fields)
+
+
+def field_slot(dt: DataType, offset: int, database: dict[str, DataType]) -> FieldSlot | None:
+    """ Get the slot of a field of a type at an offset, if it has a fixed size. """
+    if isinstance(dt, PrimitiveType):
+        unpack_from = dt.struct.unpack_from
+
+        def decode(buffer: memoryview, pos: int) -> object:
+            return unpack_from(buffer, pos)[0]
+        return FieldSlot(offset, dt.size, decode)
+
+    if isinstance(dt, BytesType):
+        size = dt.size
+
+        def decode(buffer: memoryview, pos: int) -> memoryview:
+            return buffer[pos:pos + size]
+        return FieldSlot(offset, size, decode)
+
+    if isinstance(dt, ComplexType):
+        layout = dt.fixed_layout(database)
+        if layout is None:
+            return None
+
+        fields = layout.fields
+
+        def decode(buffer: memoryview, pos: int) -> RecordView:
+            return RecordView(buffer, pos, fields)
+        return FieldSlot(offset, layout.size, decode)
+
+    return None
+
+
+class RecordView:
+    """
+    A lazy view of a value with a fixed layout in a buffer.
+    A field is decoded, when it is accessed the first time, and then cached.
+    """
+
+    __slots__ = 'buffer', 'base', 'fields', 'cache'
+
+    def __init__(self, buffer: memoryview, base: int, fields: dict[str, FieldSlot]):
+        self.buffer = buffer
+        self.base = base
+        self.fields = fields
+        self.cache = dict()
+
+    def __getitem__(self, name: str) -> object:
+        cache = self.cache
+
+        if name not in cache:
+            slot = self.fields[name]
+            cache[name] = slot.decode(self.buffer, self.base + slot.offset)
+
+        return cache[name]
+
+    def __getattr__(self, name: str) -> object:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def keys(self) -> list[str]:
+        return list(self.fields)
+
+    def as_dict(self) -> dict:
+        """ Decode all fields, nested views are decoded too. """
+        result = dict()
+        for name in self.fields:
+            value = self[name]
+            result[name] = value.as_dict() if isinstance(value, RecordView) else value
+        return result
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(base={self.base}, fields={self.keys()})'
+
+
+class SlottedRecord:
+    """
+    The base of the generated record classes, which store every field in a slot.
+    Records support the item access of dicts, which the virtual machine uses.
+    """
+
+    __slots__ = ()
+    __fields__: tuple[str, ...] = ()
+
+    def __getitem__(self, name: str) -> object:
+        if name not in self.__fields__:
+            raise KeyError(name)
+
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name: str, value: object):
+        if name not in self.__fields__:
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__fields__ and hasattr(self, name)
+
+    def keys(self) -> list[str]:
+        """ The fields, which are set, e.g. only those of the taken branches. """
+        return [name for name in self.__fields__ if hasattr(self, name)]
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SlottedRecord):
+            return type(self) is type(other) and self.as_dict() == other.as_dict()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}' for name, value in self.as_dict().items())
+        return f'{self.__class__.__name__}({fields})'
+
+    def __reduce__(self):
+        # the generated classes can't be looked up by their name
+        return restore_record, (self.__class__.__name__, self.__fields__, self.as_dict())
+
+
+# the generated record classes by their name and fields,
+# so unpickled records get the same class again
+RECORD_CLASSES: dict[tuple[str, tuple[str, ...]], type[SlottedRecord]] = dict()
+
+
+def record_class(name: str, fields: Iterable[str]) -> type[SlottedRecord]:
+    """ Generate a record class with a slot for every field. """
+    fields = tuple(dict.fromkeys(fields))
+    key = name, fields
+
+    for field in fields:
+        if hasattr(SlottedRecord, field):
+            raise ValueError(f'the field {field!r} would hide an attribute of the record')
+
+    if key not in RECORD_CLASSES:
+        RECORD_CLASSES[key] = type(name, (SlottedRecord,), {
+            '__slots__': fields,
+            '__fields__': fields,
+        })
+
+    return RECORD_CLASSES[key]
+
+
+def restore_record(name: str, fields: tuple[str, ...], values: dict) -> SlottedRecord:
+    """ Create a record of a generated class again, used for unpickling. """
+    record = record_class(name, fields)()
+
+    for field, value in values.items():
+        setattr(record, field, value)
+
+    return record
+
+
+def structure_record(structure: type) -> type[SlottedRecord]:
+    """
+    Generate the record class of a structure built by a StructureFactory or a
+    BranchedStructureFactory. The fields of all branches get a slot.
+    """
+
+    return record_class(structure.__name__, (f.name for f in structure.__fields__))
+
+
+class ComplexType(DataType, ABC):
+    __slots__ = 'read_code', 'write_code', 'engine', 'optimization', 'compiled', 'layout'
+
+    # the record class of the values, if they aren't dicts
+    record: type[SlottedRecord] | None = None
+
+    def __init__(self, read_code: CodeObject, write_code: CodeObject,
+                 engine: Engine = Engine.INTERPRETER,
+                 optimization: Optimization = Optimization.FUSE):
+        self.read_code = read_code
+        self.write_code = write_code
+        self.engine = engine
+        self.optimization = optimization
+
+        # the database, the options and the programs compiled for them per database
+        self.compiled: DatabaseCache | None = None
+        # the database and the fixed layout of the values for it
+        self.layout: tuple[dict, Layout, FixedLayout | None] | None = None
+
+    def __getstate__(self) -> tuple[dict | None, dict]:
+        # the compiled programs and the layout hold closures,
+        # which are created again after unpickling
+        slots = {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, '__slots__', ())
+            if name not in ('compiled', 'layout') and hasattr(self, name)
+        }
+        return getattr(self, '__dict__', None), slots
+
+    def __setstate__(self, state: tuple[dict | None, dict]):
+        attributes, slots = state
+
+        if attributes:
+            self.__dict__.update(attributes)
+        for name, value in slots.items():
+            setattr(self, name, value)
+
+        self.compiled = None
+        self.layout = None
+
+    @abstractmethod
+    def empty(self) -> dict:
+        ...
+
+    def read_array(self, vm: VirtualMachine, count: int) -> list | Columns:
+        if not vm.columnar:
+            return super().read_array(vm, count)
+
+        columns = Columns(column_types(self.read_code, vm.database))
+        for _ in range(count):
+            columns.append(self.read(vm))
+
+        return columns.finish(vm.array_type)
+
+    def compile(self, database: dict[str, DataType]) -> tuple[dict, tuple, Callable, Callable]:
+        """ Get the read and write programs compiled for a database. """
+        options = (self.engine, self.optimization)
+
+        if self.compiled is None:
+            self.compiled = DatabaseCache()
+
+        compiled = self.compiled.get(database)
+
+        if compiled is None or compiled[1] != options:
+            compiler = ENGINE_COMPILERS[self.engine]
+            compiled = (
+                database,
+                options,
+                compiler(self.read_code, database, self.optimization, self.record).compile(),
+                compiler(self.write_code, database, self.optimization).compile(),
+            )
+            self.compiled.set(database, compiled)
+
+        return compiled
+
+    def analyze(self, database: dict[str, DataType]) -> Layout:
+        """ Get the layout of the values for a database. """
+        if self.layout is None or self.layout[0] is not database:
+            # a type containing itself has no fixed size
+            self.layout = database, VARIABLE_LAYOUT, None
+            layout = analyze_layout(self.read_code, database)
+            self.layout = database, layout, fixed_layout(layout, database)
+        return self.layout[1]
+
+    def fixed_layout(self, database: dict[str, DataType]) -> FixedLayout | None:
+        """ Get the fixed layout of the values for a database, if they have one. """
+        self.analyze(database)
+        return self.layout[2]
+
+    def view(self, database: dict[str, DataType], buffer: object, offset: int = 0) -> RecordView:
+        """ Get a lazy view of the value at an offset in a buffer. """
+        layout = self.fixed_layout(database)
+        if layout is None:
+            raise ValueError('only values with a fixed layout can be viewed')
+
+        return RecordView(memoryview(buffer).cast('B'), offset, layout.fields)
+
+    def read(self, vm: VirtualMachine) -> dict:
+        if self.engine == Engine.INTERPRETER:
+            value = vm.run(self.read_code, self.empty())
+        else:
+            value = self.compile(vm.database)[2](vm, self.empty())
+
+        assert isinstance(value, (dict, SlottedRecord))
+        return value
+
+    def write(self, vm: VirtualMachine, value: dict):
+        if self.engine == Engine.INTERPRETER:
+            vm.run(self.write_code, value)
+        else:
+            self.compile(vm.database)[3](vm, value)
+
+
+class RecordType(ComplexType):
+    """ A complex type, whose values are instances of a record class instead of dicts. """
+
+    __slots__ = 'record',
+
+    def __init__(self, record: type[SlottedRecord], read_code: CodeObject, write_code: CodeObject,
+                 engine: Engine = Engine.INTERPRETER,
+                 optimization: Optimization = Optimization.FUSE):
+        super().__init__(read_code, write_code, engine, optimization)
+        self.record = record
+
+    def __getstate__(self) -> tuple[dict | None, dict]:
+        # the record class is generated again after unpickling
+        attributes, slots = super().__getstate__()
+        slots['record'] = self.record.__name__, self.record.__fields__
+        return attributes, slots
+
+    def __setstate__(self, state: tuple[dict | None, dict]):
+        super().__setstate__(state)
+        self.record = record_class(*self.record)
+
+    def empty(self) -> SlottedRecord:
+        return self.record()
+
+
+ENGINE_COMPILERS = {
+    Engine.CLOSURE: ClosureCompiler,
+    Engine.SOURCE: SourceCompiler,
+}
+
+
+def get_database() -> dict:
+    return {
+        'u8l': IntType(1, Byteorder.LITTLE, False),
+        'u16l': IntType(2, Byteorder.LITTLE, False),
+        'u32l': IntType(4, Byteorder.LITTLE, False),
+        'u64l': IntType(8, Byteorder.LITTLE, False),
+        'i8l': IntType(1, Byteorder.LITTLE, True),
+        'i16l': IntType(2, Byteorder.LITTLE, True),
+        'i32l': IntType(4, Byteorder.LITTLE, True),
+        'i64l': IntType(8, Byteorder.LITTLE, True),
+
+        'u8b': IntType(1, Byteorder.BIG, False),
+        'u16b': IntType(2, Byteorder.BIG, False),
+        'u32b': IntType(4, Byteorder.BIG, False),
+        'u64b': IntType(8, Byteorder.BIG, False),
+        'i8b': IntType(1, Byteorder.BIG, True),
+        'i16b': IntType(2, Byteorder.BIG, True),
+        'i32b': IntType(4, Byteorder.BIG, True),
+        'i64b': IntType(8, Byteorder.BIG, True),
+
+        'f32': FloatType(4),
+        'f64': FloatType(8),
+
+        'cstring': CStringType(),
+    }
+
+
+def read_many(database: dict[str, DataType], name: str, buffer: object,
+              count: int | None = None, out: list | None = None,
+              array_type: ArrayType = ArrayType.ARRAY) -> list:
+    """
+    Decode consecutive values of a type from a buffer, or a stream,
+    with a single virtual machine. See VirtualMachine.read_many.
+    """
+
+    if isinstance(buffer, (DataStream, BufferStream)):
+        stream = buffer
+    else:
+        stream = BufferStream(buffer)
+
+    return VirtualMachine(database, stream, array_type).read_many(name, count, out)
+
+
+def write_many(database: dict[str, DataType], name: str, values: Iterable,
+               target: BinaryIO, batch: int = 1, capacity: int = 4096):
+    """
+    Encode consecutive values of a type into an OutputBuffer, which is
+    written to the target once per batch of values. See VirtualMachine.write_many.
+    """
+
+    stream = OutputBuffer(target, capacity)
+    VirtualMachine(database, stream).write_many(name, values, batch)
+
+
+def read_columns(database: dict[str, DataType], name: str, buffer: object,
+                 count: int | None = None,
+                 array_type: ArrayType = ArrayType.ARRAY) -> Columns:
+    """ Decode consecutive values of a complex type as Columns, see read_many. """
+
+    if isinstance(buffer, (DataStream, BufferStream)):
+        stream = buffer
+    else:
+        stream = BufferStream(buffer)
+
+    return VirtualMachine(database, stream, array_type, True).read_columns(name, count)
+
+
+def read_views(database: dict[str, DataType], name: str, buffer: object,
+               count: int | None = None, offset: int = 0) -> list[RecordView]:
+    """
+    Get lazy views of consecutive values of a complex type with a fixed layout.
+    Nothing is decoded until a field of a view is accessed.
+    """
+
+    dt = database[name]
+    layout = dt.fixed_layout(database)
+    if layout is None:
+        raise ValueError('only values with a fixed layout can be viewed')
+
+    buffer = memoryview(buffer).cast('B')
+    size, fields = layout
+
+    if count is None:
+        count = (len(buffer) - offset) // size
+    elif offset + count * size > len(buffer):
+        raise EOFError
+
+    return [RecordView(buffer, offset + i * size, fields) for i in range(count)]
+
+
+def iter_records(database: dict[str, DataType], name: str, stream: BinaryIO | DataStream | BufferStream,
+                 policy: EOFPolicy = EOFPolicy.ERROR,
+                 array_type: ArrayType = ArrayType.ARRAY) -> Iterator[object]:
+    """
+    Yield the values of a type one by one until the end of the stream.
+    Nothing but the current value is kept, so endless inputs like packet
+    captures or sockets can be decoded in constant memory.
+    A trailing partial record is handled according to the policy.
+    """
+
+    if not isinstance(stream, (DataStream, BufferStream)):
+        if isinstance(stream, RawIOBase) and not stream.seekable():
+            # raw sockets and pipes may return short reads
+            stream = BufferedReader(stream)
+        stream = DataStream(stream, OperationMode.READ)
+
+    vm = VirtualMachine(database, stream, array_type)
+    dt = database[name]
+
+    while not stream.eof:
+        try:
+            value = dt.read(vm)
+        except EOFError:
+            if policy == EOFPolicy.STOP:
+                return
+            raise
+
+        yield value
+
+
+def shard_ranges(size: int, boundaries: list[int] | None = None,
+                 record_size: int | None = None,
+                 shard_records: int = 1 << 16) -> list[tuple[int, int]]:
+    """
+    Split a file of size bytes into shards of at most shard_records records.
+    The records are located by an index of their start offsets or,
+    if every record has the same size, by their size.
+    Every shard is given as the offset of its first record and its record count.
+    """
+
+    if boundaries is not None:
+        return [
+            (boundaries[i], len(boundaries[i:i + shard_records]))
+            for i in range(0, len(boundaries), shard_records)
+        ]
+
+    assert record_size, 'either boundaries or a record_size is required'
+
+    # a trailing partial record raises an EOFError in its shard
+    count = -(-size // record_size)
+    return [
+        (i * record_size, min(shard_records, count - i))
+        for i in range(0, count, shard_records)
+    ]
+
+
+# the database and array type of a shard worker process
+shard_context: tuple[dict[str, DataType], ArrayType] | None = None
+
+
+def init_shard_worker(database: dict[str, DataType], array_type: ArrayType):
+    global shard_context
+    shard_context = database, array_type
+
+
+def read_shard(path: str | PathLike, name: str, start: int, count: int) -> list:
+    """ Read a shard of records in a worker, which opens the file itself. """
+    database, array_type = shard_context
+
+    with open(path, 'rb') as file:
+        file.seek(start)
+        vm = VirtualMachine(database, DataStream(file, OperationMode.READ), array_type)
+        return vm.read_many(name, count)
+
+
+def read_parallel(database: dict[str, DataType], name: str, path: str | PathLike,
+                  boundaries: list[int] | None = None,
+                  record_size: int | None = None,
+                  shard_records: int = 1 << 16,
+                  max_workers: int | None = None,
+                  array_type: ArrayType = ArrayType.ARRAY) -> Iterator[object]:
+    """
+    Decode the records of a file in a pool of processes, see shard_ranges.
+    The database is sent once to every worker, while the records are read
+    by the workers from the file directly. The records are yielded in order.
+    Only a few shards per worker are decoded ahead of the consumer.
+    """
+
+    shards = shard_ranges(stat(path).st_size, boundaries, record_size, shard_records)
+    if not shards:
+        return
+
+    window = 2 * (max_workers or cpu_count() or 1)
+    shards = iter(shards)
+    pending = deque()
+
+    executor = ProcessPoolExecutor(
+        max_workers,
+        initializer=init_shard_worker,
+        initargs=(database, array_type),
+    )
+
+    try:
+        for start, count in islice(shards, window):
+            pending.append(executor.submit(read_shard, path, name, start, count))
+
+        while pending:
+            values = pending.popleft().result()
+
+            for start, count in islice(shards, 1):
+                pending.append(executor.submit(read_shard, path, name, start, count))
+
+            yield from values
+    finally:
+        # the shards, which weren't started, are dropped when the consumer stops early
+        executor.shutdown(cancel_futures=True)
+
+
+class RecordDecoder:
+    """
+    Decode the values of a type from chunks of data as they arrive.
+    The bytes of an incomplete value are kept until the next chunk is fed.
+    """
+
+    def __init__(self, database: dict[str, DataType], name: str,
+                 array_type: ArrayType = ArrayType.ARRAY):
+        self.database = database
+        self.type = database[name]
+        self.vm = VirtualMachine(database, BufferStream(b''), array_type)
+        self.buffer = bytearray()
+
+        # the amount of buffered bytes the incomplete value needs at least,
+        # so it isn't decoded again for every small chunk
+        self.needed = 0
+
+    @property
+    def pending(self) -> int:
+        """ The amount of buffered bytes, which are not decoded yet. """
+        return len(self.buffer)
+
+    def feed(self, data: bytes):
+        self.buffer += data
+
+    def decode(self) -> list:
+        """ Decode all values, which are completely buffered. """
+        if len(self.buffer) < self.needed:
+            return []
+
+        # the values may be views, which must not change with the buffer
+        stream = BufferStream(bytes(self.buffer))
+        vm = self.vm
+        vm.reset(stream)
+        dt = self.type
+        values = list()
+        end = 0
+
+        self.needed = 0
+        while not stream.eof:
+            try:
+                values.append(dt.read(vm))
+            except EOFError:
+                self.needed = max(stream.needed, stream.length + 1) - end
+                break
+            end = stream.pos
+
+        if end:
+            del self.buffer[:end]
+        return values
+
+
+async def aiter_records(database: dict[str, DataType], name: str, reader: StreamReader,
+                        policy: EOFPolicy = EOFPolicy.ERROR,
+                        array_type: ArrayType = ArrayType.ARRAY,
+                        chunk_size: int = 1 << 16) -> AsyncIterator[object]:
+    """
+    Yield the values of a type from an asyncio stream reader.
+    The reader is only awaited, when the buffered bytes
+    don't contain the next value completely.
+    """
+
+    decoder = RecordDecoder(database, name, array_type)
+
+    while True:
+        for value in decoder.decode():
+            yield value
+
+        data = await reader.read(chunk_size)
+
+        if not data:
+            if decoder.pending and policy == EOFPolicy.ERROR:
+                raise EOFError
+            return
+
+        decoder.feed(data)
+
+
+class RecordProtocol(Protocol):
+    """
+    A protocol, which decodes the values of a type from the received data
+    and passes them to record_received. A partial record at the end of the
+    data is passed to error_received as an EOFError, if the policy is ERROR.
+    """
+
+    def __init__(self, database: dict[str, DataType], name: str,
+                 policy: EOFPolicy = EOFPolicy.ERROR,
+                 array_type: ArrayType = ArrayType.ARRAY):
+        self.decoder = RecordDecoder(database, name, array_type)
+        self.policy = policy
+
+        # the error, which ended the data
+        self.exception: Exception | None = None
+
+    def record_received(self, value: object):
+        ...
+
+    def error_received(self, exc: Exception):
+        self.exception = exc
+
+    def data_received(self, data: bytes):
+        self.decoder.feed(data)
+
+        for value in self.decoder.decode():
+            self.record_received(value)
 
+    def eof_received(self) -> bool | None:
+        # raising here would only be logged by the event loop
+        if self.decoder.pending and self.policy == EOFPolicy.ERROR:
+            self.error_received(EOFError(f'{self.decoder.pending} bytes of a partial record'))
+        return None
 
@@ -0,0 +1,75 @@
+import pytest  # noqa
+import sys
+from pathlib import Path
+from argparse import ArgumentTypeError
+from statistics import mean
+from collections import Counter
+
+# the benchmarks import their modules relative to their directory
+sys.path.append(str(Path(__file__).parents[2] / 'byte_ninja' / 'backend' / 'benchmarks'))
+
+from minimal import Engine, read_many
+from vm.corpus import distribution, main, workload_schema
+from vm.schema import Fixed, Normal, Uniform, Weighted
+from vm.workloads import CORPORA
+
+
+def read_corpus(workload: str, path: Path) -> list:
+    database, name, _ = CORPORA[workload]
+    return read_many(database(Engine.INTERPRETER), name, path.read_bytes())
+
+
+def test_distribution():
+    assert isinstance(distribution('fixed:3'), Fixed)
+    assert vars(distribution('uniform:0:64')) == {'low': 0, 'high': 64}
+    assert vars(distribution('normal:16:4:2')) == {'mean': 16, 'stddev': 4, 'low': 2, 'high': None}
+    assert vars(distribution('weighted:1=4,3=1')) == {'values': [1, 3], 'weights': [4, 1]}
+
+    for text in ('uniform:1', 'weighted:1', 'fixed:x', 'poisson:3'):
+        with pytest.raises(ArgumentTypeError):
+            distribution(text)
+
+
+def test_workload_schema():
+    assert workload_schema('flat') is CORPORA['flat'][2]
+
+    with pytest.raises(ValueError):
+        workload_schema('flat', array_length=Fixed(1))
+    with pytest.raises(ValueError):
+        workload_schema('arrays', tags=Fixed(1))
+
+
+def test_array_length(tmp_path):
+    path = tmp_path / 'arrays.bin'
+    main(['arrays', '200', str(path), '--array-length', 'uniform:2:5'])
+
+    records = read_corpus('arrays', path)
+    assert len(records) == 200
+    assert {record['count'] for record in records} == {2, 3, 4, 5}
+    assert all(len(record['values']) == record['count'] for record in records)
+
+
+def test_tlv(tmp_path):
+    path = tmp_path / 'tlv.bin'
+    main(['tlv', '1000', str(path), '--tags', 'weighted:1=3,3=1', '--cstring-length', 'fixed:7'])
+
+    records = read_corpus('tlv', path)
+    tags = Counter(record['tag'] for record in records)
+
+    assert tags.keys() == {1, 3}
+    assert 0.65 < tags[1] / len(records) < 0.85
+    assert {len(record['text']) for record in records if record['tag'] == 3} == {7}
+
+
+def test_cstring_length(tmp_path):
+    path = tmp_path / 'cstrings.bin'
+    main(['cstrings', '300', str(path), '--cstring-length', 'normal:20:2:14:26', '--seed', '3'])
+
+    lengths = [len(record['host']) for record in read_corpus('cstrings', path)]
+    assert min(lengths) >= 14 and max(lengths) <= 26
+    assert 19.5 < mean(lengths) < 20.5
+
+    # the same seed gives the same corpus
+    other = tmp_path / 'other.bin'
+    main(['cstrings', '300', str(other), '--cstring-length', 'normal:20:2:14:26', '--seed', '3'])
+    assert other.read_bytes() == path.read_bytes()
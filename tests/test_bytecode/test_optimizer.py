@@ -0,0 +1,93 @@
+import pytest  # noqa
+
+from byte_ninja.bytecode.assembler import Assembler
+from byte_ninja.bytecode.codes import OPCode
+from byte_ninja.bytecode.optimizer import optimize
+from byte_ninja.bytecode.lexer import tokenize
+from byte_ninja.bytecode.syntax import SyntaxTree, NODE_LEVEL
+from minimal import BufferStream, CodeObject, VirtualMachine, get_database
+
+
+def types(source: str) -> list:
+    """ The types of the optimized instructions, levels as lists. """
+    tree = SyntaxTree(tokenize(source))
+    optimize(tree)
+
+    def level(nodes: list) -> list:
+        result = list()
+        for node in nodes:
+            result.append(node.type)
+            result.extend(level(value) for value in node if getattr(value, 'type', None) == NODE_LEVEL)
+        return result
+
+    return level(tree)
+
+
+def test_push_pop():
+    assert types('push 1 push 2 pop pop read x') == [OPCode.READ]
+    assert types('read x pop push 1 put y pop') == [OPCode.READ, OPCode.POP, OPCode.PUSH, OPCode.PUT, OPCode.POP]
+
+
+def test_dead_code():
+    assert types('read x ret pop pop') == [OPCode.READ, OPCode.RET]
+    assert types('loop: break read x end') == [OPCode.LOOP, [OPCode.BREAK]]
+    assert types('loop: read x test NOT: break pop end end') == [OPCode.LOOP, [OPCode.READ, OPCode.TEST, [OPCode.BREAK]]]
+    assert types('break read x') == [OPCode.BREAK, OPCode.READ]
+
+
+def test_constant_tests():
+    assert types('push 0 test NOT: read x pop end pop') == [OPCode.PUSH, OPCode.READ, OPCode.POP, OPCode.POP]
+    assert types('push 1 test NOT: read x pop end pop') == []
+    assert types('push 1 push 2 test GT: put x end pop pop') == [OPCode.PUSH, OPCode.PUSH, OPCode.PUT, OPCode.POP, OPCode.POP]
+    assert types('push 1 push 2 test LT: put x end pop pop') == []
+
+    # the operands aren't constant
+    assert types('read x test NOT: ret end') == [OPCode.READ, OPCode.TEST, [OPCode.RET]]
+
+
+def test_seeks():
+    assert types('push 2 seek START seek START pop') == [OPCode.PUSH, OPCode.SEEK, OPCode.POP]
+    assert types('push 2 seek REL seek REL pop') == [OPCode.PUSH, OPCode.SEEK, OPCode.SEEK, OPCode.POP]
+
+    tree = SyntaxTree(tokenize('push 2 seek REL pop push 3 seek REL pop push 4 seek REL pop'))
+    stats = optimize(tree)
+    assert len(tree) == 3 and tree[0][0].value == '9'
+    assert stats['seeks'] == 2
+
+
+def test_stats():
+    asm = Assembler('push 1 pop read x ret pop', None, True)  # noqa
+    assert asm.stats == {
+        'push_pop': 1,
+        'dead_code': 1,
+        'constant_tests': 0,
+        'seeks': 0,
+        'before': 5,
+        'after': 2,
+    }
+
+    assert Assembler('push 1 pop', None).stats is None  # noqa
+
+
+PROGRAMS = [
+    'read u8l put x pop push 1 pop push 0 test NOT: read u16l put y pop end pop ret pop',
+    'push 1 seek REL pop push 2 seek REL pop read u8l put x pop',
+    'loop: read u8l test NOT: break pop end put x pop push 1 push 1 test EQ: read u8l put y pop end pop pop end',
+    'read u8l put x push 1 test GT: read u8l put y pop end pop pop tell seek START seek START pop read u8l put z pop',
+    'break read u8l put x pop push 0 test NOT: break read u8l put y pop end pop',
+]
+
+
+@pytest.mark.parametrize('source', PROGRAMS)
+def test_semantics(source):
+    data = bytes([3, 1, 2, 5, 0, 7, 6])
+    results = list()
+
+    for enabled in (False, True):
+        asm = Assembler(source, None, enabled)  # noqa
+        code = CodeObject(dict(enumerate(asm.name_table)), asm.bytecode.getvalue())
+        vm = VirtualMachine(get_database(), BufferStream(data))
+
+        results.append((vm.run(code, dict()), vm.stream.tell()))
+
+    assert results[0] == results[1]
@@ -0,0 +1,88 @@
+import pytest
+from mmap import mmap
+
+from byte_ninja.enums import ByteOrder
+from byte_ninja.stream import MappedStream
+from minimal import BufferStream, VirtualMachine, get_database
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'\x00\x2ahello\x00world')
+    return path
+
+
+def test_read_int(path):
+    with MappedStream(path, ByteOrder.BIG) as stream:
+        assert stream.read_int(2) == 42
+        assert stream.tell() == 2
+
+
+def test_read_cstring(path):
+    with MappedStream(path) as stream:
+        stream.seek(2)
+        assert stream.read_cstring() == 'hello'
+        assert stream.read_raw_cstring() == b'world'
+        assert stream.eof
+
+
+def test_read_cstring_fail_eof(path):
+    with MappedStream(path) as stream:
+        stream.seek(8)
+
+        with pytest.raises(EOFError):
+            stream.read_cstring(fail_eof=True)
+
+
+def test_require(path):
+    with MappedStream(path) as stream:
+        stream.seek(-5, 2)
+        assert stream.require(5) == b'world'
+
+        with pytest.raises(EOFError):
+            stream.require(1)
+
+
+def test_read_only(path):
+    with MappedStream(path) as stream:
+        assert stream.stream_mode.can_read()
+        assert not stream.writable()
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.bin'
+    path.write_bytes(b'')
+
+    with MappedStream(path) as stream:
+        assert stream.eof
+        assert stream.read() == b''
+
+
+def test_zero_copy_view(path):
+    with MappedStream(path) as stream:
+        view = stream.getbuffer()
+
+        vm = VirtualMachine(get_database(), BufferStream(view))
+        assert get_database()['u16b'].read(vm) == 42
+        assert vm.stream.read(5) == b'hello'
+
+        vm.stream.buffer.release()
+        view.release()
+
+
+def test_read_until_mapped(path):
+    with MappedStream(path) as stream:
+        view = stream.getbuffer()
+        buffer = BufferStream(view, 2)
+
+        # the mapping is searched in place
+        assert isinstance(buffer.source, mmap)
+        assert buffer.read_until(b'\x00') == b'hello'
+
+        with pytest.raises(EOFError):
+            buffer.read_until(b'\x00')
+
+        buffer.buffer.release()
+        view.release()
+
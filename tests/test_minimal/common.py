@@ -0,0 +1,47 @@
+from io import BytesIO
+
+from minimal import (
+    Instruction,
+    ComplexType,
+    DataStream,
+    OperationMode,
+    VirtualMachine,
+    assemble,
+)
+
+
+def field(name: str, typ: str) -> list[tuple]:
+    """ Read a value and store it in a field. """
+    return [
+        (Instruction.READ, typ),
+        (Instruction.PUT, name),
+        (Instruction.POP,),
+    ]
+
+
+def store(name: str, typ: str) -> list[tuple]:
+    """ Write a value from a field. """
+    return [
+        (Instruction.GET, name),
+        (Instruction.WRITE, typ),
+        (Instruction.POP,),
+    ]
+
+
+class Record(ComplexType):
+    def empty(self) -> dict:
+        return dict()
+
+
+def reader(database: dict, data: bytes) -> VirtualMachine:
+    return VirtualMachine(
+        database,
+        DataStream(BytesIO(data), OperationMode.READ),
+    )
+
+
+def writer(database: dict) -> VirtualMachine:
+    return VirtualMachine(
+        database,
+        DataStream(BytesIO(), OperationMode.WRITE),
+    )
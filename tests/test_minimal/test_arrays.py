@@ -0,0 +1,116 @@
+import pytest  # noqa
+from array import array
+from io import BytesIO
+
+from minimal import (
+    ArrayType,
+    DataStream,
+    Engine,
+    Instruction,
+    OperationMode,
+    VirtualMachine,
+    get_database,
+)
+from tests.test_minimal.common import (
+    assemble,
+    field,
+    store,
+    reader,
+    writer,
+    Record,
+)
+
+
+def samples_type(engine: Engine, typ: str) -> Record:
+    return Record(
+        assemble(
+            (Instruction.READ, 'u16l'),
+            (Instruction.PUT, 'count'),
+            (Instruction.RARRAY, typ),
+            (Instruction.PUT, 'samples'),
+        ),
+        assemble(
+            (Instruction.GET, 'count'),
+            (Instruction.WRITE, 'u16l'),
+            (Instruction.POP,),
+            (Instruction.GET, 'samples'),
+            (Instruction.WARRAY, typ),
+        ),
+        engine,
+    )
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_read_i16b(engine):
+    db = get_database()
+    db['samples'] = samples_type(engine, 'i16b')
+
+    data = b'\x03\x00' + b'\x00\x01' + b'\xff\xfe' + b'\x7f\xff'
+    value = db['samples'].read(reader(db, data))
+
+    assert value['samples'] == array('h', [1, -2, 0x7fff])
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_round_trip(engine):
+    db = get_database()
+    db['samples'] = samples_type(engine, 'u32b')
+
+    vm = writer(db)
+    db['samples'].write(vm, {'count': 2, 'samples': [1, 0xdeadbeef]})
+    data = vm.stream._stream.getvalue()  # noqa
+
+    assert data == b'\x02\x00\x00\x00\x00\x01\xde\xad\xbe\xef'
+    assert db['samples'].read(reader(db, data))['samples'].tolist() == [1, 0xdeadbeef]
+
+
+def test_list_array_type():
+    db = get_database()
+    db['samples'] = samples_type(Engine.INTERPRETER, 'f32')
+
+    data = b'\x02\x00' + array('f', [0.5, 2.0]).tobytes()
+    vm = VirtualMachine(db, DataStream(BytesIO(data), OperationMode.READ), ArrayType.LIST)
+
+    assert db['samples'].read(vm)['samples'] == [0.5, 2.0]
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_complex_elements(engine):
+    db = get_database()
+    db['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u8l')),
+        assemble(*store('x', 'u8l'), *store('y', 'u8l')),
+        engine,
+    )
+    db['points'] = samples_type(engine, 'point')
+
+    value = {'count': 2, 'samples': [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}]}
+
+    vm = writer(db)
+    db['points'].write(vm, value)
+    data = vm.stream._stream.getvalue()  # noqa
+
+    assert data == b'\x02\x00\x01\x02\x03\x04'
+    assert db['points'].read(reader(db, data)) == value
+
+
+def test_eof():
+    db = get_database()
+    db['samples'] = samples_type(Engine.INTERPRETER, 'u32l')
+
+    with pytest.raises(EOFError):
+        db['samples'].read(reader(db, b'\x02\x00\x00\x00\x00\x00'))
+
+
+def test_numpy():
+    numpy = pytest.importorskip('numpy')
+
+    db = get_database()
+    db['samples'] = samples_type(Engine.INTERPRETER, 'i16b')
+
+    data = b'\x02\x00\x00\x01\xff\xfe'
+    vm = VirtualMachine(db, DataStream(BytesIO(data), OperationMode.READ), ArrayType.NUMPY)
+    value = db['samples'].read(vm)
+
+    assert isinstance(value['samples'], numpy.ndarray)
+    assert value['samples'].tolist() == [1, -2]
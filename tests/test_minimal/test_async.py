@@ -0,0 +1,153 @@
+import pytest  # noqa
+import asyncio
+
+from minimal import (
+    EOFPolicy,
+    Engine,
+    Instruction,
+    RecordDecoder,
+    RecordProtocol,
+    aiter_records,
+    get_database,
+)
+from tests.test_minimal.common import assemble, field, Record
+
+
+def point_database(engine: Engine = Engine.INTERPRETER) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+    return database
+
+
+POINTS = bytes([1, 2, 0, 3, 4, 0, 5, 6, 0])
+EXPECTED = [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}, {'x': 5, 'y': 6}]
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_decoder(engine):
+    decoder = RecordDecoder(point_database(engine), 'point')
+
+    decoder.feed(POINTS[:4])
+    assert decoder.decode() == EXPECTED[:1]
+    assert decoder.pending == 1
+
+    decoder.feed(POINTS[4:])
+    assert decoder.decode() == EXPECTED[1:]
+    assert decoder.pending == 0
+
+
+def test_decoder_chunks():
+    database = get_database()
+    database['blob'] = Record(
+        assemble(
+            (Instruction.READ, 'u16l'),
+            (Instruction.RARRAY, 'u8l'),
+            (Instruction.PUT, 'data'),
+            (Instruction.POP,),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+
+    data = bytes(range(256)) * 16
+    decoder = RecordDecoder(database, 'blob')
+    decoder.feed(len(data).to_bytes(2, 'little'))
+    assert decoder.decode() == []
+
+    # the blob isn't decoded again, until all of its bytes are buffered
+    assert decoder.needed == 2 + len(data)
+
+    values = list()
+    for i in range(0, len(data), 7):
+        decoder.feed(data[i:i + 7])
+        values += decoder.decode()
+
+    assert [list(value['data']) for value in values] == [list(data)]
+    assert decoder.pending == 0
+    assert decoder.needed == 0
+
+
+def collect(data: bytes, chunk: int, policy: EOFPolicy = EOFPolicy.ERROR) -> list:
+    async def main():
+        reader = asyncio.StreamReader()
+
+        async def produce():
+            for i in range(0, len(data), chunk):
+                reader.feed_data(data[i:i + chunk])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        producer = asyncio.ensure_future(produce())
+        values = [value async for value in aiter_records(point_database(), 'point', reader, policy)]
+        await producer
+        return values
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('chunk', [1, 2, 4, len(POINTS)])
+def test_stream_reader(chunk):
+    assert collect(POINTS, chunk) == EXPECTED
+
+
+def test_stream_reader_partial():
+    assert collect(POINTS[:-1], 2, EOFPolicy.STOP) == EXPECTED[:2]
+
+    with pytest.raises(EOFError):
+        collect(POINTS[:-1], 2)
+
+
+class Points(RecordProtocol):
+    def __init__(self, policy: EOFPolicy = EOFPolicy.ERROR):
+        super().__init__(point_database(), 'point', policy)
+        self.values = list()
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def record_received(self, value: object):
+        self.values.append(value)
+
+    def connection_lost(self, exc: Exception | None):
+        self.closed.set_result(exc)
+
+
+def receive(data: bytes, policy: EOFPolicy = EOFPolicy.ERROR) -> Points:
+    """ Send the data over a connection, which is received by the protocol. """
+    async def main():
+        async def send(_, writer: asyncio.StreamWriter):
+            for i in range(len(data)):
+                writer.write(data[i:i + 1])
+                await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(send, '127.0.0.1', 0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            _, protocol = await asyncio.get_running_loop().create_connection(
+                lambda: Points(policy), '127.0.0.1', port,
+            )
+            assert await protocol.closed is None
+        return protocol
+
+    return asyncio.run(main())
+
+
+def test_protocol():
+    protocol = receive(POINTS)
+
+    assert protocol.values == EXPECTED
+    assert protocol.exception is None
+
+
+def test_protocol_partial():
+    protocol = receive(POINTS[:-1])
+    assert protocol.values == EXPECTED[:2]
+    assert isinstance(protocol.exception, EOFError)
+
+    protocol = receive(POINTS[:-1], EOFPolicy.STOP)
+    assert protocol.values == EXPECTED[:2]
+    assert protocol.exception is None
@@ -0,0 +1,65 @@
+import pytest  # noqa
+from io import BytesIO
+
+from minimal import (
+    DataStream,
+    Engine,
+    Instruction,
+    OperationMode,
+    get_database,
+    read_many,
+)
+from tests.test_minimal.common import assemble, field, Record
+
+
+def point_database(engine: Engine) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'i16b'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+    return database
+
+
+POINTS = bytes([1, 0, 2, 3, 0xff, 0xfe, 5, 0, 6])
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_until_eof(engine):
+    result = read_many(point_database(engine), 'point', POINTS)
+    assert result == [
+        {'x': 1, 'y': 2},
+        {'x': 3, 'y': -2},
+        {'x': 5, 'y': 6},
+    ]
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_count(engine):
+    result = read_many(point_database(engine), 'point', POINTS, 2)
+    assert result == [{'x': 1, 'y': 2}, {'x': 3, 'y': -2}]
+
+
+def test_fill_list():
+    out = ['header']
+    result = read_many(point_database(Engine.INTERPRETER), 'point', POINTS, 1, out)
+
+    assert result is out
+    assert out == ['header', {'x': 1, 'y': 2}]
+
+
+def test_primitive():
+    assert read_many(get_database(), 'u16l', b'\x01\x00\x02\x00') == [1, 2]
+
+
+def test_data_stream():
+    stream = DataStream(BytesIO(POINTS), OperationMode.READ)
+    assert len(read_many(point_database(Engine.CLOSURE), 'point', stream)) == 3
+    assert stream.eof
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_partial_record(engine):
+    with pytest.raises(EOFError):
+        read_many(point_database(engine), 'point', POINTS[:-1])
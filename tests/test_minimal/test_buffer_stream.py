@@ -0,0 +1,108 @@
+import pytest  # noqa
+from array import array
+
+from minimal import (
+    BufferStream,
+    BytesType,
+    Engine,
+    Instruction,
+    SeekMode,
+    VirtualMachine,
+    get_database,
+)
+from tests.test_minimal.common import assemble, field, Record
+
+
+def test_read():
+    stream = BufferStream(bytearray(b'abcdef'))
+
+    view = stream.read(2)
+    assert isinstance(view, memoryview)
+    assert view == b'ab'
+    assert stream.tell() == 2
+
+    assert stream.seek(-1, SeekMode.END) == 5
+    assert stream.read(1) == b'f'
+
+    with pytest.raises(EOFError):
+        stream.read(1)
+
+    assert stream.tell() == 6
+
+
+def test_buffer_protocol():
+    stream = BufferStream(array('H', [1, 2]))
+    assert stream.length == 4
+    assert stream.read(4) == array('H', [1, 2]).tobytes()
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_zero_copy_record(engine):
+    db = get_database()
+    db['bytes4'] = BytesType(4)
+    db['record'] = Record(
+        assemble(
+            *field('x', 'u16b'),
+            *field('y', 'u8l'),
+            *field('tag', 'bytes4'),
+            (Instruction.TELL,),
+            (Instruction.PUT, 'end'),
+            (Instruction.PUSH, 0),
+            (Instruction.SEEK, SeekMode.START),
+            *field('first', 'u8l'),
+        ),
+        assemble(),
+        engine,
+    )
+
+    data = bytearray(b'\x01\x02\x03abcd')
+    value = db['record'].read(VirtualMachine(db, BufferStream(data)))
+
+    assert value == {'x': 0x0102, 'y': 3, 'tag': b'abcd', 'end': 7, 'first': 1}
+    assert isinstance(value['tag'], memoryview)
+
+    # the view shares the memory of the input
+    data[3] = ord('z')
+    assert value['tag'] == b'zbcd'
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_eof(engine):
+    db = get_database()
+    db['record'] = Record(
+        assemble(*field('x', 'u32l'), *field('y', 'u32l')),
+        assemble(),
+        engine,
+    )
+
+    with pytest.raises(EOFError):
+        db['record'].read(VirtualMachine(db, BufferStream(b'\x00' * 7)))
+
+
+def test_rarray():
+    db = get_database()
+    db['samples'] = Record(
+        assemble(
+            (Instruction.PUSH, 3),
+            (Instruction.RARRAY, 'i16b'),
+            (Instruction.PUT, 'samples'),
+        ),
+        assemble(),
+    )
+
+    vm = VirtualMachine(db, BufferStream(b'\x00\x01\x00\x02\xff\xff'))
+    assert db['samples'].read(vm)['samples'] == array('h', [1, 2, -1])
+
+
+def test_read_until_scan():
+    data = b'x' * 1000 + b'\x00' + b'abc\x00' + b'rest'
+
+    # a slice of a buffer and an array can't be searched in place
+    for source in (memoryview(b'_' + data)[1:], array('B', data)):
+        buffer = BufferStream(source)
+        assert buffer.source is None
+
+        assert buffer.read_until(b'\x00') == b'x' * 1000
+        assert buffer.read_until(b'\x00') == b'abc'
+        with pytest.raises(EOFError):
+            buffer.read_until(b'\x00')
@@ -0,0 +1,125 @@
+import pytest  # noqa
+from array import array
+from sys import getsizeof
+
+from minimal import (
+    ArrayType,
+    BufferStream,
+    Columns,
+    Engine,
+    Instruction,
+    TestOperation as Operation,
+    VirtualMachine,
+    column_types,
+    get_database,
+    numpy,
+    read_columns,
+)
+from tests.test_minimal.common import assemble, field, Record
+
+
+def database(engine: Engine = Engine.INTERPRETER) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(
+            *field('x', 'u8l'),
+            *field('y', 'i16l'),
+            (Instruction.READ, 'u8l'),
+            (Instruction.PUT, 'tag'),
+            (Instruction.TEST, Operation.NOT, [
+                *field('name', 'cstring'),
+            ]),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+        engine,
+    )
+    database['path'] = Record(
+        assemble(
+            (Instruction.READ, 'u8l'),
+            (Instruction.RARRAY, 'point'),
+            (Instruction.PUT, 'points'),
+            (Instruction.POP,),
+            (Instruction.POP,),
+            (Instruction.EMPTY, 0),
+            (Instruction.LOOPX, 2, [
+                (Instruction.READ, 'point'),
+                (Instruction.APPEND, 0),
+                (Instruction.POP,),
+            ]),
+            (Instruction.FINISH, 0),
+            (Instruction.PUT, 'ends'),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+        engine,
+    )
+    return database
+
+
+POINTS = b'\x01\xff\xff\x01' + b'\x02\x03\x00\x00ab\x00' + b'\x03\x04\x00\x01'
+
+
+def test_column_types():
+    types = database()
+    assert column_types(types['point'].read_code, types) == {
+        'x': 'B',
+        'y': 'h',
+        'tag': 'B',
+        'name': None,
+    }
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_read_columns(engine):
+    columns = read_columns(database(engine), 'point', POINTS)
+
+    assert len(columns) == 3
+    assert columns['x'] == array('B', [1, 2, 3])
+    assert columns['y'] == array('h', [-1, 3, 4])
+    assert columns['tag'] == array('B', [1, 0, 1])
+    assert columns['name'] == [None, b'ab', None]
+    assert list(columns)[1] == {'x': 2, 'y': 3, 'tag': 0, 'name': b'ab'}
+
+
+@pytest.mark.skipif(numpy is None, reason='numpy is not installed')
+def test_numpy_columns():
+    columns = read_columns(database(), 'point', POINTS, array_type=ArrayType.NUMPY)
+    assert columns['y'].dtype == numpy.int16
+    assert columns['y'].tolist() == [-1, 3, 4]
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_array_paths(engine):
+    types = database(engine)
+    data = b'\x02' + POINTS[:11] + POINTS[11:] + POINTS[:4]
+    vm = VirtualMachine(types, BufferStream(data), columnar=True)
+
+    path = types['path'].read(vm)
+
+    # read by RARRAY with the types of the fields
+    assert isinstance(path['points'], Columns)
+    assert path['points']['y'] == array('h', [-1, 3])
+
+    # collected by LOOPX, the types are unknown
+    assert isinstance(path['ends'], Columns)
+    assert path['ends']['y'] == array('q', [4, -1])
+    assert path['ends']['tag'] == array('q', [1, 1])
+    assert 'name' not in path['ends']
+
+
+def test_rows_without_columnar():
+    types = database()
+    path = types['path'].read(VirtualMachine(types, BufferStream(b'\x00' + POINTS[11:] + POINTS[:4])))
+    assert path['points'] == [] and isinstance(path['ends'], list)
+
+
+def test_compact():
+    values = [{'x': i, 'y': -i} for i in range(1000)]
+    columns = Columns.from_values(values)
+
+    assert columns['x'].typecode == 'q'
+    assert getsizeof(columns['x']) + getsizeof(columns['y']) < getsizeof(values) + sum(map(getsizeof, values)) / 10
+    assert Columns.from_values([1, 2]) == [1, 2]
@@ -0,0 +1,148 @@
+import pytest  # noqa
+
+from minimal import (
+    Instruction,
+    TestOperation as Operation,
+    VirtualMachine,
+    get_database,
+)
+from tests.test_minimal.common import assemble, field, reader, Record
+
+
+def test_decode_operands():
+    code = assemble(
+        (Instruction.READ, 'u16l'),
+        (Instruction.PUT, 'x'),
+        (Instruction.EDIT, 3, 'x'),
+        (Instruction.INDEX, 7, 3),
+        (Instruction.TEST, Operation.NE, [
+            (Instruction.POP,),
+        ]),
+    )
+
+    assert [(i.op, i.operands) for i in code.instructions] == [
+        (Instruction.READ, ('u16l',)),
+        (Instruction.PUT, ('x',)),
+        (Instruction.EDIT, (3, 'x')),
+        (Instruction.INDEX, (7, 3)),
+        (Instruction.TEST, (Operation.NE, 1)),
+        (Instruction.POP, ()),
+        (Instruction.RET, ()),  # implicit
+    ]
+
+    assert [i.offset for i in code.instructions] == [0, 9, 18, 29, 40, 50, 51]
+    assert code.instructions[0].handler is VirtualMachine.exec_read
+
+
+def test_skip_nested_blocks():
+    code = assemble(
+        (Instruction.LOOPX, 2, [
+            (Instruction.TEST, Operation.NOT, [
+                (Instruction.POP,),
+                (Instruction.POP,),
+            ]),
+            (Instruction.POP,),
+        ]),
+        (Instruction.RET,),
+    )
+
+    assert code.skip(0, 1) == 5
+    assert code.skip(1, 2) == 5
+    assert code.skip(1, 1) == 4
+
+
+def test_run_fields():
+    db = get_database()
+    code = assemble(
+        *field('x', 'u16l'),
+        *field('y', 'i8b'),
+        (Instruction.RET,),
+    )
+
+    vm = reader(db, b'\x01\x02\xff')
+    assert vm.run(code, dict()) == {'x': 0x0201, 'y': -1}
+
+
+def test_run_loopx_array():
+    db = get_database()
+    code = assemble(
+        (Instruction.EMPTY, 0),
+        (Instruction.LOOPX, 3, [
+            (Instruction.READ, 'u8l'),
+            (Instruction.APPEND, 0),
+            (Instruction.POP,),
+        ]),
+        (Instruction.FINISH, 0),
+        (Instruction.PUT, 'values'),
+    )
+
+    vm = reader(db, b'\x01\x02\x03')
+    assert vm.run(code, dict()) == {'values': [1, 2, 3]}
+
+
+def test_failed_test_skips_nested_body():
+    db = get_database()
+    code = assemble(
+        (Instruction.PUSH, 1),
+        (Instruction.PUSH, 2),
+        (Instruction.TEST, Operation.EQ, [
+            (Instruction.LOOPX, 2, [
+                *field('skipped', 'u8l'),
+            ]),
+        ]),
+        *field('x', 'u8l'),
+        (Instruction.RET,),
+    )
+
+    vm = reader(db, b'\x2a')
+    assert vm.run(code, dict()) == {'x': 42}
+
+
+def test_nested_complex_type():
+    db = get_database()
+    db['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u8l'), (Instruction.RET,)),
+        assemble(),
+    )
+
+    code = assemble(
+        *field('a', 'point'),
+        *field('b', 'point'),
+        (Instruction.RET,),
+    )
+
+    vm = reader(db, b'\x01\x02\x03\x04')
+    assert vm.run(code, dict()) == {
+        'a': {'x': 1, 'y': 2},
+        'b': {'x': 3, 'y': 4},
+    }
+
+
+def test_unsupported_instruction():
+    code = assemble((Instruction.GOTO, 0))
+
+    with pytest.raises(NotImplementedError):
+        reader(get_database(), b'').run(code, dict())
+
+
+def test_block_ends():
+    code = assemble(
+        (Instruction.LOOP, [
+            (Instruction.TEST, Operation.NOT, [
+                (Instruction.BREAK,),
+            ]),
+            (Instruction.LOOPX, 3, [
+                (Instruction.POP,),
+                (Instruction.POP,),
+            ]),
+        ]),
+        (Instruction.TEST, Operation.EQ, []),
+        (Instruction.RET,),
+    )
+
+    assert code.block_ends == {0: 6, 1: 3, 3: 6, 6: 7}
+    assert code.block_end_offsets == {0: 39, 9: 20, 20: 39, 39: 49}
+
+    code.seek(9)
+    assert code.tell_end(2) == 39
+    assert code.tell() == 9
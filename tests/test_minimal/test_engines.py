@@ -0,0 +1,206 @@
+import pytest  # noqa
+
+from minimal import (
+    BufferStream,
+    Engine,
+    Optimization,
+    Instruction,
+    TestOperation as Operation,
+    VirtualMachine,
+    get_database,
+)
+from tests.test_minimal.common import (
+    assemble,
+    field,
+    store,
+    reader,
+    writer,
+    Record,
+)
+
+
+def point_type(engine: Engine) -> Record:
+    return Record(
+        assemble(*field('x', 'u8l'), *field('y', 'i16b'), (Instruction.RET,)),
+        assemble(*store('x', 'u8l'), *store('y', 'i16b'), (Instruction.RET,)),
+        engine,
+    )
+
+
+def shape_type(engine: Engine) -> Record:
+    return Record(
+        assemble(
+            (Instruction.READ, 'u8l'),
+            (Instruction.PUT, 'count'),
+            (Instruction.PUSH, 0),
+            (Instruction.TEST, Operation.NE, [
+                (Instruction.EMPTY, 0),
+                (Instruction.LOOP, [
+                    (Instruction.READ, 'point'),
+                    (Instruction.APPEND, 0),
+                    (Instruction.POP,),
+                    (Instruction.READ, 'u8l'),
+                    (Instruction.TEST, Operation.NOT, [
+                        (Instruction.BREAK,),
+                    ]),
+                    (Instruction.POP,),
+                ]),
+                (Instruction.FINISH, 0),
+                (Instruction.PUT, 'points'),
+                (Instruction.RET,),
+            ]),
+            (Instruction.RET,),
+        ),
+        assemble(),
+        engine,
+    )
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_read_nested(engine):
+    db = get_database()
+    db['point'] = point_type(engine)
+    db['shape'] = shape_type(engine)
+
+    data = b'\x02' + b'\x01\x00\x02\x01' + b'\x03\xff\xfe\x00'
+    vm = reader(db, data)
+
+    assert db['shape'].read(vm) == {
+        'count': 2,
+        'points': [{'x': 1, 'y': 2}, {'x': 3, 'y': -2}],
+    }
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_read_zero_count(engine):
+    db = get_database()
+    db['point'] = point_type(engine)
+    db['shape'] = shape_type(engine)
+
+    assert db['shape'].read(reader(db, b'\x00')) == {'count': 0}
+
+
+@pytest.mark.parametrize('engines', [
+    (Engine.INTERPRETER, Engine.CLOSURE),
+    (Engine.CLOSURE, Engine.SOURCE),
+    (Engine.SOURCE, Engine.INTERPRETER),
+])
+def test_mixed_engines(engines):
+    db = get_database()
+    db['point'] = point_type(engines[0])
+    db['shape'] = shape_type(engines[1])
+
+    vm = reader(db, b'\x01\x07\x00\x08\x00')
+    assert db['shape'].read(vm) == {
+        'count': 1,
+        'points': [{'x': 7, 'y': 8}],
+    }
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_write(engine):
+    db = get_database()
+    db['point'] = point_type(engine)
+
+    vm = writer(db)
+    db['point'].write(vm, {'x': 1, 'y': -2})
+
+    assert vm.stream._stream.getvalue() == b'\x01\xff\xfe'  # noqa
+
+
+@pytest.mark.parametrize('engine', [Engine.CLOSURE, Engine.SOURCE])
+def test_loopx_and_arrays(engine):
+    db = get_database()
+    db['values'] = Record(
+        assemble(
+            (Instruction.EMPTY, 1),
+            (Instruction.LOOPX, 3, [
+                (Instruction.READ, 'u8l'),
+                (Instruction.APPEND, 1),
+                (Instruction.POP,),
+            ]),
+            (Instruction.FLIP, 1),
+            (Instruction.INDEX, 0, 1),
+            (Instruction.PUT, 'last'),
+            (Instruction.POP,),
+            (Instruction.FINISH, 1),
+            (Instruction.PUT, 'values'),
+        ),
+        assemble(),
+        engine,
+    )
+
+    vm = reader(db, b'\x01\x02\x03')
+    assert db['values'].read(vm) == {'last': 3, 'values': [3, 2, 1]}
+
+
+def test_compiled_once():
+    db = get_database()
+    db['point'] = point_type(Engine.CLOSURE)
+
+    compiled = db['point'].compile(db)
+    assert db['point'].compile(db) is compiled
+    assert db['point'].compile(dict(db)) is not compiled
+
+    db['point'].engine = Engine.SOURCE
+    assert db['point'].compile(db)[1] == (Engine.SOURCE, Optimization.FUSE)
+
+
+def test_compiled_per_database():
+    db = get_database()
+    db['point'] = point_type(Engine.CLOSURE)
+    other = dict(db)
+
+    compiled = db['point'].compile(db), db['point'].compile(other)
+
+    # alternating databases don't compile again
+    for _ in range(3):
+        assert db['point'].compile(db) is compiled[0]
+        assert db['point'].compile(other) is compiled[1]
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_cstring(engine):
+    database = get_database()
+    database['entry'] = Record(
+        assemble(*field('key', 'cstring'), *field('value', 'u8l'), (Instruction.RET,)),
+        assemble(*store('key', 'cstring'), *store('value', 'u8l'), (Instruction.RET,)),
+        engine,
+    )
+
+    vm = writer(database)
+    database['entry'].write(vm, {'key': b'abc', 'value': 7})
+    data = vm.stream._stream.getvalue()  # noqa
+    assert data == b'abc\x00\x07'
+
+    assert database['entry'].read(reader(database, data)) == {'key': b'abc', 'value': 7}
+
+    vm = VirtualMachine(database, BufferStream(data))
+    assert database['entry'].read(vm)['key'] == b'abc'
+
+    with pytest.raises(EOFError):
+        database['entry'].read(reader(database, b'abc'))
+
+
+@pytest.mark.parametrize('optimization', list(Optimization))
+@pytest.mark.parametrize('engine', list(Engine))
+def test_break_outside_loop(engine, optimization):
+    database = get_database()
+    database['value'] = Record(
+        assemble(
+            (Instruction.BREAK,),
+            *field('x', 'u8l'),
+            (Instruction.PUSH, 0),
+            (Instruction.TEST, Operation.NOT, [
+                (Instruction.BREAK,),
+            ]),
+            (Instruction.POP,),
+            *field('y', 'u8l'),
+            (Instruction.RET,),
+        ),
+        assemble(),
+        engine,
+        optimization,
+    )
+
+    assert database['value'].read(reader(database, b'\x07\x08')) == {'x': 7, 'y': 8}
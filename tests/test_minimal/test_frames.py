@@ -0,0 +1,168 @@
+import sys
+
+import pytest  # noqa
+
+from minimal import (
+    Engine,
+    Instruction,
+    TestOperation as Operation,
+    get_database,
+)
+from tests.test_minimal.common import (
+    assemble,
+    field,
+    reader,
+    Record,
+)
+
+
+def node_type() -> Record:
+    """ A linked list node, which reads the next node while its flag is set. """
+    return Record(
+        assemble(
+            *field('value', 'u8l'),
+            (Instruction.PUSH, 0),
+            (Instruction.READ, 'u8l'),
+            (Instruction.TEST, Operation.NE, [
+                (Instruction.READ, 'node'),
+                (Instruction.PUT, 'next'),
+                (Instruction.POP,),
+            ]),
+            (Instruction.POP,),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+
+
+def test_deep_nesting():
+    depth = sys.getrecursionlimit() * 5
+    database = get_database()
+    database['node'] = node_type()
+
+    data = b'\x07\x01' * (depth - 1) + b'\x07\x00'
+    vm = reader(database, data)
+    result = vm.run(assemble(
+        (Instruction.READ, 'node'),
+        (Instruction.PUT, 'head'),
+        (Instruction.RET,),
+    ), dict())
+
+    node, count = result['head'], 1
+    while 'next' in node:
+        assert node['value'] == 7
+        node, count = node['next'], count + 1
+
+    assert count == depth
+    assert vm.frames == []
+
+
+def test_break_stays_in_type():
+    database = get_database()
+    database['inner'] = Record(
+        assemble(
+            (Instruction.LOOP, [
+                *field('value', 'u8l'),
+                (Instruction.BREAK,),
+            ]),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+
+    vm = reader(database, bytes([1, 2, 3]))
+    result = vm.run(assemble(
+        (Instruction.EMPTY, 0),
+        (Instruction.LOOPX, 3, [
+            (Instruction.READ, 'inner'),
+            (Instruction.APPEND, 0),
+            (Instruction.POP,),
+        ]),
+        (Instruction.FINISH, 0),
+        (Instruction.PUT, 'items'),
+        (Instruction.RET,),
+    ), dict())
+
+    assert result == {'items': [{'value': 1}, {'value': 2}, {'value': 3}]}
+
+
+def test_ret_inside_loop():
+    database = get_database()
+    database['inner'] = Record(
+        assemble(
+            (Instruction.LOOP, [
+                *field('value', 'u8l'),
+                (Instruction.RET,),
+            ]),
+        ),
+        assemble(),
+    )
+
+    vm = reader(database, bytes([4, 5]))
+    result = vm.run(assemble(
+        (Instruction.LOOPX, 2, [
+            (Instruction.READ, 'inner'),
+            (Instruction.PUT, 'last'),
+            (Instruction.POP,),
+        ]),
+        (Instruction.RET,),
+    ), dict())
+
+    assert result == {'last': {'value': 5}}
+    assert vm.loops == []
+
+
+def test_break_leaves_inner_loop():
+    vm = reader(get_database(), bytes(range(6)))
+    result = vm.run(assemble(
+        (Instruction.EMPTY, 0),
+        (Instruction.LOOPX, 3, [
+            (Instruction.LOOP, [
+                (Instruction.READ, 'u8l'),
+                (Instruction.APPEND, 0),
+                (Instruction.POP,),
+                (Instruction.READ, 'u8l'),
+                (Instruction.APPEND, 0),
+                (Instruction.POP,),
+                (Instruction.BREAK,),
+            ]),
+        ]),
+        (Instruction.FINISH, 0),
+        (Instruction.PUT, 'items'),
+        (Instruction.RET,),
+    ), dict())
+
+    assert result == {'items': [0, 1, 2, 3, 4, 5]}
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_compiled_type_ends_loop(engine):
+    # the last instruction of the loop reads a compiled type,
+    # which runs an interpreted type on its own
+    database = get_database()
+    database['a'] = Record(
+        assemble(
+            (Instruction.PUSH, 0),
+            (Instruction.LOOPX, 3, [
+                (Instruction.POP,),
+                (Instruction.READ, 'b'),
+            ]),
+            (Instruction.PUT, 'last'),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+    database['b'] = Record(
+        assemble(*field('c', 'c'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+    database['c'] = Record(
+        assemble(*field('v', 'u8l'), (Instruction.RET,)),
+        assemble(),
+    )
+
+    vm = reader(database, b'\x01\x02\x03')
+    assert database['a'].read(vm) == {'last': {'c': {'v': 3}}}
+    assert vm.stream.tell() == 3
@@ -0,0 +1,112 @@
+import pytest  # noqa
+
+from minimal import (
+    Engine,
+    Instruction,
+    OperationMode,
+    Optimization,
+    SourceCompiler,
+    fuse_primitives,
+    get_database,
+)
+from tests.test_minimal.common import (
+    assemble,
+    field,
+    store,
+    reader,
+    writer,
+    Record,
+)
+
+
+def test_read_runs():
+    code = assemble(
+        *field('a', 'u32l'),
+        *field('b', 'u8b'),
+        (Instruction.READ, 'u16l'),
+        (Instruction.POP,),
+        *field('c', 'f64'),
+        *field('d', 'u32b'),  # byteorder changes
+        *field('e', 'u16b'),
+        (Instruction.LOOPX, 2, [
+            *field('f', 'u8l'),
+            *field('g', 'u8l'),
+        ]),
+        *field('h', 'u8l'),
+        (Instruction.RET,),
+    )
+
+    runs = fuse_primitives(code, get_database())
+
+    assert sorted(runs) == [0, 11, 18]
+    assert runs[0].end == 11
+    assert runs[0].mode == OperationMode.READ
+    assert runs[0].struct.format == '<IB2xd'
+    assert runs[0].names == ('a', 'b', 'c')
+
+    assert runs[11].struct.format == '>IH'
+    assert runs[11].names == ('d', 'e')
+
+    # the run does not leave the loop body
+    assert runs[18].end == 24
+    assert runs[18].names == ('f', 'g')
+
+
+def test_write_runs():
+    code = assemble(*store('x', 'i16l'), *store('y', 'i16l'), (Instruction.RET,))
+    runs = fuse_primitives(code, get_database())
+
+    assert list(runs) == [0]
+    assert runs[0].mode == OperationMode.WRITE
+    assert runs[0].struct.format == '<hh'
+    assert runs[0].names == ('x', 'y')
+
+
+def test_single_field_is_not_fused():
+    code = assemble(*field('x', 'u32l'), (Instruction.GET, 'x'))
+    assert fuse_primitives(code, get_database()) == {}
+
+
+def test_source():
+    code = assemble(*field('x', 'u32l'), *field('y', 'u32l'))
+
+    fused = SourceCompiler(code, get_database(), Optimization.FUSE).source
+    plain = SourceCompiler(code, get_database(), Optimization.NONE).source
+
+    assert "output['x'], output['y'], = unpack(_struct0)" in fused
+    assert fused.count('unpack(') == 1
+    assert plain.count('unpack(') == 2
+
+
+@pytest.mark.parametrize('engine', [Engine.CLOSURE, Engine.SOURCE])
+@pytest.mark.parametrize('optimization', list(Optimization))
+def test_round_trip(engine, optimization):
+    db = get_database()
+    db['record'] = Record(
+        assemble(
+            *field('a', 'u32b'),
+            *field('b', 'i8l'),
+            (Instruction.READ, 'u16b'),
+            (Instruction.POP,),
+            *field('c', 'i64b'),
+        ),
+        assemble(
+            *store('a', 'u32b'),
+            *store('b', 'i8l'),
+            (Instruction.PUSH, 0),
+            (Instruction.WRITE, 'u16b'),
+            (Instruction.POP,),
+            *store('c', 'i64b'),
+        ),
+        engine,
+        optimization,
+    )
+
+    value = {'a': 0xdeadbeef, 'b': -3, 'c': -(2 ** 40)}
+
+    vm = writer(db)
+    db['record'].write(vm, value)
+    data = vm.stream._stream.getvalue()  # noqa
+
+    assert len(data) == 15
+    assert db['record'].read(reader(db, data)) == value
@@ -0,0 +1,87 @@
+import pytest  # noqa
+from io import BytesIO, RawIOBase
+from itertools import islice
+
+from byte_ninja.stream import BufferedStream, StreamWrapper
+from minimal import (
+    BufferStream,
+    EOFPolicy,
+    Engine,
+    Instruction,
+    get_database,
+    iter_records,
+)
+from tests.test_minimal.common import assemble, field, Record
+
+
+def point_database(engine: Engine = Engine.INTERPRETER) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+    return database
+
+
+POINTS = bytes([1, 2, 0, 3, 4, 0])
+
+
+class Socket(RawIOBase):
+    """ An endless, non-seekable stream, which returns a single byte per read. """
+
+    def __init__(self, data: bytes, repeat: bool = True):
+        self.data = data
+        self.repeat = repeat
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.pos == len(self.data):
+            if not self.repeat:
+                return 0
+            self.pos = 0
+
+        buffer[0] = self.data[self.pos]
+        self.pos += 1
+        return 1
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_file(engine):
+    records = iter_records(point_database(engine), 'point', BytesIO(POINTS))
+    assert list(records) == [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}]
+
+
+def test_streams():
+    database = point_database()
+    assert len(list(iter_records(database, 'point', BufferedStream(POINTS)))) == 2
+    assert len(list(iter_records(database, 'point', StreamWrapper(BytesIO(POINTS))))) == 2
+    assert len(list(iter_records(database, 'point', BufferStream(POINTS)))) == 2
+
+
+def test_endless():
+    records = iter_records(point_database(), 'point', Socket(POINTS))
+    assert list(islice(records, 1000))[-1] == {'x': 3, 'y': 4}
+
+
+def test_socket_eof():
+    records = iter_records(point_database(), 'point', Socket(POINTS, False))
+    assert len(list(records)) == 2
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_partial_error(engine):
+    records = iter_records(point_database(engine), 'point', BytesIO(POINTS[:-1]))
+    assert next(records) == {'x': 1, 'y': 2}
+
+    with pytest.raises(EOFError):
+        next(records)
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_partial_stop(engine):
+    records = iter_records(point_database(engine), 'point', BytesIO(POINTS[:-1]), EOFPolicy.STOP)
+    assert list(records) == [{'x': 1, 'y': 2}]
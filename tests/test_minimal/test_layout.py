@@ -0,0 +1,223 @@
+import pytest  # noqa
+
+from minimal import (
+    FieldLayout,
+    Instruction,
+    SeekMode,
+    TestOperation as Operation,
+    analyze_layout,
+    get_database,
+    read_views,
+)
+from tests.test_minimal.common import assemble, field, reader, Record
+
+
+def layout(*instructions: tuple):
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+    )
+    return analyze_layout(assemble(*instructions, (Instruction.RET,)), database)
+
+
+def offsets(result) -> dict:
+    return {name: (field.offset, field.depends) for name, field in result.fields.items()}
+
+
+def test_fixed():
+    result = layout(*field('kind', 'u8l'), *field('start', 'point'), *field('end', 'point'))
+
+    assert result.fixed and result.size == 7 and result.depends == ()
+    assert result.fields['kind']._replace(type=None) == FieldLayout(0, 1, None, ())
+    assert isinstance(result.fields['end'].type, Record) and result.fields['end'].size == 3
+    assert offsets(result) == {'kind': (0, ()), 'start': (1, ()), 'end': (4, ())}
+
+
+def test_variable_field():
+    result = layout(*field('kind', 'u8l'), *field('name', 'cstring'), *field('size', 'u32l'))
+
+    assert not result.fixed and result.depends == ('name',)
+    assert result.fields['name'].size is None
+    assert offsets(result) == {'kind': (0, ()), 'name': (1, ()), 'size': (None, ('name',))}
+
+
+def test_arrays():
+    result = layout(
+        (Instruction.READ, 'u8l'),
+        (Instruction.PUT, 'count'),
+        (Instruction.RARRAY, 'u16l'),
+        (Instruction.PUT, 'data'),
+        (Instruction.POP,),
+        (Instruction.POP,),
+        *field('end', 'u8l'),
+    )
+    assert result.depends == ('count',)
+    assert offsets(result)['end'] == (None, ('count',))
+
+    result = layout(
+        (Instruction.PUSH, 3),
+        (Instruction.RARRAY, 'u16l'),
+        (Instruction.PUT, 'data'),
+        (Instruction.POP,),
+        (Instruction.POP,),
+        *field('end', 'u8l'),
+    )
+    assert result.size == 7
+    assert offsets(result)['end'] == (6, ())
+
+
+def test_tests():
+    result = layout(
+        (Instruction.READ, 'u8l'),
+        (Instruction.PUT, 'flag'),
+        (Instruction.TEST, Operation.NOT, [
+            *field('extra', 'u16l'),
+        ]),
+        (Instruction.POP,),
+        *field('end', 'u8l'),
+    )
+
+    assert result.depends == ('flag',)
+    assert offsets(result) == {'flag': (0, ()), 'extra': (1, ('flag',)), 'end': (None, ('flag',))}
+
+
+@pytest.mark.parametrize('value, size', [(0, 3), (1, 1)])
+def test_constant_tests(value, size):
+    result = layout(
+        (Instruction.PUSH, value),
+        (Instruction.TEST, Operation.NOT, [
+            *field('extra', 'u16l'),
+        ]),
+        (Instruction.POP,),
+        *field('end', 'u8l'),
+    )
+    assert result.size == size
+    assert ('extra' in result.fields) == (value == 0)
+
+
+def test_loops():
+    result = layout(
+        (Instruction.LOOPX, 3, [
+            *field('item', 'u16l'),
+        ]),
+        *field('end', 'u8l'),
+    )
+    assert result.size == 7
+    assert offsets(result) == {'item': (None, ()), 'end': (6, ())}
+
+    result = layout(
+        (Instruction.LOOP, [
+            (Instruction.READ, 'u8l'),
+            (Instruction.PUT, 'more'),
+            (Instruction.TEST, Operation.NOT, [
+                (Instruction.BREAK,),
+            ]),
+            (Instruction.POP,),
+        ]),
+        *field('end', 'u8l'),
+    )
+    assert result.depends == ('more',)
+    assert offsets(result)['end'] == (None, ('more',))
+
+
+def test_seek():
+    result = layout(
+        *field('kind', 'u8l'),
+        (Instruction.PUSH, 2),
+        (Instruction.SEEK, SeekMode.REL),
+        (Instruction.POP,),
+        *field('end', 'u8l'),
+    )
+    assert offsets(result)['end'] == (3, ())
+
+    result = layout(
+        (Instruction.READ, 'u32l'),
+        (Instruction.PUT, 'pointer'),
+        (Instruction.SEEK, SeekMode.START),
+        (Instruction.POP,),
+        *field('end', 'u8l'),
+    )
+    assert offsets(result)['end'] == (None, ('pointer',))
+
+
+def test_recursive():
+    database = get_database()
+    database['node'] = Record(
+        assemble(
+            (Instruction.READ, 'u8l'),
+            (Instruction.PUT, 'last'),
+            (Instruction.TEST, Operation.NOT, [
+                *field('next', 'node'),
+            ]),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+
+    result = database['node'].analyze(database)
+    assert result.depends == ('last', 'next')
+    assert offsets(result)['next'] == (1, ('last',))
+
+
+def test_loops_ending_early():
+    # the body runs once
+    result = layout(
+        (Instruction.LOOPX, 10, [
+            (Instruction.READ, 'u8l'),
+            (Instruction.POP,),
+            (Instruction.BREAK,),
+        ]),
+        *field('y', 'u16l'),
+    )
+    assert result.size == 3
+    assert offsets(result)['y'] == (1, ())
+
+    result = layout(
+        (Instruction.LOOPX, 10, [
+            (Instruction.READ, 'u8l'),
+            (Instruction.TEST, Operation.NOT, [
+                (Instruction.BREAK,),
+            ]),
+            (Instruction.POP,),
+        ]),
+        *field('y', 'u16l'),
+    )
+    assert not result.fixed
+    assert offsets(result)['y'][0] is None
+
+    # the code ends in the loop
+    result = layout(
+        (Instruction.LOOP, [
+            *field('x', 'u8l'),
+            (Instruction.RET,),
+        ]),
+        *field('y', 'u16l'),
+    )
+    assert result.size == 1 and 'y' not in result.fields
+
+
+def test_break_outside_loop():
+    result = layout((Instruction.BREAK,), *field('x', 'u8l'))
+    assert result.size == 1 and offsets(result) == {'x': (0, ())}
+
+
+def test_views_of_loops():
+    database = get_database()
+    database['value'] = Record(
+        assemble(
+            (Instruction.LOOPX, 10, [
+                (Instruction.READ, 'u8l'),
+                (Instruction.POP,),
+                (Instruction.BREAK,),
+            ]),
+            *field('y', 'u16l'),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+
+    data = bytes([0, 1, 2]) * 4
+    decoded = database['value'].read(reader(database, data))
+    assert [view.as_dict() for view in read_views(database, 'value', data)] == [decoded] * 4
@@ -0,0 +1,131 @@
+import pytest  # noqa
+from io import BytesIO
+from struct import Struct
+
+from minimal import (
+    Engine,
+    Instruction,
+    Optimization,
+    OutputBuffer,
+    SeekMode,
+    VirtualMachine,
+    get_database,
+    write_many,
+)
+from tests.test_minimal.common import assemble, store, writer, Record
+
+
+class Target(BytesIO):
+    """ Counts the writes to it. """
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data: bytes) -> int:
+        self.writes += 1
+        return super().write(data)
+
+
+def point_database(engine: Engine, optimization: Optimization = Optimization.FUSE) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(),
+        assemble(
+            *store('x', 'u8l'),
+            *store('y', 'i16b'),
+            *store('scale', 'f32'),
+            (Instruction.RET,),
+        ),
+        engine,
+        optimization,
+    )
+    return database
+
+
+POINTS = [{'x': i, 'y': -i, 'scale': 0.5} for i in range(10)]
+
+
+def test_buffer():
+    stream = OutputBuffer(capacity=2)
+    u32 = Struct('<I')
+
+    stream.pack(u32, 1)
+    stream.write(b'ab')
+    stream.pack(u32, 2)
+
+    assert len(stream.buffer) == 16
+    assert stream.tell() == 10
+    assert stream.getvalue() == b'\x01\x00\x00\x00ab\x02\x00\x00\x00'
+
+
+def test_flush_view():
+    written = list()
+
+    class Views(BytesIO):
+        def write(self, data) -> int:
+            written.append(type(data))
+            return super().write(data)
+
+    target = Views()
+    stream = OutputBuffer(target, capacity=2)
+    stream.write(b'ab')
+    stream.flush()
+
+    # the buffer isn't copied and can grow after the flush
+    stream.write(b'cdefgh')
+    stream.flush()
+
+    assert written == [memoryview, memoryview]
+    assert target.getvalue() == b'abcdefgh'
+
+
+def test_seek():
+    target = Target()
+    stream = OutputBuffer(target)
+
+    stream.write(b'\xff' * 4)
+    stream.flush()
+    assert stream.tell() == 4
+
+    # patch a length in front of the data
+    stream.pack(Struct('B'), 0)
+    stream.write(b'abc')
+    stream.seek(4, SeekMode.START)
+    stream.pack(Struct('B'), 3)
+    assert stream.seek(0, SeekMode.END) == 8
+
+    # the skipped bytes are zeros, not old data
+    stream.seek(2, SeekMode.REL)
+    stream.write(b'!')
+    stream.flush()
+    assert target.getvalue() == b'\xff' * 4 + b'\x03abc\x00\x00!'
+
+    with pytest.raises(ValueError):
+        stream.seek(0, SeekMode.START)
+
+
+@pytest.mark.parametrize('optimization', list(Optimization))
+@pytest.mark.parametrize('engine', list(Engine))
+def test_write_many(engine, optimization):
+    database = point_database(engine, optimization)
+
+    expected = writer(database)
+    for point in POINTS:
+        database['point'].write(expected, point)
+
+    target = Target()
+    write_many(database, 'point', POINTS, target, batch=4, capacity=8)
+
+    assert target.getvalue() == expected.stream._stream.getvalue()  # noqa
+    assert target.writes == 3
+
+
+def test_flush_per_record():
+    database = point_database(Engine.CLOSURE)
+    target = Target()
+    vm = VirtualMachine(database, OutputBuffer(target))
+
+    vm.write_many('point', POINTS[:3])
+    assert target.writes == 3
+    assert vm.stream.tell() == 21
@@ -0,0 +1,129 @@
+import pytest  # noqa
+import pickle
+
+import minimal
+from minimal import (
+    Engine,
+    Instruction,
+    RecordType,
+    get_database,
+    read_parallel,
+    record_class,
+    shard_ranges,
+)
+from tests.test_minimal.common import assemble, field, reader, Record
+
+
+def database(engine: Engine = Engine.INTERPRETER) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+    database['blob'] = Record(
+        assemble(
+            (Instruction.READ, 'u8l'),
+            (Instruction.RARRAY, 'u8l'),
+            (Instruction.PUT, 'data'),
+            (Instruction.POP,),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+        engine,
+    )
+    return database
+
+
+def test_shard_ranges():
+    assert shard_ranges(10, record_size=3, shard_records=2) == [(0, 2), (6, 2)]
+    assert shard_ranges(9, record_size=3, shard_records=5) == [(0, 3)]
+    assert shard_ranges(0, record_size=3) == []
+    assert shard_ranges(9, [0, 1, 4, 8], shard_records=3) == [(0, 3), (8, 1)]
+
+
+def test_pickle():
+    types = database(Engine.CLOSURE)
+    point = types['point']
+    vm = reader(types, b'\x01\x02\x00')
+    assert point.read(vm) == {'x': 1, 'y': 2}
+    assert point.compiled is not None
+
+    copy = pickle.loads(pickle.dumps(types))
+    assert copy['point'].compiled is None
+    assert copy['point'].engine == Engine.CLOSURE
+    assert copy['point'].read(reader(copy, b'\x01\x02\x00')) == {'x': 1, 'y': 2}
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_fixed_size(tmp_path, engine):
+    path = tmp_path / 'points.bin'
+    path.write_bytes(b''.join(bytes([i, i, 0]) for i in range(100)))
+
+    records = read_parallel(database(engine), 'point', path, record_size=3, shard_records=7, max_workers=2)
+    assert list(records) == [{'x': i, 'y': i} for i in range(100)]
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_record_type(tmp_path, engine):
+    Point = record_class('Point', ['x', 'y'])
+    types = get_database()
+    types['point'] = RecordType(
+        Point,
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+
+    point = pickle.loads(pickle.dumps(types['point'].read(reader(types, b'\x01\x02\x00'))))
+    assert type(point) is Point and point == {'x': 1, 'y': 2}
+
+    path = tmp_path / 'points.bin'
+    path.write_bytes(b''.join(bytes([i, i, 0]) for i in range(20)))
+
+    records = list(read_parallel(types, 'point', path, record_size=3, shard_records=7, max_workers=2))
+    assert all(type(record) is Point for record in records)
+    assert records == [{'x': i, 'y': i} for i in range(20)]
+
+
+def test_boundaries(tmp_path):
+    path = tmp_path / 'blobs.bin'
+    boundaries, data = list(), b''
+    for i in range(50):
+        boundaries.append(len(data))
+        data += bytes([i % 5]) + bytes(range(i % 5))
+    path.write_bytes(data)
+
+    records = read_parallel(database(), 'blob', path, boundaries, shard_records=8, max_workers=2)
+    assert [list(record['data']) for record in records] == [list(range(i % 5)) for i in range(50)]
+
+
+def test_partial_record(tmp_path):
+    path = tmp_path / 'points.bin'
+    path.write_bytes(b'\x01\x02\x00\x03')
+
+    with pytest.raises(EOFError):
+        list(read_parallel(database(), 'point', path, record_size=3, max_workers=1))
+
+
+def test_bounded_window(tmp_path, monkeypatch):
+    path = tmp_path / 'points.bin'
+    path.write_bytes(bytes(3 * 100))
+
+    submitted = list()
+
+    class Executor(minimal.ProcessPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args)
+            return super().submit(*args, **kwargs)
+
+    monkeypatch.setattr(minimal, 'ProcessPoolExecutor', Executor)
+
+    records = read_parallel(database(), 'point', path, record_size=3, shard_records=1, max_workers=2)
+    assert next(records) == {'x': 0, 'y': 0}
+    assert len(submitted) == 5
+
+    # the shards, which weren't submitted, are never decoded
+    records.close()
+    assert len(submitted) == 5
@@ -0,0 +1,101 @@
+import pytest  # noqa
+import gc
+from weakref import ref
+from threading import Thread
+
+from minimal import (
+    BufferStream,
+    Columns,
+    Instruction,
+    MachinePool,
+    Profiler,
+    get_database,
+)
+from tests.test_minimal.common import assemble, field, reader, Record
+
+
+def point_database() -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+    )
+    return database
+
+
+def test_reset_after_error():
+    database = point_database()
+    vm = reader(database, b'\x01\x02')
+
+    with pytest.raises(EOFError):
+        database['point'].read(vm)
+    assert vm.frames
+
+    stack, frames = vm.stack, vm.frames
+    vm.reset(BufferStream(b'\x01\x02\x00'))
+
+    assert vm.stack is stack and vm.frames is frames
+    assert not vm.frames and not vm.outputs and not vm.loops
+    assert database['point'].read(vm) == {'x': 1, 'y': 2}
+
+
+def test_pool():
+    pool = MachinePool()
+    database = point_database()
+
+    with pool.borrow(database, BufferStream(b'\x01\x02\x00')) as vm:
+        assert database['point'].read(vm) == {'x': 1, 'y': 2}
+
+    with pool.borrow(database, BufferStream(b'\x03\x04\x00')) as other:
+        assert other is vm
+        assert database['point'].read(vm) == {'x': 3, 'y': 4}
+
+    assert pool.acquire(get_database(), BufferStream(b'')) is not vm
+
+
+def test_pool_per_thread():
+    pool = MachinePool()
+    database = point_database()
+    pool.release(pool.acquire(database, BufferStream(b'')))
+
+    machines = list()
+    thread = Thread(target=lambda: machines.append(pool.acquire(database, BufferStream(b''))))
+    thread.start()
+    thread.join()
+
+    assert machines[0] is not pool.acquire(database, BufferStream(b''))
+
+
+def test_pool_options():
+    pool = MachinePool()
+    database = point_database()
+
+    with pool.borrow(database, BufferStream(b'\x01\x02\x00'), columnar=True) as vm:
+        vm.profiler = Profiler(database)
+        assert isinstance(vm.read_columns('point'), Columns)
+
+    with pool.borrow(database, BufferStream(b'')) as other:
+        assert other is vm
+        assert not other.columnar and other.profiler is None
+
+
+class Database(dict):
+    """ A database, which can be weakly referenced. """
+
+
+def test_pool_databases():
+    pool = MachinePool(databases=2)
+    databases = [Database(point_database()) for _ in range(3)]
+
+    machines = [pool.acquire(database, BufferStream(b'')) for database in databases]
+    for vm in machines:
+        pool.release(vm)
+
+    # only the machines of the most recent databases are kept
+    assert pool.acquire(databases[0], BufferStream(b'')) is not machines[0]
+    assert pool.acquire(databases[2], BufferStream(b'')) is machines[2]
+
+    first = ref(databases[0])
+    del databases[0], machines[0]
+    gc.collect()
+    assert first() is None
@@ -0,0 +1,72 @@
+import pytest  # noqa
+
+from minimal import (
+    Engine,
+    Instruction,
+    Profiler,
+    get_database,
+)
+from tests.test_minimal.common import assemble, field, reader, Record
+
+
+def shape_database(engine: Engine) -> dict:
+    database = get_database()
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'u16l'), (Instruction.RET,)),
+        assemble(),
+        engine,
+    )
+    database['shape'] = Record(
+        assemble(
+            *field('id', 'u32l'),
+            (Instruction.LOOPX, 2, [
+                *field('corner', 'point'),
+            ]),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+    return database
+
+
+DATA = bytes([1, 0, 0, 0, 1, 2, 0, 3, 4, 0])
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_profile(engine):
+    database = shape_database(engine)
+    vm = reader(database, DATA)
+    vm.profiler = Profiler(database)
+
+    assert database['shape'].read(vm) == {'id': 1, 'corner': {'x': 3, 'y': 4}}
+    report = vm.profiler.report()
+
+    assert report['types']['shape']['count'] == 1
+    assert report['types']['shape']['bytes'] == 10
+    assert report['types']['point']['count'] == 2
+    assert report['types']['point']['bytes'] == 6
+
+    assert report['fields']['shape.id']['count'] == 1
+    assert report['fields']['shape.id']['bytes'] == 4
+    assert report['fields']['shape.corner']['count'] == 2
+    assert report['fields']['shape.corner']['bytes'] == 6
+    assert report['opcodes']['LOOPX']['count'] == 1
+
+    if engine == Engine.INTERPRETER:
+        assert report['fields']['point.y']['count'] == 2
+        assert report['fields']['point.y']['bytes'] == 4
+        assert report['opcodes']['READ']['count'] == 1 + 2 + 4
+    else:
+        assert 'point.y' not in report['fields']
+
+    table = vm.profiler.table()
+    assert 'shape.corner' in table
+    assert table.splitlines()[0].split() == ['name', 'count', 'time', 'bytes']
+
+
+def test_disabled():
+    database = shape_database(Engine.INTERPRETER)
+    vm = reader(database, DATA)
+
+    assert vm.profiler is None
+    assert database['shape'].read(vm)['id'] == 1
@@ -0,0 +1,133 @@
+import pytest  # noqa
+from sys import getsizeof
+from types import SimpleNamespace
+
+from minimal import (
+    Engine,
+    Instruction,
+    Optimization,
+    RecordType,
+    SlottedRecord,
+    TestOperation as Operation,
+    SourceCompiler,
+    get_database,
+    record_class,
+    structure_record,
+)
+from tests.test_minimal.common import assemble, field, store, reader, writer
+
+
+Point = record_class('Point', ['x', 'y', 'tag', 'extra'])
+
+
+def point_database(engine: Engine, optimization: Optimization = Optimization.FUSE) -> dict:
+    database = get_database()
+    database['point'] = RecordType(
+        Point,
+        assemble(
+            *field('x', 'u8l'),
+            *field('y', 'u16l'),
+            (Instruction.READ, 'u8l'),
+            (Instruction.PUT, 'tag'),
+            (Instruction.TEST, Operation.NOT, [
+                *field('extra', 'u8l'),
+            ]),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(
+            *store('x', 'u8l'),
+            *store('y', 'u16l'),
+            *store('tag', 'u8l'),
+            (Instruction.RET,),
+        ),
+        engine,
+        optimization,
+    )
+    return database
+
+
+def test_record_class():
+    point = Point()
+    point['x'] = 1
+    point.y = 2
+
+    assert isinstance(point, SlottedRecord)
+    assert Point.__fields__ == ('x', 'y', 'tag', 'extra')
+    assert point['y'] == 2
+    assert 'x' in point and 'tag' not in point
+    assert point == {'x': 1, 'y': 2}
+    assert repr(point) == 'Point(x=1, y=2)'
+    assert not hasattr(point, '__dict__')
+    assert getsizeof(point) < getsizeof({'x': 1, 'y': 2, 'tag': 0, 'extra': 0})
+
+    with pytest.raises(KeyError):
+        point['z'] = 3
+    with pytest.raises(KeyError):
+        point['tag']
+    with pytest.raises(KeyError):
+        point['keys']
+    with pytest.raises(KeyError):
+        point['__class__']
+
+
+@pytest.mark.parametrize('name', ['keys', 'as_dict', '__class__', '__fields__'])
+def test_reserved_field(name):
+    with pytest.raises(ValueError):
+        record_class('Record', ['x', name])
+
+
+@pytest.mark.parametrize('optimization', list(Optimization))
+@pytest.mark.parametrize('engine', list(Engine))
+def test_read(engine, optimization):
+    database = point_database(engine, optimization)
+    point = database['point']
+
+    value = point.read(reader(database, b'\x01\x02\x00\x00\x07'))
+    assert isinstance(value, Point)
+    assert value == {'x': 1, 'y': 2, 'tag': 0, 'extra': 7}
+
+    value = point.read(reader(database, b'\x01\x02\x00\x01'))
+    assert value.keys() == ['x', 'y', 'tag']
+
+    vm = writer(database)
+    point.write(vm, value)
+    assert vm.stream._stream.getvalue() == b'\x01\x02\x00\x01'  # noqa
+
+
+def test_source_slots():
+    database = point_database(Engine.SOURCE)
+    source = SourceCompiler(database['point'].read_code, database, record=Point).source
+
+    assert 'output.x, output.y, = unpack(' in source
+    assert 'output.tag = s0' in source
+    assert 'output.extra = ' in source
+    assert 'output[' not in source
+
+
+def test_structure_record():
+    fields = [SimpleNamespace(name=name) for name in ('kind', 'size', 'data', 'size')]
+    structure = type('Message', (), {'__fields__': fields})
+
+    record = structure_record(structure)
+    assert record.__name__ == 'Message'
+    assert record.__fields__ == ('kind', 'size', 'data')
+
+
+@pytest.mark.parametrize('engine', list(Engine))
+def test_keyword_field(engine):
+    Range = record_class('Range', ['from', 'to'])
+    database = get_database()
+    database['range'] = RecordType(
+        Range,
+        assemble(*field('from', 'u8l'), *field('to', 'u8l'), (Instruction.RET,)),
+        assemble(*store('from', 'u8l'), *store('to', 'u8l'), (Instruction.RET,)),
+        engine,
+    )
+
+    value = database['range'].read(reader(database, b'\x01\x02'))
+    assert value == {'from': 1, 'to': 2}
+
+    vm = writer(database)
+    database['range'].write(vm, value)
+    assert vm.stream._stream.getvalue() == b'\x01\x02'  # noqa
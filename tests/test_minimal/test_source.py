@@ -0,0 +1,91 @@
+import pytest  # noqa
+
+from minimal import (
+    Instruction,
+    SourceCompiler,
+    TestOperation as Operation,
+    get_database,
+)
+from tests.test_minimal.common import assemble, field, reader
+
+
+def test_source():
+    code = assemble(
+        *field('x', 'u32l'),
+        (Instruction.READ, 'f64'),
+        (Instruction.PUSH, 0),
+        (Instruction.TEST, Operation.LT, [
+            (Instruction.PUT, 'y'),
+        ]),
+        (Instruction.RET,),
+    )
+
+    source = SourceCompiler(code, get_database()).source
+
+    assert source == (
+        'def program(vm, output):\n'
+        '    read = vm.stream.read\n'
+        '    unpack = vm.stream.unpack\n'
+        '    pack = vm.stream.pack\n'
+        '    s0, = unpack(_struct0)\n'
+        "    output['x'] = s0\n"
+        '    s0, = unpack(_struct1)\n'
+        '    s1 = 0\n'
+        '    if s1 < s0:\n'
+        "        output['y'] = s1\n"
+        '    return output\n'
+    )
+
+
+def test_loops():
+    code = assemble(
+        (Instruction.EMPTY, 0),
+        (Instruction.LOOP, [
+            (Instruction.READ, 'u8l'),
+            (Instruction.TEST, Operation.NOT, [
+                (Instruction.BREAK,),
+            ]),
+            (Instruction.APPEND, 0),
+            (Instruction.POP,),
+        ]),
+        (Instruction.FINISH, 0),
+        (Instruction.PUT, 'values'),
+    )
+
+    program = SourceCompiler(code, get_database()).compile()
+    vm = reader(get_database(), b'\x01\x02\x00\x03')
+
+    assert program(vm, dict()) == {'values': [1, 2]}
+
+
+def test_dead_code():
+    code = assemble(
+        (Instruction.LOOPX, 2, [
+            (Instruction.BREAK,),
+            (Instruction.POP,),
+        ]),
+        (Instruction.RET,),
+        (Instruction.POP,),
+    )
+
+    assert 'pop' not in SourceCompiler(code, get_database()).source
+
+
+def test_unbalanced_stack():
+    code = assemble(
+        (Instruction.LOOPX, 2, [
+            (Instruction.PUSH, 1),
+        ]),
+    )
+
+    with pytest.raises(ValueError, match='LOOPX leaves the stack unbalanced at offset 0'):
+        SourceCompiler(code, get_database())
+
+
+def test_stack_underflow():
+    with pytest.raises(ValueError, match='stack underflow at offset 0'):
+        SourceCompiler(assemble((Instruction.PUT, 'x')), get_database())
+
+    code = assemble((Instruction.PUSH, 1), (Instruction.POP,), (Instruction.POP,))
+    with pytest.raises(ValueError, match='stack underflow at offset [1-9]'):
+        SourceCompiler(code, get_database())
@@ -0,0 +1,109 @@
+import pytest  # noqa
+import pickle
+
+from minimal import (
+    BytesType,
+    Instruction,
+    RecordView,
+    TestOperation as Operation,
+    get_database,
+    read_views,
+)
+from tests.test_minimal.common import assemble, field, reader, Record
+
+
+def database() -> dict:
+    database = get_database()
+    database['tag'] = BytesType(2)
+    database['point'] = Record(
+        assemble(*field('x', 'u8l'), *field('y', 'i16l'), (Instruction.RET,)),
+        assemble(),
+    )
+    database['segment'] = Record(
+        assemble(
+            *field('tag', 'tag'),
+            *field('start', 'point'),
+            *field('end', 'point'),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+    database['optional'] = Record(
+        assemble(
+            (Instruction.READ, 'u8l'),
+            (Instruction.TEST, Operation.NOT, [
+                *field('x', 'u8l'),
+            ]),
+            (Instruction.POP,),
+            (Instruction.RET,),
+        ),
+        assemble(),
+    )
+    return database
+
+
+SEGMENTS = b'ab\x01\xff\xff\x02\x03\x00' + b'cd\x04\x05\x00\x06\x07\x00'
+
+
+def test_fixed_layout():
+    types = database()
+
+    layout = types['segment'].fixed_layout(types)
+    assert layout.size == 8
+    assert {name: slot[:2] for name, slot in layout.fields.items()} == {
+        'tag': (0, 2),
+        'start': (2, 3),
+        'end': (5, 3),
+    }
+
+    assert types['optional'].fixed_layout(types) is None
+    assert types['point'].fixed_layout(types) is types['point'].fixed_layout(types)
+
+
+def test_view():
+    types = database()
+    view = types['segment'].view(types, SEGMENTS, 8)
+
+    assert isinstance(view, RecordView)
+    assert view.keys() == ['tag', 'start', 'end']
+    assert not view.cache
+
+    assert view['start']['y'] == 5
+    assert view.end.x == 6
+    assert bytes(view.tag) == b'cd'
+    assert list(view.cache) == ['start', 'end', 'tag']
+    assert view['start'] is view['start']
+
+    with pytest.raises(AttributeError):
+        view.other
+
+    with pytest.raises(ValueError):
+        types['optional'].view(types, b'\x01\x02')
+
+
+def test_read_views():
+    types = database()
+    views = read_views(types, 'segment', bytearray(SEGMENTS))
+
+    assert len(views) == 2
+    assert views[0].as_dict() == {
+        'tag': views[0].tag,
+        'start': {'x': 1, 'y': -1},
+        'end': {'x': 2, 'y': 3},
+    }
+
+    # the same values as a full decode
+    values = [types['point'].read(reader(types, b'\x01\xff\xff\x02\x03\x00'))]
+    assert [view.as_dict() for view in read_views(types, 'point', b'\x01\xff\xff\x02\x03\x00', 1)] == values
+
+    with pytest.raises(EOFError):
+        read_views(types, 'point', b'\x01\xff\xff', 2)
+
+
+def test_pickle():
+    types = database()
+    types['segment'].fixed_layout(types)
+
+    copy = pickle.loads(pickle.dumps(types))
+    assert copy['segment'].layout is None
+    assert read_views(copy, 'segment', SEGMENTS)[1].start.x == 4
@@ -0,0 +1,125 @@
+import pytest
+from io import BytesIO, RawIOBase, SEEK_CUR, SEEK_END
+
+from byte_ninja.enums import ByteOrder
+from byte_ninja.stream import StreamWrapper
+from minimal import DataStream, OperationMode, VirtualMachine, get_database
+
+
+class Sink(RawIOBase):
+    """ An unbuffered sink, which writes at most 3 bytes at once. """
+
+    def __init__(self):
+        self.data = BytesIO()
+        self.writes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.data.tell()
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        return self.data.seek(pos, whence)
+
+    def write(self, data) -> int:
+        self.writes += 1
+        return self.data.write(bytes(data[:3]))
+
+
+def test_unbuffered():
+    sink = Sink()
+    stream = StreamWrapper(sink, ByteOrder.LITTLE)
+
+    stream.write_uint(1, 2)
+    assert sink.writes == 1
+
+
+def test_coalesce():
+    sink = Sink()
+    stream = StreamWrapper(sink, ByteOrder.LITTLE, write_buffer=8)
+
+    for i in range(3):
+        stream.write_uint(i, 2)
+    assert sink.writes == 0
+    assert stream.tell() == 6
+
+    stream.write_uint(3, 2)
+    assert sink.data.getvalue() == b'\x00\x00\x01\x00\x02\x00\x03\x00'
+    assert sink.writes == 3
+
+    # larger writes go straight through
+    stream.write(b'0123456789')
+    assert sink.data.getvalue().endswith(b'0123456789')
+
+
+def test_flush():
+    sink = Sink()
+    stream = StreamWrapper(sink, write_buffer=1024)
+
+    stream.write(b'ab')
+    stream.flush()
+    assert sink.data.getvalue() == b'ab'
+
+    stream.write(b'cd')
+    stream.close()
+    assert sink.data.getvalue() == b'abcd'
+
+
+def test_seek_in_buffer():
+    sink = Sink()
+    stream = StreamWrapper(sink, ByteOrder.LITTLE, write_buffer=1024)
+
+    # patch a length in front of the data
+    stream.write(b'x')
+    stream.write_uint(0, 1)
+    stream.write(b'abc')
+    end = stream.tell()
+
+    assert stream.seek(1) == 1
+    stream.write_uint(3, 1)
+    assert stream.seek(end) == end
+    stream.write(b'!')
+
+    assert sink.writes == 0
+    stream.flush()
+    assert sink.data.getvalue() == b'x\x03abc!'
+
+
+def test_seek_out_of_buffer():
+    sink = Sink()
+    stream = StreamWrapper(sink, write_buffer=1024)
+
+    stream.write(b'abcdef')
+    stream.seek(-4, SEEK_CUR)
+    stream.write(b'C')
+    assert stream.seek(0, SEEK_END) == 6
+    assert sink.data.getvalue() == b'abCdef'
+
+    stream.write(b'gh')
+    stream.seek(2, SEEK_CUR)
+    stream.write(b'!')
+    stream.flush()
+    assert sink.data.getvalue() == b'abCdefgh\x00\x00!'
+
+
+def test_read_after_write():
+    inner = BytesIO(b'0123456789')
+    stream = StreamWrapper(inner, write_buffer=1024)
+
+    stream.write(b'ab')
+    assert stream.read(2) == b'23'
+    assert inner.getvalue().startswith(b'ab23')
+
+
+def test_virtual_machine():
+    sink = Sink()
+    stream = StreamWrapper(sink, write_buffer=4096)
+    vm = VirtualMachine(get_database(), DataStream(stream, OperationMode.WRITE))
+
+    vm.write_many('u16l', range(100), batch=50)
+    assert sink.data.getvalue() == b''.join(i.to_bytes(2, 'little') for i in range(100))
+    assert sink.writes == 2 * 34